@@ -1,9 +1,14 @@
 #%%
 import os
+import sys
 import pandas as pd
 import plotly.graph_objects as go
 import webbrowser
 
+# Lecteur CSV partagé avec les scripts d'édition (détection du dialecte)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script", "edition"))
+from lecteur_csv import cle_colonne, lire_csv
+
 # ============================================================
 # 1 — CHEMIN VERS LE DOSSIER DES CSV
 # ============================================================
@@ -12,116 +17,170 @@ import webbrowser
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FOLDER = os.path.join(SCRIPT_DIR, "data")  # <-- docs/data
 
-if not os.path.isdir(DATA_FOLDER):
-    raise ValueError(f"Le dossier n'existe pas : {DATA_FOLDER}")
+
+def entete_a_points(colonnes):
+    """En-tête dont les espaces et apostrophes sont remplacés par des points."""
+    return any("." in c and " " not in c for c in colonnes)
+
+
+def famille(fichier):
+    """Famille d'un fichier d'après son nom (libellé des tables et du menu)."""
+    nom = fichier.lower()
+    if "tgv" in nom:
+        return "TGV"
+    if nom.startswith("occitanie_retard"):
+        return "Régional"
+    if "intercites" in nom or "liste_gares" in nom:
+        return "Intercités"
+    if "frequentation" in nom:
+        return "Fréquentation"
+    if "temps_moyen" in nom:
+        return "Temps de trajet"
+    return "Autre"
 
 
 def charger_csv(data_folder):
-    fichiers = [f for f in os.listdir(data_folder) if f.endswith(".csv")]
+    """
+    Charge les CSV du dossier en tables séparées, une par schéma.
+
+    Chaque fichier est lu par lecteur_csv (séparateur, encodage et guillemets
+    détectés). Les fichiers ayant les mêmes colonnes sont concaténés ensemble,
+    les noms étant comparés sans ponctuation ni espaces (cle_colonne) :
+    'Nombre.de.trains.en.retard.à.l.arrivée' rejoint "Nombre de trains en
+    retard à l'arrivée", et la table garde l'en-tête en clair d'un des
+    fichiers. Des fichiers de schémas différents (TGV, Intercités, fréquentation, temps
+    de trajet, totaux régionaux) ne sont jamais réunis dans une même table
+    remplie de valeurs manquantes.
+
+    Retour
+    ------
+    dict
+        Dictionnaire nom de la table -> DataFrame (colonne 'source_fichier'
+        ajoutée).
+    """
+    fichiers = sorted(f for f in os.listdir(data_folder) if f.endswith(".csv"))
     if not fichiers:
         raise ValueError("Aucun fichier CSV trouvé dans le dossier !")
 
-    frames = []
+    groupes = {}
     for fichier in fichiers:
         path = os.path.join(data_folder, fichier)
         print(f"[OK] Chargement : {fichier}")
-        try:
-            df = pd.read_csv(path, sep=";", low_memory=False)
-        except:
-            df = pd.read_csv(path, low_memory=False)
+        df = lire_csv(path)
+        df.columns = [str(c).strip() for c in df.columns]
         df["source_fichier"] = fichier
-        frames.append(df)
-
-    return pd.concat(frames, ignore_index=True)
+        groupes.setdefault(tuple(cle_colonne(c) for c in df.columns), []).append((fichier, df))
+
+    tables = {}
+    for frames in groupes.values():
+        nom = famille(frames[0][0])
+        # Deux schémas différents d'une même famille : tables numérotées
+        cle, n = nom, 2
+        while cle in tables:
+            cle, n = f"{nom} ({n})", n + 1
+        entetes = [list(df.columns) for _, df in frames]
+        entete = next((e for e in entetes if not entete_a_points(e)), None)
+        if entete is None:
+            entete = [c.replace(".", " ") for c in entetes[0]]
+        table = pd.concat([df.set_axis(entete, axis=1) for _, df in frames], ignore_index=True)
+        table["source_fichier"] = table["source_fichier"].astype("category")
+        tables[cle] = table
+    return tables
 
-df = charger_csv(DATA_FOLDER)
 
 # ============================================================
-# 2 — DÉTECTION AUTOMATIQUE COLONNE VILLE/GARE
+# 2 — COLONNE VILLE/GARE DE CHAQUE TABLE
 # ============================================================
-COLONNE_VILLE = next(
-    (col for col in df.columns if "ville" in col.lower() or "gare" in col.lower()),
-    None
-)
-if COLONNE_VILLE is None:
-    raise ValueError("Impossible de trouver une colonne représentant la ville ou la gare !")
+# Colonnes préférées, puis détection automatique ('ville' ou 'gare')
+COLONNES_VILLE = ["Gare de départ", "Départ", "Nom de la gare", "Région", "Relations"]
 
-print(f"Colonne détectée pour ville/gare : {COLONNE_VILLE}")
 
-# Nettoyage de la colonne ville/gare
-df = df.dropna(subset=[COLONNE_VILLE])
-df[COLONNE_VILLE] = df[COLONNE_VILLE].astype(str).str.upper()
-print(f"Nombre de lignes après nettoyage : {len(df)}")
+def colonne_ville(df):
+    return next((c for c in COLONNES_VILLE if c in df.columns), None) or next(
+        (c for c in df.columns if "ville" in c.lower() or "gare" in c.lower()),
+        None
+    )
 
 # ============================================================
-# 3 — IDENTIFIER LES COLONNES NUMÉRIQUES UTILES
+# 3 — COLONNES NUMÉRIQUES UTILES ET MOYENNES PAR VILLE, PAR TABLE
 # ============================================================
-# Convertir toutes les colonnes en numériques si possible
-for col in df.columns:
-    df[col] = pd.to_numeric(df[col], errors="ignore")
+def colonnes_utiles(df):
+    # Les types numériques sont ceux déterminés à la lecture de chaque table :
+    # aucune conversion sur des colonnes d'autres fichiers.
+    # Exclure les codes, les années et les parts de non voyageurs
+    return [
+        c for c in df.select_dtypes("number").columns
+        if "CODE UIC" not in c.upper()
+           and c.upper() not in ("ANNÉE", "ANNEE")
+           and "NON VOYAGEURS" not in c.upper()
+           and "CODE POSTAL" not in c.upper()
+           and df[c].sum() > 0  # au moins une valeur >0
+    ]
 
-# Exclure les colonnes 'Code Uic' et celles contenant 'Total'
-colonnes_numeriques = [
-    c for c in df.columns 
-    if pd.api.types.is_numeric_dtype(df[c])
-       and "CODE UIC" not in c.upper()
-       and "NON VOYAGEURS" not in c.upper()
-       and "CODE POSTAL" not in c.upper()
-       and df[c].sum() > 0  # au moins une valeur >0
-]
-
-if not colonnes_numeriques:
-    raise ValueError("Aucune colonne utile avec des valeurs numériques supérieures à 0.")
-
-print("Colonnes retenues pour le graphique :", colonnes_numeriques)
-
-# ============================================================
-# 4 — CALCUL DES MOYENNES PAR VILLE
-# ============================================================
-stats = df.groupby(COLONNE_VILLE)[colonnes_numeriques].mean().reset_index()
-villes = stats[COLONNE_VILLE].unique()
 
 # ============================================================
-# 5 — GRAPHIQUE INTERACTIF
+# 4 — GRAPHIQUE INTERACTIF
 # ============================================================
-colonnes_simplifiees = [c.replace("_", " ").title() for c in colonnes_numeriques]
-mapping = dict(zip(colonnes_simplifiees, colonnes_numeriques))
-
-ville_defaut = villes[0]
-y_defaut = stats[stats[COLONNE_VILLE] == ville_defaut][colonnes_numeriques].iloc[0].values
-
-fig = go.Figure()
-fig.add_trace(go.Bar(
-    x=colonnes_simplifiees,
-    y=y_defaut,
-    name=ville_defaut
-))
-
-# Menu déroulant
-buttons = []
-for ville in villes:
-    y_vals = stats[stats[COLONNE_VILLE] == ville][colonnes_numeriques].iloc[0].values
-    buttons.append(dict(
-        label=ville,
-        method="update",
-        args=[
-            {"y": [y_vals], "name": ville},
-            {"title": f"Retards et causes – {ville}"}
-        ]
+def simplifier(colonnes):
+    return [c.replace("_", " ").title() for c in colonnes]
+
+
+if __name__ == "__main__":
+    if not os.path.isdir(DATA_FOLDER):
+        raise ValueError(f"Le dossier n'existe pas : {DATA_FOLDER}")
+
+    tables = charger_csv(DATA_FOLDER)
+
+    resultats = {}
+    for nom, df in tables.items():
+        ville = colonne_ville(df)
+        colonnes = colonnes_utiles(df)
+        if ville is None or not colonnes:
+            print(f"Table {nom} ignorée (pas de colonne ville/gare ou de colonne numérique utile)")
+            continue
+        print(f"{nom} : colonne ville/gare '{ville}', colonnes retenues : {colonnes}")
+        villes_table = df[ville].dropna().astype(str).str.upper()
+        stats = df.loc[villes_table.index, colonnes].groupby(villes_table.values).mean()
+        resultats[nom] = (colonnes, stats)
+
+    if not resultats:
+        raise ValueError("Aucune table avec une colonne ville/gare et des valeurs numériques supérieures à 0.")
+
+    nom_defaut, (colonnes_defaut, stats_defaut) = next(iter(resultats.items()))
+    ville_defaut = stats_defaut.index[0]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=simplifier(colonnes_defaut),
+        y=stats_defaut.loc[ville_defaut].values,
+        name=ville_defaut
     ))
 
-fig.update_layout(
-    title=f"Nombre total de Voyageurs – {ville_defaut}",
-    xaxis_title="Nombre Total de Voyageurs",
-    yaxis_title="Valeur moyenne",
-    updatemenus=[{
-        "buttons": buttons,
-        "direction": "down",
-        "x": 1.2,
-        "y": 1.0
-    }]
-)
-
-# Sauvegarde et affichage du graphique
-fig.write_html("graphique.html")
-webbrowser.open("graphique.html")
+    # Menu déroulant : une entrée par ville de chaque table
+    buttons = []
+    for nom, (colonnes, stats) in resultats.items():
+        for ville in stats.index:
+            buttons.append(dict(
+                label=f"{ville} ({nom})",
+                method="update",
+                args=[
+                    {"x": [simplifier(colonnes)], "y": [stats.loc[ville].values], "name": ville},
+                    {"title": f"Nombre total de Voyageurs – {ville} ({nom})"}
+                ]
+            ))
+
+    fig.update_layout(
+        title=f"Nombre total de Voyageurs – {ville_defaut} ({nom_defaut})",
+        xaxis_title="Nombre Total de Voyageurs",
+        yaxis_title="Valeur moyenne",
+        updatemenus=[{
+            "buttons": buttons,
+            "direction": "down",
+            "x": 1.2,
+            "y": 1.0
+        }]
+    )
+
+    # Sauvegarde et affichage du graphique
+    fig.write_html("graphique.html")
+    webbrowser.open("graphique.html")
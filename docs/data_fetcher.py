@@ -4,18 +4,22 @@ from pathlib import Path
 # URL de base sur GitHub
 BASE_URL = "https://raw.githubusercontent.com/Bastien2003/Projet/main/roadmap/1erSite/"
 
-CSV_FILES = [
-    "albi_retard_arrivee_intercites.csv",
-    "bayonne_retard_arrivee_intercites.csv",
-    "beziers_retard_arrivee_intercites.csv",
-    "cerbere_retard_arrivee_intercites.csv",
-    "latour_de_carol_retard_arrivee_intercites.csv",
-    "montpellier_retard_arrivee+depart_tgv.csv",
-    "nimes_retard_arrivee_intercites.csv",
-    "perpignan_retard_arrivee+depart_tgv.csv",
-    "tarbes_retard_arrivee_intercites.csv",
-    "toulouse_matabiau_retard_arrivee_intercites.csv"
-]
+# Empreintes SHA-256 des fichiers publiés : pooch vérifie chaque téléchargement
+# et ne retélécharge un fichier en cache que si son contenu ne correspond plus.
+REGISTRY = {
+    "albi_retard_arrivee_intercites.csv": "sha256:91607ed7ec6fab766fd846c72812df42d0046649b861155fe02c64eecda0fd33",
+    "bayonne_retard_arrivee_intercites.csv": "sha256:113d8a1cf8f202d11fd1ac13384d9472e8febf3bf2f16800d836e5b10ed4d7fc",
+    "beziers_retard_arrivee_intercites.csv": "sha256:ac4fd15826ec8a415bbeb9cb29ba3f4a7fd84ac7e0f30db53c6cae98d09271b5",
+    "cerbere_retard_arrivee_intercites.csv": "sha256:7f81b5815d576b670f4d7f3b3001b805dc33f8236f1d92ea525820296bf979b4",
+    "latour_de_carol_retard_arrivee_intercites.csv": "sha256:f6c922b7bcdd0b46481452709bd6cbbcd3a57286b7de6e687a894a4a550c10b8",
+    "montpellier_retard_arrivee+depart_tgv.csv": "sha256:a5dc6ca4d8e645d16699af2bc8d48d215e93a2b1991b01017ebb96c9c8c9a0bc",
+    "nimes_retard_arrivee_intercites.csv": "sha256:a4f93d247a06c4e58529c87835ebcfab64c11d064b71842131f4e11221634f79",
+    "perpignan_retard_arrivee+depart_tgv.csv": "sha256:87ebc4a96856e56c260e6a4c9bff4be26920bc390137e4f7c7c369c337036b0b",
+    "tarbes_retard_arrivee_intercites.csv": "sha256:f88664a03c6158b8e696008091a2413aef2ae7e1e3ae67639a4ac2c473f156b4",
+    "toulouse_matabiau_retard_arrivee_intercites.csv": "sha256:5251aa33825ebe7998979099b7f4e70d309f7c21f130ece84f05e1a78d85b5df",
+}
+
+CSV_FILES = list(REGISTRY)
 
 # Dossier local pour le cache
 DATA_DIR = Path(__file__).parent / "data"
@@ -24,7 +28,7 @@ DATA_DIR = Path(__file__).parent / "data"
 fetcher = pooch.create(
     path=DATA_DIR,
     base_url=BASE_URL,
-    registry={csv: None for csv in CSV_FILES}  # pas de hash pour l'instant
+    registry=REGISTRY
 )
 
 def get_csv(filename: str) -> str:
@@ -0,0 +1,181 @@
+"""
+Indicateurs de ponctualité pondérés par le trafic, calculés en un seul groupby.
+
+Le taux de régularité publié est mensuel : la moyenne simple de ces taux donne
+le même poids à un mois de 10 trains et à un mois de 300 trains. Ici chaque
+taux mensuel est pondéré par le nombre de trains ayant circulé, et les taux de
+retard et d'annulation sont des rapports de sommes :
+
+- Taux_régularité = somme(taux x trains circulés) / somme(trains circulés),
+  les taux manquants ou hors de [0, 100] ayant un poids nul,
+- Taux_retard = trains en retard / trains ayant circulé (%),
+- Taux_annulation = trains annulés / trains programmés (%).
+
+Les colonnes pondérées sont préparées une fois de façon vectorielle, puis
+toutes les sommes sont calculées par un unique groupby avec agrégations
+nommées (sommes_partielles). Ces sommes s'additionnent d'un lot de lignes à
+l'autre (combiner), les taux n'étant calculés qu'à la fin (finaliser). Chaque
+taux est accompagné de son intervalle de confiance de Wilson (colonnes
+'<taux>_bas' et '<taux>_haut').
+
+Les clés de regroupement sont des colonnes de la table Intercités nettoyée
+ou les clés dérivées 'Annee', 'Mois' (de 'Date'), 'Ville' et 'Famille' (de
+'Source', voir schemas.famille) ; les lignes dont une clé est manquante
+(date 'NaT', source inconnue) ne sont pas comptées.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from nettoyage import VILLES
+from schemas import famille
+
+RELATION = ['Départ', 'Arrivée']
+
+# Clés calculées si elles ne sont pas des colonnes de la table
+CLES_DERIVEES = {
+    'Annee': lambda df: pd.to_numeric(df['Date'].astype(str).str[:4], errors='coerce'),
+    'Mois': lambda df: pd.to_numeric(df['Date'].astype(str).str[5:7], errors='coerce'),
+    'Ville': lambda df: df['Source'].astype(object).map({s: v for s, (v, _) in VILLES.items()}),
+    'Famille': lambda df: df['Source'].astype(object).map(famille, na_action='ignore'),
+}
+
+# Taux publiés : (numérateur, dénominateur)
+TAUX = {
+    'Taux_régularité': ('regularite_ponderee', 'poids_regularite'),
+    'Taux_retard': ('Trains_retard', 'Trains_circulés'),
+    'Taux_annulation': ('Trains_annulés', 'Trains_programmés'),
+}
+
+
+def intervalle_wilson(succes, effectifs, niveau=0.95):
+    """
+    Intervalle de confiance de Wilson d'une proportion, en pourcentage.
+
+    Parameters
+    ----------
+    succes, effectifs : array-like
+        Nombre de réalisations et nombre d'essais (effectifs nuls : NaN).
+    niveau : float
+        Niveau de confiance.
+
+    Returns
+    -------
+    tuple
+        (borne basse, borne haute) en %, sous forme de tableaux numpy.
+    """
+    z = NormalDist().inv_cdf((1 + niveau) / 2)
+    n = np.asarray(effectifs, dtype='float64')
+    n = np.where(n > 0, n, np.nan)
+    p = np.clip(np.asarray(succes, dtype='float64') / n, 0, 1)
+    denominateur = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denominateur
+    demi = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominateur
+    return (centre - demi) * 100, (centre + demi) * 100
+
+
+def sommes_partielles(df, cles=RELATION):
+    """
+    Sommes par groupe d'un lot de lignes, en un seul groupby.
+
+    Les sommes de deux lots se combinent par simple addition (voir
+    combiner) : un fichier peut être agrégé lot par lot.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table Intercités nettoyée (PIPELINE_INTERCITES).
+    cles : list
+        Colonnes de regroupement ou clés dérivées (CLES_DERIVEES).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par groupe : sommes des trains, 'nb_mois' et sommes
+        pondérées de régularité ('regularite_ponderee', 'poids_regularite').
+    """
+    cles = list(cles)
+    colonnes = {}
+    for cle in cles:
+        colonnes[cle] = df[cle] if cle in df.columns else CLES_DERIVEES[cle](df)
+    donnees = pd.DataFrame(colonnes, index=df.index)
+    # Lignes sans clé (date 'NaT', source inconnue) écartées avant les sommes
+    valides = donnees.notna().all(axis=1).to_numpy()
+    donnees, df = donnees[valides], df[valides]
+    donnees = donnees.astype({cle: 'int64' for cle in cles if cle in ('Annee', 'Mois') and cle not in df.columns})
+
+    for col in ['Trains_programmés', 'Trains_circulés', 'Trains_annulés', 'Trains_retard']:
+        donnees[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype='int64')
+    taux = pd.to_numeric(df['Taux_régularité'], errors='coerce').to_numpy(dtype='float64')
+    valide = (taux >= 0) & (taux <= 100)
+    donnees['poids_regularite'] = np.where(valide, donnees['Trains_circulés'], 0)
+    donnees['regularite_ponderee'] = np.where(valide, taux / 100, 0.0) * donnees['poids_regularite']
+
+    return donnees.groupby(cles, observed=True, sort=True).agg(
+        Trains_programmés=('Trains_programmés', 'sum'),
+        Trains_circulés=('Trains_circulés', 'sum'),
+        Trains_annulés=('Trains_annulés', 'sum'),
+        Trains_retard=('Trains_retard', 'sum'),
+        regularite_ponderee=('regularite_ponderee', 'sum'),
+        poids_regularite=('poids_regularite', 'sum'),
+        nb_mois=('Trains_programmés', 'size'),
+    ).reset_index()
+
+
+def combiner(partielles, cles=RELATION):
+    """Additionne des sommes partielles (résultats de sommes_partielles)."""
+    cles = list(cles)
+    partielles = [p.astype({cle: object for cle in cles}) for p in partielles]
+    return pd.concat(partielles, ignore_index=True).groupby(cles, sort=True).sum().reset_index().infer_objects()
+
+
+def finaliser(sommes, niveau=0.95):
+    """
+    Calcule les taux pondérés et leurs intervalles de confiance.
+
+    Parameters
+    ----------
+    sommes : pandas.DataFrame
+        Résultat de sommes_partielles ou de combiner.
+    niveau : float
+        Niveau de confiance des intervalles.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par groupe : sommes des trains, 'nb_mois', taux pondérés
+        (Taux_régularité en %, NaN sans taux valide ; Taux_retard et
+        Taux_annulation arrondis à 0,1 %) et leurs intervalles de confiance.
+    """
+    agregats = sommes.copy()
+    for nom, (numerateur, denominateur) in TAUX.items():
+        effectifs = agregats[denominateur].where(agregats[denominateur] > 0)
+        agregats[nom] = agregats[numerateur] / effectifs * 100
+        agregats[f"{nom}_bas"], agregats[f"{nom}_haut"] = intervalle_wilson(
+            agregats[numerateur], agregats[denominateur], niveau)
+    for nom in ['Taux_retard', 'Taux_annulation']:
+        agregats[nom] = agregats[nom].round(1).fillna(0)
+    return agregats.drop(columns=['regularite_ponderee', 'poids_regularite'])
+
+
+def agreger_ponderes(df, cles=RELATION, niveau=0.95):
+    """
+    Agrège la table Intercités selon des clés quelconques.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table Intercités nettoyée (PIPELINE_INTERCITES).
+    cles : list
+        Colonnes de regroupement ou clés dérivées (CLES_DERIVEES).
+    niveau : float
+        Niveau de confiance des intervalles.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Voir finaliser.
+    """
+    return finaliser(sommes_partielles(df, cles), niveau)
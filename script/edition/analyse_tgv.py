@@ -0,0 +1,233 @@
+"""
+Analyse des retards TGV (fichiers *_retard_arrivee+depart_tgv.csv).
+
+Les fichiers TGV par gare détaillent, pour chaque relation et chaque mois :
+retards moyens au départ et à l'arrivée, nombre de trains en retard de plus
+de 15, 30 et 60 minutes, et part des retards par cause. Ce module :
+
+- calcule une fois, de façon vectorielle, les mesures de chaque ligne :
+  minutes de retard (trains ayant circulé x retard moyen de tous les trains),
+  minutes de retard attribuées à chaque cause (part x trains en retard à
+  l'arrivée x retard moyen des trains en retard), trains par tranche de
+  retard (<= 15, 15-30, 30-60, > 60 minutes) ;
+- agrège ces mesures par relation et par mois (sommes, puis parts et
+  retards moyens) ;
+- met les deux tables en cache au format Parquet, avec la clé des fichiers
+  sources et du code qui les analyse (voir snapshot_intercites) : elles sont
+  relues sans analyser les CSV tant que ni les sources ni le code n'ont
+  changé.
+
+Utilisation en ligne de commande :
+
+    python analyse_tgv.py [--force]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DataLoader, read_csv_file
+from schemas import famille
+from snapshot_intercites import DOSSIER_EDITION, cle_sources, ecrire_snapshot, empreintes_code, lire_cle, pq
+
+RELATION = ['Gare de départ', "Gare d'arrivée"]
+MOIS = ['Date']
+
+# Code dont dépendent les tables en cache (lecture des CSV et analyse)
+FICHIERS_CODE = [os.path.join(DOSSIER_EDITION, nom) for nom in
+                 ['lecteur_csv.py', 'schemas.py', 'nettoyage.py', 'analyse_tgv.py']]
+
+# Colonne de part (%) -> nom court de la cause
+CAUSES = {
+    'Prct retard pour causes externes': 'externes',
+    'Prct retard pour cause infrastructure': 'infrastructure',
+    'Prct retard pour cause gestion trafic': 'gestion_trafic',
+    'Prct retard pour cause matériel roulant': 'materiel_roulant',
+    'Prct retard pour cause gestion en gare et réutilisation de matériel': 'gestion_gare',
+    'Prct retard pour cause prise en compte voyageurs (affluence, gestions PSH, correspondances)': 'voyageurs',
+}
+
+TRANCHES = ['tranche_0_15', 'tranche_15_30', 'tranche_30_60', 'tranche_60_plus']
+
+# Mesures additives calculées pour chaque ligne
+MESURES = (['trains_prevus', 'trains_annules', 'trains_circules', 'trains_retard_depart',
+            'trains_retard_arrivee', 'minutes_retard_depart', 'minutes_retard_arrivee']
+           + [f'minutes_{cause}' for cause in CAUSES.values()] + TRANCHES)
+
+
+def noms_tgv(loader):
+    """Noms des fichiers TGV connus du DataLoader."""
+    return [nom for nom in loader.urls if famille(nom) == 'tgv']
+
+
+def _nombres(df, colonne):
+    if colonne not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[colonne], errors='coerce').to_numpy(dtype='float64')
+
+
+def mesures(df):
+    """
+    Mesures additives de chaque ligne d'une table TGV brute.
+
+    Les valeurs manquantes comptent pour 0.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Fichiers TGV concaténés (colonne 'Source' comprise).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Colonnes 'Source', 'Date', RELATION et MESURES.
+    """
+    prevus = np.nan_to_num(_nombres(df, 'Nombre de circulations prévues'))
+    annules = np.nan_to_num(_nombres(df, 'Nombre de trains annulés'))
+    circules = prevus - annules
+    retard_arrivee = np.nan_to_num(_nombres(df, "Nombre de trains en retard à l'arrivée"))
+    plus_15 = np.nan_to_num(_nombres(df, 'Nombre trains en retard > 15min'))
+    plus_30 = np.nan_to_num(_nombres(df, 'Nombre trains en retard > 30min'))
+    plus_60 = np.nan_to_num(_nombres(df, 'Nombre trains en retard > 60min'))
+    # Minutes de retard des seuls trains en retard, réparties entre les causes
+    minutes_retardataires = retard_arrivee * np.nan_to_num(
+        _nombres(df, "Retard moyen des trains en retard à l'arrivée"))
+
+    resultat = df[['Source', 'Date'] + RELATION].astype({col: object for col in RELATION}).copy()
+    resultat['trains_prevus'] = prevus
+    resultat['trains_annules'] = annules
+    resultat['trains_circules'] = circules
+    resultat['trains_retard_depart'] = np.nan_to_num(_nombres(df, 'Nombre de trains en retard au départ'))
+    resultat['trains_retard_arrivee'] = retard_arrivee
+    resultat['minutes_retard_depart'] = circules * np.nan_to_num(
+        _nombres(df, 'Retard moyen de tous les trains au départ'))
+    resultat['minutes_retard_arrivee'] = circules * np.nan_to_num(
+        _nombres(df, "Retard moyen de tous les trains à l'arrivée"))
+    for colonne, cause in CAUSES.items():
+        resultat[f'minutes_{cause}'] = np.nan_to_num(_nombres(df, colonne)) / 100 * minutes_retardataires
+    resultat['tranche_0_15'] = circules - plus_15
+    resultat['tranche_15_30'] = plus_15 - plus_30
+    resultat['tranche_30_60'] = plus_30 - plus_60
+    resultat['tranche_60_plus'] = plus_60
+    return resultat
+
+
+def agreger(table, cles):
+    """
+    Sommes des mesures par groupe, puis indicateurs dérivés.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        Résultat de mesures.
+    cles : list
+        Colonnes de regroupement (RELATION, MOIS, ...).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Sommes des mesures, retards moyens par train ayant circulé
+        ('retard_moyen_depart', 'retard_moyen_arrivee', en minutes), part de
+        chaque cause dans les minutes attribuées ('part_<cause>', %) et part
+        de chaque tranche de retard ('part_tranche_...', %).
+    """
+    sommes = table.groupby(list(cles), observed=True, sort=True)[MESURES].sum().reset_index()
+
+    circules = sommes['trains_circules'].where(sommes['trains_circules'] > 0)
+    sommes['retard_moyen_depart'] = sommes['minutes_retard_depart'] / circules
+    sommes['retard_moyen_arrivee'] = sommes['minutes_retard_arrivee'] / circules
+
+    minutes_causes = sommes[[f'minutes_{cause}' for cause in CAUSES.values()]]
+    total = minutes_causes.sum(axis=1)
+    total = total.where(total > 0)
+    for cause in CAUSES.values():
+        sommes[f'part_{cause}'] = sommes[f'minutes_{cause}'] / total * 100
+    for tranche in TRANCHES:
+        sommes[f'part_{tranche}'] = sommes[tranche] / circules * 100
+    return sommes
+
+
+def calculer(data_dict):
+    """
+    Tables d'analyse TGV à partir des fichiers bruts.
+
+    Parameters
+    ----------
+    data_dict : dict
+        Dictionnaire nom -> DataFrame brut (fichiers TGV).
+
+    Returns
+    -------
+    dict
+        {'relations': par relation, 'mois': par mois} (voir agreger).
+    """
+    if not data_dict:
+        raise ValueError("Aucune donnée 'tgv' trouvée")
+    brut = pd.concat([df.rename(columns=str.strip).assign(Source=nom) for nom, df in data_dict.items()],
+                     ignore_index=True)
+    table = mesures(brut)
+    return {'relations': agreger(table, RELATION), 'mois': agreger(table, MOIS)}
+
+
+def chemins_defaut(loader):
+    """Emplacement des tables en cache, à côté du cache des données."""
+    dossier = os.path.join(loader.cache.dossier, 'snapshots')
+    return {nom: os.path.join(dossier, f'tgv_{nom}.parquet') for nom in ('relations', 'mois')}
+
+
+def charger_analyses_tgv(loader=None, chemins=None, force=False):
+    """
+    Renvoie les tables d'analyse TGV, depuis le cache si elles sont à jour.
+
+    La clé du cache couvre les fichiers sources et le code (FICHIERS_CODE) ;
+    le cache n'est pas réécrit si un fichier source n'a pas été récupéré.
+
+    Parameters
+    ----------
+    loader : DataLoader ou None
+    chemins : dict ou None
+        Fichiers Parquet des tables ({'relations': ..., 'mois': ...}).
+    force : bool
+        Si True, recalcule les tables même si elles sont à jour.
+
+    Returns
+    -------
+    dict
+        {'relations': pandas.DataFrame, 'mois': pandas.DataFrame}
+    """
+    loader = loader or DataLoader()
+    chemins = chemins or chemins_defaut(loader)
+
+    noms = noms_tgv(loader)
+    paths = loader.fetch_all(noms, parallel=True)
+    empreintes = {nom: loader.get_hash(nom) for nom in paths}
+    cle = cle_sources({**empreintes, **empreintes_code(FICHIERS_CODE)})
+
+    if not force and all(lire_cle(chemin) == cle for chemin in chemins.values()):
+        return {nom: pd.read_parquet(chemin) for nom, chemin in chemins.items()}
+
+    tables = calculer({nom: read_csv_file(path, 'tgv') for nom, path in paths.items()})
+    manquants = [nom for nom in noms if nom not in paths]
+    if manquants:
+        print(f"Sources manquantes ({', '.join(manquants)}) : tables TGV non mises en cache")
+    elif pq is None:
+        print("pyarrow non installé : tables TGV non mises en cache")
+    else:
+        for nom, chemin in chemins.items():
+            ecrire_snapshot(tables[nom], chemin, cle)
+    return tables
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calcule et met en cache les analyses de retards TGV.")
+    parser.add_argument('--force', action='store_true', help="recalculer même si le cache est à jour")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    tables = charger_analyses_tgv(force=args.force)
+    colonnes = ['trains_circules', 'retard_moyen_arrivee'] + [f'part_{cause}' for cause in CAUSES.values()]
+    print(tables['relations'][RELATION + colonnes].round(1).to_string())
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
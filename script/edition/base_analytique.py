@@ -0,0 +1,344 @@
+"""
+Base analytique embarquée (DuckDB, ou SQLite à défaut) pour les agrégations Intercités.
+
+Les fichiers Intercités sont ingérés une seule fois, fichier par fichier,
+dans une table indexée ; un fichier n'est réingéré que si son empreinte
+SHA-256 a changé, ou si le code de nettoyage a changé depuis son ingestion
+(VERSION_PIPELINE, enregistrée avec l'empreinte dans la table sources).
+Les agrégations sont ensuite calculées en SQL par le moteur et renvoyées
+sous forme de DataFrame :
+
+- relations()       : agrégats par relation Départ -> Arrivée
+                      (équivalent de performances_intercites.resumer_relations),
+- par_date_depart() : regroupement par mois et gare de départ
+                      (équivalent de modification_tableur_toulouse_intercites),
+- serie_mensuelle() : série mensuelle d'une ville / gare / année
+                      (requête du tableau de bord),
+- requete()         : requête SQL libre.
+
+Seul le résultat des requêtes est chargé en mémoire, pas l'historique complet.
+DuckDB est utilisé s'il est installé (moteur colonnaire), sinon le module
+standard sqlite3.
+"""
+
+import argparse
+import os
+import sqlite3
+
+import pandas as pd
+
+from agregation_ponderee import finaliser
+from data_loader import DataLoader, read_csv_file
+from nettoyage import PIPELINE_INTERCITES, ajouter_ville, concatener
+from schemas import famille
+from snapshot_intercites import FICHIERS_PIPELINE, cle_sources, empreintes_code, noms_intercites
+
+try:
+    import duckdb
+except ImportError:  # duckdb est optionnel : sqlite3 est toujours disponible
+    duckdb = None
+
+MOTEURS = ('duckdb', 'sqlite')
+
+# Version du code qui produit les lignes de la table : nettoyage et table_intercites
+VERSION_PIPELINE = cle_sources(empreintes_code(FICHIERS_PIPELINE + [os.path.abspath(__file__)]))
+
+# Colonnes de la table (noms ASCII) -> colonnes de la table nettoyée
+COLONNES = {
+    'source': 'Source',
+    'date': 'Date',
+    'annee': 'Annee',
+    'mois': 'Mois',
+    'depart': 'Départ',
+    'arrivee': 'Arrivée',
+    'ville': 'Ville',
+    'gare': 'Gare',
+    'programmes': 'Trains_programmés',
+    'circules': 'Trains_circulés',
+    'annules': 'Trains_annulés',
+    'retard': 'Trains_retard',
+    'taux_regularite': 'Taux_régularité',
+}
+
+# Noms des colonnes renvoyées par les requêtes
+NOMS_RESULTATS = {**COLONNES, 'taux_annulation': 'Taux_annulation', 'taux_retard': 'Taux_retard',
+                  'a_l_heure_pour_retard': "Nombre de trains à l'heure pour un train en retard à l'arrivée"}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS sources (
+    nom TEXT PRIMARY KEY,
+    sha256 TEXT,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS intercites (
+    source TEXT,
+    date TEXT,
+    annee INTEGER,
+    mois INTEGER,
+    depart TEXT,
+    arrivee TEXT,
+    ville TEXT,
+    gare TEXT,
+    programmes INTEGER,
+    circules INTEGER,
+    annules INTEGER,
+    retard INTEGER,
+    taux_regularite DOUBLE,
+    a_l_heure_pour_retard DOUBLE
+);
+CREATE INDEX IF NOT EXISTS idx_relation ON intercites (depart, arrivee);
+CREATE INDEX IF NOT EXISTS idx_date_depart ON intercites (date, depart);
+CREATE INDEX IF NOT EXISTS idx_tableau ON intercites (ville, gare, annee);
+CREATE INDEX IF NOT EXISTS idx_source ON intercites (source);
+"""
+
+
+def table_intercites(nom, df):
+    """
+    Lignes à insérer pour un fichier Intercités brut.
+
+    Le fichier passe par PIPELINE_INTERCITES ; la ville et la gare affichées
+    par le tableau de bord (ajouter_ville) sont ajoutées en colonnes séparées.
+    """
+    propre = PIPELINE_INTERCITES(concatener({nom: df}))
+    tableau = ajouter_ville(propre)
+    dates = propre['Date'].astype(str)
+    lignes = pd.DataFrame({
+        'source': nom,
+        'date': dates,
+        'annee': pd.to_numeric(dates.str[:4], errors='coerce').astype('Int64'),
+        'mois': pd.to_numeric(dates.str[5:7], errors='coerce').astype('Int64'),
+        'depart': propre['Départ'].astype(str),
+        'arrivee': propre['Arrivée'].astype(str),
+        'ville': tableau['Ville'].astype(object),
+        'gare': tableau['Départ'].astype(str),
+    })
+    for cle in ('programmes', 'circules', 'annules', 'retard'):
+        lignes[cle] = pd.to_numeric(propre[COLONNES[cle]], errors='coerce').astype('Int64')
+    lignes['taux_regularite'] = pd.to_numeric(propre['Taux_régularité'], errors='coerce').astype('float64')
+    colonne = NOMS_RESULTATS['a_l_heure_pour_retard']
+    lignes['a_l_heure_pour_retard'] = (
+        pd.to_numeric(propre[colonne], errors='coerce').astype('float64')
+        if colonne in propre.columns else float('nan')
+    )
+    return lignes[lignes['annee'].notna()]
+
+
+class BaseAnalytique:
+    """
+    Base SQL embarquée des données Intercités.
+
+    Attributs
+    ---------
+    chemin : str
+        Fichier de la base (':memory:' pour une base temporaire).
+    moteur : str
+        'duckdb' ou 'sqlite'.
+    connexion
+        Connexion DB-API au moteur.
+    """
+
+    def __init__(self, chemin=':memory:', moteur=None):
+        if moteur is None:
+            moteur = 'duckdb' if duckdb is not None else 'sqlite'
+        if moteur not in MOTEURS:
+            raise ValueError(f"Moteur inconnu : {moteur} (attendu : {', '.join(MOTEURS)})")
+        if moteur == 'duckdb' and duckdb is None:
+            raise ImportError("duckdb n'est pas installé")
+
+        self.chemin = str(chemin)
+        self.moteur = moteur
+        if self.chemin != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.chemin)), exist_ok=True)
+        if moteur == 'duckdb':
+            self.connexion = duckdb.connect(self.chemin)
+            for instruction in SCHEMA_SQL.split(';'):
+                if instruction.strip():
+                    self.connexion.execute(instruction)
+        else:
+            self.connexion = sqlite3.connect(self.chemin, check_same_thread=False)
+            self.connexion.executescript(SCHEMA_SQL)
+        colonnes = [d[0] for d in self.connexion.execute("SELECT * FROM sources LIMIT 0").description]
+        if 'version' not in colonnes:
+            # Base créée avant le suivi de version : ses fichiers seront réingérés
+            self.connexion.execute("ALTER TABLE sources ADD COLUMN version TEXT")
+            self.connexion.commit()
+
+    def fermer(self):
+        """Ferme la connexion."""
+        self.connexion.close()
+
+    def empreinte(self, nom):
+        """Empreinte du fichier ingéré sous ce nom (ou None)."""
+        ligne = self.connexion.execute("SELECT sha256 FROM sources WHERE nom = ?", [nom]).fetchone()
+        return ligne[0] if ligne else None
+
+    def version(self, nom):
+        """Version du pipeline avec laquelle le fichier a été ingéré (ou None)."""
+        ligne = self.connexion.execute("SELECT version FROM sources WHERE nom = ?", [nom]).fetchone()
+        return ligne[0] if ligne else None
+
+    def ingerer_fichier(self, nom, df, empreinte=None):
+        """
+        Remplace les lignes d'un fichier par son nouveau contenu.
+
+        Parameters
+        ----------
+        nom : str
+            Nom du jeu de données.
+        df : pandas.DataFrame
+            Fichier brut (read_csv_file).
+        empreinte : str ou None
+            Empreinte SHA-256 enregistrée pour éviter une réingestion
+            (avec VERSION_PIPELINE).
+
+        Returns
+        -------
+        int
+            Nombre de lignes insérées.
+        """
+        lignes = table_intercites(nom, df)
+        self.connexion.execute("DELETE FROM intercites WHERE source = ?", [nom])
+        if self.moteur == 'duckdb':
+            self.connexion.register('lot', lignes)
+            self.connexion.execute("INSERT INTO intercites SELECT * FROM lot")
+            self.connexion.unregister('lot')
+        else:
+            lignes.astype(object).where(lignes.notna(), None).to_sql(
+                'intercites', self.connexion, if_exists='append', index=False)
+        self.connexion.execute("DELETE FROM sources WHERE nom = ?", [nom])
+        self.connexion.execute("INSERT INTO sources VALUES (?, ?, ?)", [nom, empreinte, VERSION_PIPELINE])
+        self.connexion.commit()
+        return len(lignes)
+
+    def ingerer(self, loader=None):
+        """
+        Ingère les fichiers Intercités nouveaux ou modifiés, et ceux ingérés
+        avec une autre version du pipeline.
+
+        Les fichiers sont lus un par un : la mémoire utilisée ne dépend que du
+        plus gros fichier.
+
+        Returns
+        -------
+        dict
+            Dictionnaire nom -> nombre de lignes insérées (0 si inchangé).
+        """
+        loader = loader or DataLoader()
+        paths = loader.fetch_all(noms_intercites(loader), parallel=True)
+        resultat = {}
+        for nom, path in paths.items():
+            empreinte = loader.get_hash(nom)
+            if (empreinte is not None and empreinte == self.empreinte(nom)
+                    and self.version(nom) == VERSION_PIPELINE):
+                resultat[nom] = 0
+                continue
+            resultat[nom] = self.ingerer_fichier(nom, read_csv_file(path, famille(nom)), empreinte)
+        return resultat
+
+    def requete(self, sql, parametres=()):
+        """
+        Exécute une requête SQL et renvoie le résultat.
+
+        Les colonnes portant un nom de la table (programmes, depart, ...) sont
+        renommées comme dans la table nettoyée (Trains_programmés, Départ, ...).
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        if self.moteur == 'duckdb':
+            df = self.connexion.execute(sql, list(parametres)).df()
+        else:
+            df = pd.read_sql_query(sql, self.connexion, params=list(parametres))
+        return df.rename(columns=NOMS_RESULTATS)
+
+    def relations(self):
+        """
+        Agrégats par relation Départ -> Arrivée (voir resumer_relations).
+
+        Les sommes sont calculées en SQL ; les taux pondérés et leurs
+        intervalles de confiance le sont par agregation_ponderee.finaliser,
+        comme pour resumer_relations.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Une ligne par relation ayant au moins un taux de régularité
+            valide, mêmes colonnes que resumer_relations.
+        """
+        sommes = self.requete("""
+            SELECT depart, arrivee,
+                   COALESCE(SUM(programmes), 0) AS programmes, COALESCE(SUM(circules), 0) AS circules,
+                   COALESCE(SUM(annules), 0) AS annules, COALESCE(SUM(retard), 0) AS retard,
+                   COALESCE(SUM(CASE WHEN taux_regularite BETWEEN 0 AND 100
+                                     THEN taux_regularite / 100 * circules END), 0) AS regularite_ponderee,
+                   COALESCE(SUM(CASE WHEN taux_regularite BETWEEN 0 AND 100 THEN circules END), 0)
+                       AS poids_regularite,
+                   COUNT(*) AS nb_mois
+            FROM intercites
+            GROUP BY depart, arrivee
+            ORDER BY depart, arrivee
+        """)
+        agregats = finaliser(sommes)
+        return agregats[agregats['Taux_régularité'].notna()].reset_index(drop=True)
+
+    def par_date_depart(self, source=None):
+        """
+        Regroupement par mois et gare de départ (sommes et moyennes).
+
+        Parameters
+        ----------
+        source : str ou None
+            Restreint le regroupement à un fichier (ex: 'toulouse_intercites').
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        filtre, parametres = ("WHERE source = ?", [source]) if source else ("", [])
+        return self.requete(f"""
+            SELECT date, depart,
+                   SUM(programmes) AS programmes, SUM(circules) AS circules,
+                   SUM(annules) AS annules, SUM(retard) AS retard,
+                   AVG(taux_regularite) AS taux_regularite,
+                   AVG(a_l_heure_pour_retard) AS a_l_heure_pour_retard,
+                   MIN(arrivee) AS arrivee
+            FROM intercites
+            {filtre}
+            GROUP BY date, depart
+            ORDER BY date, depart
+        """, parametres)
+
+    def serie_mensuelle(self, ville, gare, annee):
+        """
+        Sommes mensuelles d'une ville, d'une gare de départ et d'une année
+        (requête du tableau de bord retards / annulations).
+
+        Returns
+        -------
+        pandas.DataFrame
+            Une ligne par mois, triée.
+        """
+        return self.requete("""
+            SELECT mois, SUM(programmes) AS programmes, SUM(circules) AS circules,
+                   SUM(annules) AS annules, SUM(retard) AS retard
+            FROM intercites
+            WHERE ville = ? AND gare = ? AND annee = ?
+            GROUP BY mois
+            ORDER BY mois
+        """, [ville, gare, int(annee)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingère les fichiers Intercités dans la base analytique.")
+    parser.add_argument('--chemin', default=None, help="fichier de la base")
+    parser.add_argument('--moteur', choices=MOTEURS, default=None, help="moteur SQL (duckdb par défaut s'il est installé)")
+    args = parser.parse_args()
+
+    loader = DataLoader()
+    base = BaseAnalytique(args.chemin or os.path.join(loader.cache.dossier, 'intercites.db'), args.moteur)
+    for nom, n in base.ingerer(loader).items():
+        print(f"  {nom:<30} {n:6d} lignes ingérées")
+    print(base.relations().to_string())
+    base.fermer()
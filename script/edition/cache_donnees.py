@@ -0,0 +1,270 @@
+"""
+Cache local des fichiers de données, adressé par contenu.
+
+Chaque fichier téléchargé est stocké sous le nom de son empreinte SHA-256
+(``objets/<sha256>``) et un index JSON associe chaque jeu de données à :
+- son URL,
+- l'empreinte de la version en cache,
+- les en-têtes ETag / Last-Modified renvoyés par le serveur.
+
+Ce module permet :
+- de vérifier l'intégrité des fichiers grâce à un registre d'empreintes figées,
+- de revalider un fichier avec une requête conditionnelle (If-None-Match /
+  If-Modified-Since) au lieu de le retélécharger,
+- de travailler hors ligne en ne servant que le contenu du cache,
+- de suivre les statistiques de succès / échecs du cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+# Délai maximal d'une requête HTTP (secondes)
+TIMEOUT_HTTP = 30
+
+# Taille des blocs lus pour le calcul des empreintes
+TAILLE_BLOC = 1 << 20
+
+
+def sha256_fichier(chemin):
+    """
+    Calcule l'empreinte SHA-256 d'un fichier.
+
+    Parameters
+    ----------
+    chemin : str
+        Chemin du fichier.
+
+    Returns
+    -------
+    str
+        Empreinte hexadécimale.
+    """
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def charger_registre(chemin):
+    """
+    Lit un registre d'empreintes (JSON nom -> sha256).
+
+    Parameters
+    ----------
+    chemin : str
+        Chemin du fichier JSON.
+
+    Returns
+    -------
+    dict
+        Registre lu, ou dictionnaire vide si le fichier n'existe pas.
+    """
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CacheDonnees:
+    """
+    Cache local adressé par contenu avec revalidation conditionnelle.
+
+    Attributs
+    ---------
+    dossier : str
+        Dossier racine du cache.
+    registre : dict
+        Dictionnaire nom -> empreinte SHA-256 attendue (jeux de données figés).
+    hors_ligne : bool
+        Si True, aucune requête réseau n'est faite : seul le cache est servi.
+    index : dict
+        Dictionnaire nom -> métadonnées de la version en cache.
+    stats : dict
+        Compteurs 'hits', 'misses', 'revalidations' et 'erreurs'.
+    """
+
+    def __init__(self, dossier, registre=None, hors_ligne=False):
+        self.dossier = str(dossier)
+        self.registre = dict(registre or {})
+        self.hors_ligne = hors_ligne
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'erreurs': 0}
+        self._verrou = threading.Lock()
+
+        os.makedirs(os.path.join(self.dossier, 'objets'), exist_ok=True)
+        self._chemin_index = os.path.join(self.dossier, 'index.json')
+        self.index = charger_registre(self._chemin_index)
+
+    def chemin_objet(self, empreinte):
+        """Chemin du fichier stocké pour une empreinte donnée."""
+        return os.path.join(self.dossier, 'objets', empreinte)
+
+    def empreinte(self, nom):
+        """Empreinte SHA-256 de la version en cache d'un jeu de données (ou None)."""
+        entree = self.index.get(nom)
+        return entree['sha256'] if entree else None
+
+    def recuperer(self, nom, url):
+        """
+        Renvoie le chemin local d'un jeu de données, en le téléchargeant si besoin.
+
+        - Si l'empreinte figée dans le registre correspond au cache, le fichier
+          est servi sans aucune requête réseau.
+        - Sinon une requête conditionnelle est envoyée : une réponse 304
+          réutilise le cache, une réponse 200 remplace la version stockée.
+          Si le registre fige une autre empreinte que celle du cache, la
+          version en cache ne peut pas convenir : le fichier est téléchargé
+          sans condition.
+        - En mode hors ligne (ou si le réseau échoue), la version en cache est
+          servie telle quelle.
+
+        Parameters
+        ----------
+        nom : str
+            Nom du jeu de données.
+        url : str
+            URL du fichier.
+
+        Returns
+        -------
+        str
+            Chemin local du fichier.
+
+        Raises
+        ------
+        FileNotFoundError
+            Si le fichier n'est pas en cache alors qu'aucun téléchargement n'est possible.
+        ValueError
+            Si le contenu ne correspond pas à l'empreinte du registre.
+        """
+        entree = self.index.get(nom)
+        if entree and (entree.get('url') != url
+                       or not os.path.exists(self.chemin_objet(entree['sha256']))):
+            entree = None
+        attendu = self.registre.get(nom)
+
+        if entree and (self.hors_ligne or attendu == entree['sha256']):
+            return self._servir_cache(nom, entree, attendu)
+
+        if self.hors_ligne:
+            self._compter('misses')
+            raise FileNotFoundError(f"{nom} absent du cache (mode hors ligne)")
+
+        requete = urllib.request.Request(url, headers={'User-Agent': 'projet-sncf'})
+        # Empreinte figée différente : une réponse 304 servirait une version refusée
+        conditionnelle = entree and not attendu
+        if conditionnelle and entree.get('etag'):
+            requete.add_header('If-None-Match', entree['etag'])
+        if conditionnelle and entree.get('last_modified'):
+            requete.add_header('If-Modified-Since', entree['last_modified'])
+
+        try:
+            with urllib.request.urlopen(requete, timeout=TIMEOUT_HTTP) as reponse:
+                return self._enregistrer(nom, url, reponse, attendu)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entree:
+                self._compter('revalidations')
+                return self._servir_cache(nom, entree, attendu)
+            if not entree:
+                self._compter('misses')
+                raise
+            print(f"Erreur HTTP {e.code} pour {nom}, utilisation du cache")
+        except urllib.error.URLError as e:
+            if not entree:
+                self._compter('misses')
+                raise
+            print(f"Réseau indisponible pour {nom} ({e.reason}), utilisation du cache")
+        self._compter('erreurs')
+        return self._servir_cache(nom, entree, attendu)
+
+    def _servir_cache(self, nom, entree, attendu):
+        """Vérifie puis renvoie la version en cache."""
+        chemin = self.chemin_objet(entree['sha256'])
+        if sha256_fichier(chemin) != entree['sha256']:
+            raise ValueError(f"Fichier en cache corrompu pour {nom}: {chemin}")
+        if attendu and attendu != entree['sha256']:
+            raise ValueError(
+                f"Empreinte de {nom} différente du registre "
+                f"(attendu {attendu}, en cache {entree['sha256']})"
+            )
+        self._compter('hits')
+        return chemin
+
+    def _enregistrer(self, nom, url, reponse, attendu):
+        """Écrit le contenu téléchargé dans le cache et met à jour l'index."""
+        h = hashlib.sha256()
+        fd, temporaire = tempfile.mkstemp(dir=self.dossier, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for bloc in iter(lambda: reponse.read(TAILLE_BLOC), b''):
+                    h.update(bloc)
+                    f.write(bloc)
+            empreinte = h.hexdigest()
+            if attendu and attendu != empreinte:
+                raise ValueError(
+                    f"Empreinte de {nom} différente du registre "
+                    f"(attendu {attendu}, reçu {empreinte})"
+                )
+            chemin = self.chemin_objet(empreinte)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+            raise
+
+        with self._verrou:
+            self.index[nom] = {
+                'url': url,
+                'sha256': empreinte,
+                'etag': reponse.headers.get('ETag'),
+                'last_modified': reponse.headers.get('Last-Modified'),
+                'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            }
+            self._sauver_index()
+            self.stats['misses'] += 1
+        return chemin
+
+    def _sauver_index(self):
+        """Écriture atomique de l'index (appelée sous verrou)."""
+        temporaire = self._chemin_index + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(temporaire, self._chemin_index)
+
+    def _compter(self, cle):
+        with self._verrou:
+            self.stats[cle] += 1
+
+    def taux_succes(self):
+        """
+        Proportion des demandes servies depuis le cache.
+
+        Returns
+        -------
+        float
+            Valeur entre 0 et 1 (0 si aucune demande).
+        """
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def figer_registre(self, chemin):
+        """
+        Écrit les empreintes des versions en cache dans un registre JSON.
+
+        Le registre produit peut ensuite être passé à DataLoader pour rendre
+        les exécutions reproductibles.
+
+        Parameters
+        ----------
+        chemin : str
+            Chemin du fichier JSON à écrire.
+        """
+        registre = {nom: entree['sha256'] for nom, entree in sorted(self.index.items())}
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(registre, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,196 @@
+"""
+Cache des figures Plotly produites par les callbacks Dash.
+
+Les entrées d'un callback (ville, gare, année) sont peu nombreuses et les
+données sont fixes pendant toute la vie du processus : une figure déjà
+construite peut donc être resservie telle quelle. Ce module fournit :
+- un cache LRU en mémoire, borné en nombre d'entrées, avec une durée de vie
+  optionnelle (TTL),
+- des clés calculées à partir des entrées du callback et de la version des
+  données (une nouvelle version invalide toutes les figures),
+- un stockage disque optionnel, partagé entre plusieurs processus (workers
+  gunicorn servant ``server = app.server``),
+- des statistiques de succès / échecs.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.io as pio
+
+# Nombre maximal de figures gardées en mémoire par processus
+TAILLE_MAX_DEFAUT = 256
+
+
+class CacheFigures:
+    """
+    Cache LRU/TTL de figures Plotly, avec stockage disque partagé optionnel.
+
+    Attributs
+    ---------
+    version : str
+        Version des données, incluse dans chaque clé.
+    taille_max : int
+        Nombre maximal de figures gardées en mémoire.
+    ttl : float ou None
+        Durée de vie d'une figure en secondes (None = illimitée).
+    dossier : str ou None
+        Dossier du stockage disque partagé (None = mémoire seule).
+    stats : dict
+        Compteurs 'hits', 'hits_disque', 'misses', 'expirations' et 'evictions'.
+    """
+
+    def __init__(self, version='', taille_max=TAILLE_MAX_DEFAUT, ttl=None, dossier=None):
+        self.version = str(version)
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.dossier = str(dossier) if dossier else None
+        self.stats = {'hits': 0, 'hits_disque': 0, 'misses': 0, 'expirations': 0, 'evictions': 0}
+        self._memoire = OrderedDict()
+        self._verrou = threading.Lock()
+
+        if self.dossier:
+            os.makedirs(self.dossier, exist_ok=True)
+
+    def cle(self, *entrees):
+        """
+        Clé d'un jeu d'entrées pour la version courante des données.
+
+        Returns
+        -------
+        str
+            Empreinte SHA-256 de la version et des entrées.
+        """
+        contenu = json.dumps([self.version, list(entrees)], default=str, ensure_ascii=False)
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+    def obtenir(self, entrees, construire):
+        """
+        Renvoie la figure associée aux entrées, en la construisant si besoin.
+
+        Parameters
+        ----------
+        entrees : tuple
+            Entrées du callback (valeurs sérialisables en JSON ou en texte).
+        construire : callable
+            Fonction sans argument construisant la figure en cas d'échec.
+
+        Returns
+        -------
+        plotly.graph_objects.Figure
+        """
+        cle = self.cle(*entrees)
+
+        figure = self._lire_memoire(cle)
+        if figure is not None:
+            return figure
+
+        figure = self._lire_disque(cle)
+        if figure is not None:
+            self._ecrire_memoire(cle, figure)
+            return figure
+
+        self._compter('misses')
+        figure = construire()
+        self._ecrire_memoire(cle, figure)
+        self._ecrire_disque(cle, figure)
+        return figure
+
+    def memoiser(self, fonction):
+        """
+        Décorateur mettant en cache le résultat d'un callback Dash.
+
+        À placer sous ``@app.callback`` : les arguments du callback forment
+        la clé de la figure.
+        """
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            entrees = args + tuple(sorted(kwargs.items()))
+            return self.obtenir(entrees, lambda: fonction(*args, **kwargs))
+        return enveloppe
+
+    def _expiree(self, horodatage):
+        return self.ttl is not None and time.time() - horodatage > self.ttl
+
+    def _lire_memoire(self, cle):
+        with self._verrou:
+            entree = self._memoire.get(cle)
+            if entree is None:
+                return None
+            horodatage, figure = entree
+            if self._expiree(horodatage):
+                del self._memoire[cle]
+                self.stats['expirations'] += 1
+                return None
+            self._memoire.move_to_end(cle)
+            self.stats['hits'] += 1
+            return figure
+
+    def _ecrire_memoire(self, cle, figure):
+        with self._verrou:
+            self._memoire[cle] = (time.time(), figure)
+            self._memoire.move_to_end(cle)
+            while len(self._memoire) > self.taille_max:
+                self._memoire.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f"{cle}.json")
+
+    def _lire_disque(self, cle):
+        if not self.dossier:
+            return None
+        chemin = self._chemin(cle)
+        try:
+            if self._expiree(os.path.getmtime(chemin)):
+                self._compter('expirations')
+                return None
+            with open(chemin, encoding='utf-8') as f:
+                figure = pio.from_json(f.read())
+        except (OSError, ValueError):
+            # Absent, supprimé entre-temps ou illisible : la figure sera reconstruite
+            return None
+        self._compter('hits_disque')
+        return figure
+
+    def _ecrire_disque(self, cle, figure):
+        """Écriture atomique : un autre processus ne lit jamais de fichier partiel."""
+        if not self.dossier:
+            return
+        fd, temporaire = tempfile.mkstemp(dir=self.dossier, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(pio.to_json(figure))
+            os.replace(temporaire, self._chemin(cle))
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+            raise
+
+    def _compter(self, cle):
+        with self._verrou:
+            self.stats[cle] += 1
+
+    def vider(self):
+        """Vide le cache mémoire (le stockage disque n'est pas modifié)."""
+        with self._verrou:
+            self._memoire.clear()
+
+    def taux_succes(self):
+        """
+        Proportion des demandes servies depuis le cache (mémoire ou disque).
+
+        Returns
+        -------
+        float
+            Valeur entre 0 et 1 (0 si aucune demande).
+        """
+        succes = self.stats['hits'] + self.stats['hits_disque']
+        total = succes + self.stats['misses']
+        return succes / total if total else 0.0
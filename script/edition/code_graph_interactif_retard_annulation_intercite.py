@@ -2,388 +2,327 @@
 Application Dash permettant d’analyser les retards des trains Intercités dans le Sud Ouest.
 
 Ce module :
-- charge les données ferroviaires issues de plusieurs fichiers CSV,
-- nettoie et fusionne les tableaux,
+- charge la table Intercités nettoyée par le pipeline partagé (module `nettoyage`),
 - construit une interface Dash composée de dropdowns et d’un graphique dynamique,
-- met à jour les visualisations en fonction des choix de l’utilisateur.
+- met à jour les visualisations en fonction des choix de l’utilisateur, à partir
+  d'un cube d'agrégats mensuels pré-calculé au démarrage (module `cube_intercites`).
+
+La cascade des dropdowns ville -> gare -> année est gérée par des callbacks
+exécutés dans le navigateur ; seul le graphique est construit par le serveur.
+
+L'application est créée par la fabrique `creer_app` : l'import du module ne
+charge aucune donnée. En production, elle est servie par gunicorn via le
+module `wsgi_dashboard` (voir ce module).
 """
-import pandas as pd
+import os
+import time
+
 import plotly.graph_objects as go
-from datetime import datetime
 import dash
-from dash.exceptions import PreventUpdate
 from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
 from data_loader import DataLoader
+from nettoyage import PIPELINE_DASHBOARD
+from snapshot_intercites import charger_intercites
+from cube_intercites import CubeIntercites
+from cache_figures import CacheFigures
 
-import time
-import psutil
-import os
-
-# Avant l'exécution
-process = psutil.Process(os.getpid())
-mem_avant = process.memory_info().rss / 1024 / 1024  # Mo
-
-# Début du chronomètre
-start_time = time.time()
-
-loader=DataLoader()
-data_dict = loader.load_all_data()
-# Charger tous les CSV
-data_dict = {k: df for k, df in data_dict.items() if 'intercites' in k}
-
-REQUIRED_COLS = [
-    "Nombre de trains en retard à l'arrivée",
-    "Nombre de trains annulés",
-    "Nombre de trains programmés",
-    "Nombre de trains ayant circulé",
-    "Date"
-]
-
-frames = []
 try:
-    for k, df in data_dict.items():
-        # Vérifier les colonnes attendues
-        missing = [c for c in REQUIRED_COLS if c not in df.columns]
-        if missing:
-            raise KeyError(f"Fichier {k} incomplet, colonnes manquantes: {missing}")
-        frames.append(df)
-    print("Toutes les données sont chargées")
-except Exception as e:
-    print(f"Erreur chargement: {e}")
-    raise
-
-# Extraire les DataFrames individuels
-albi = data_dict['albi_intercites']
-bayonne = data_dict['bayonne_intercites']
-beziers = data_dict['beziers_intercites']
-cerbere = data_dict['cerbere_intercites']
-latour = data_dict['latour_de_carol_intercites']
-nimes = data_dict['nimes_intercites']
-tarbes = data_dict['tarbes_intercites']
-toulouse = data_dict['toulouse_intercites']
-
-albi['Ville'] = 'Albi'
-albi['Départ'] = 'Paris-Austerlitz'
-
-bayonne['Ville'] = 'Bayonne'
-bayonne['Départ'] = 'Toulouse-Matabiau'
-
-beziers['Ville'] = 'Beziers'
-beziers['Départ'] = 'Clermont-Ferrand'
-
-cerbere['Ville'] = 'Cerbere'
-cerbere['Départ'] = 'Paris-Austerlitz'
-
-latour['Ville'] = 'Latour de Carol'
-latour['Départ'] = 'Paris-Austerlitz'
-
-nimes['Ville'] = 'Nîmes'
-nimes['Départ'] = 'Clermont-Ferrand'
-
-tarbes['Ville'] = 'Tarbes'
-tarbes['Départ'] = 'Paris-Austerlitz'
-
-toulouse['Ville'] = 'Toulouse'
-if 'Départ' not in toulouse.columns:
-    toulouse['Départ'] = 'Inconnu'
-
-# Combinaison et conversion des dates
-toutes_donnees = pd.concat([albi, bayonne, beziers, cerbere, latour, nimes, tarbes, toulouse], ignore_index=True)
-
-# On s'attend que la colonne "Date" soit au format YYYY-MM (ex: '2023-01').
-# Si ce n'est pas le cas, la conversion affichera NaT pour les lignes non conformes.
-toutes_donnees['Date_complete'] = pd.to_datetime(toutes_donnees['Date'].astype(str) + '-01', format='%Y-%m-%d', errors='coerce')
-
-# Extraire l'année et le mois pour faciliter le filtrage
-toutes_donnees['Annee'] = toutes_donnees['Date_complete'].dt.year
-toutes_donnees['Mois'] = toutes_donnees['Date_complete'].dt.month
+    import flask_compress  # noqa: F401  (compression gzip/brotli des réponses)
+except ImportError:  # optionnel : sans lui, les réponses ne sont pas compressées
+    flask_compress = None
 
 # Constantes colonnes 
-COLONNE_RETARD = "Nombre de trains en retard à l'arrivée"
-COLONNE_ANNULE = "Nombre de trains annulés"
-COLONNE_PROGRAMME = "Nombre de trains programmés"
-COLONNE_CIRCULE = "Nombre de trains ayant circulé"
+COLONNE_RETARD = "Trains_retard"
+COLONNE_ANNULE = "Trains_annulés"
+COLONNE_PROGRAMME = "Trains_programmés"
+COLONNE_CIRCULE = "Trains_circulés"
 COLONNE_DATE = "Date"
 
-# Application Dash 
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    suppress_callback_exceptions=True
-)
-server = app.server
+# Cascade ville -> gare (exécutée dans le navigateur).
+# Index : {ville: {'gares': [...], 'annees': {gare: [...]}}} (voir CubeIntercites.index_client)
+# - 0 ou 1 gare : dropdown caché, la seule gare est présélectionnée,
+# - plusieurs gares : dropdown affiché, la première gare est sélectionnée.
+CASCADE_GARE_JS = """
+function(ville, index) {
+    var cache = {'display': 'none'};
+    var entree = ville && index ? index[ville] : null;
+    if (!entree) {
+        return [[], null, true, cache, cache];
+    }
+    var gares = entree.gares;
+    if (gares.length <= 1) {
+        return [[], gares.length ? gares[0] : null, true, cache, cache];
+    }
+    var options = gares.map(function(g) { return {label: g, value: g}; });
+    return [options, gares[0], false, {'display': 'block'}, {'display': 'block'}];
+}
+"""
 
-# nous servira a obtenir les années disponibles pour une ville et une gare
-def get_available_years(df, ville, gare=None):
-    """
-    retourne la liste des années disponibles pour une ville et eventuellement une gare
-    Paramètres
-    ----------
-    df : pandas.DataFrame
-        Le DataFrame contenant l'ensemble des données ferroviaires.
-    ville : str
-        La ville sélectionnée dans l’interface utilisateur.
-    gare : str, optionnel
-        La gare de départ sélectionnée. Si None, toutes les gares de la ville sont considérées.
-
-    Retour
-    ------
-    list[int]
-        Liste triée (ordre décroissant) des années disponibles pour la combinaison ville/gare.
+# Cascade (ville, gare) -> année : années triées par ordre décroissant,
+# dropdown désactivé s'il n'y a qu'une année, message si aucune donnée.
+CASCADE_ANNEE_JS = """
+function(ville, gare, index) {
+    var visible = {'display': 'block'};
+    var cache = {'display': 'none'};
+    if (!ville) {
+        return [[], null, true, cache, cache];
+    }
+    var entree = index ? index[ville] : null;
+    var annees = entree && gare !== null ? (entree.annees[gare] || []) : [];
+    if (!annees.length) {
+        return [[], null, true, cache, visible];
+    }
+    var options = annees.map(function(a) { return {label: String(a), value: a}; });
+    return [options, annees[0], annees.length === 1, visible, cache];
+}
+"""
+
+
+def charger_donnees(loader=None):
     """
-    data = df[df['Ville'] == ville]
-    if gare:
-        data = data[data['Départ'] == gare]
-    years = sorted(data['Annee'].dropna().unique(), reverse=True)
-    return years
-
-# Layout
-app.layout = dbc.Container([
-    html.H1("Analyse des retards ferroviaires - Sud Ouest", className="text-center my-4"),
-
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.Label("Choisir la ville:"),
-                    dcc.Dropdown(
-                        id='ville-dropdown',
-                        options=[{'label': v, 'value': v} for v in sorted(toutes_donnees['Ville'].dropna().unique())],
-                        value=sorted(toutes_donnees['Ville'].dropna().unique())[0]
-                    ),
-                    html.Br(),
-
-                    # Container gare : le dropdown (la barre des options) existe toujours (elle est initialement cachée)
-                    html.Div(
-                        id='gare-container',
-                        children=[
-                            html.Label("Choisir la gare de départ:"),
-                            dcc.Dropdown(
-                                id='gare-dropdown',
-                                options=[],
-                                value=None,
-                                disabled=True,
-                                clearable=False,
-                                style={'display': 'none'}  # caché au départ
-                            )
-                        ]
-                    ),
-                    html.Br(),
-                    html.Div(id='annee-container', children=[
-                        html.Label("Choisir l'année:"),
-                        dcc.Dropdown(id='annee-dropdown', options=[], value=None, disabled=True)
-                    ]),
-                    html.Br(),
-                    html.P("Graphique montrant les trains programmés, ayant circulé, en retard et annulés.")
-                ])
-            ])
-        ], width=3),
+    Charge la table du tableau de bord (instantané Parquet si à jour).
 
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    dcc.Graph(id='graphique')
-                ])
-            ])
-        ], width=9)
-    ])
-], fluid=True)
-
-# Callback (fonction qui sera un argument dans une autre fonction plus tard) pour mettre à jour le contenu du container gare (dropdown toujours rendu)
-@app.callback(
-    Output('gare-dropdown', 'options'),
-    Output('gare-dropdown', 'value'),
-    Output('gare-dropdown', 'disabled'),
-    Output('gare-dropdown', 'style'),
-    Output('gare-container', 'style'),
-    Input('ville-dropdown', 'value')
-)
-
-def update_gare(ville):
+    Returns
+    -------
+    pandas.DataFrame
+        Table Intercités nettoyée, complétée par la ville, la gare de départ
+        imposée et l'année / le mois.
     """
-    Met à jour le contenu du dropdown des gares en fonction de la ville sélectionnée.
+    return PIPELINE_DASHBOARD(charger_intercites(loader or DataLoader()))
 
-    Cette fonction :
-    - récupère les gares disponibles pour la ville,
-    - décide si le dropdown doit être affiché, caché ou désactivé,
-    - préremplit la valeur si une seule gare existe.
 
-    Paramètres
+def creer_app(toutes_donnees=None, loader=None, dossier_figures=None):
+    """
+    Fabrique de l'application Dash.
+
+    Parameters
     ----------
-    ville : str
-        La ville sélectionnée.
-
-    Retour
-    ------
-    tuple :
-        - options (list[dict]) : liste des options du dropdown des gares,
-        - value (str|None) : valeur sélectionnée automatiquement,
-        - disabled (bool) : si le dropdown est désactivé,
-        - style_dropdown (dict) : style CSS du dropdown,
-        - style_container (dict) : style CSS du conteneur.
+    toutes_donnees : pandas.DataFrame ou None
+        Table déjà chargée (voir charger_donnees) ; chargée si None.
+    loader : DataLoader ou None
+        Chargeur utilisé si la table doit être chargée.
+    dossier_figures : str ou None
+        Dossier du cache disque des figures (variable d'environnement
+        CACHE_FIGURES, sinon dossier 'figures' du cache des données).
+
+    Returns
+    -------
+    dash.Dash
+        Application configurée ; ``app.server`` est l'application WSGI.
     """
-    if not ville:
-        # garder caché et vide
-        return [], None, True, {'display': 'none'}, {'display': 'none'}
-
-    # Récupérer les gares pour la ville
-    gares = sorted(
-        toutes_donnees[toutes_donnees['Ville'] == ville]['Départ']
-        .dropna()
-        .unique()
+    loader = loader or DataLoader()
+    if toutes_donnees is None:
+        toutes_donnees = charger_donnees(loader)
+
+    # Cube Ville × Départ × Année × Mois construit une seule fois : les callbacks
+    # lisent des dictionnaires au lieu de filtrer toute la table à chaque sélection
+    cube = CubeIntercites(toutes_donnees)
+
+    # Figures mises en cache par (ville, gare, année) et version des données ;
+    # le dossier disque est partagé par tous les workers servant `server`
+    cache_figures = CacheFigures(
+        version=cube.version,
+        dossier=dossier_figures or os.environ.get(
+            'CACHE_FIGURES', os.path.join(loader.cache.dossier, 'figures')),
     )
 
-    # Si 0 ou 1 gare -> on cache le dropdown (la barre des options) (mais il existe toujours dans le layout)
-    if len(gares) <= 1:
-        # si 1 gare, on peut préremplir la valeur (utile pour le filtrage ensuite)
-        value = gares[0] if len(gares) == 1 else None
-        return [], value, True, {'display': 'none'}, {'display': 'none'}
+    # Application Dash 
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.BOOTSTRAP],
+        suppress_callback_exceptions=True,
+        compress=flask_compress is not None,
+    )
+    app.cube = cube
+    app.cache_figures = cache_figures
+
+    # Layout
+    app.layout = dbc.Container([
+        dcc.Store(id='index-store', data=cube.index_client()),
+        html.H1("Analyse des retards ferroviaires - Sud Ouest", className="text-center my-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Label("Choisir la ville:"),
+                        dcc.Dropdown(
+                            id='ville-dropdown',
+                            options=[{'label': v, 'value': v} for v in cube.villes],
+                            value=cube.villes[0]
+                        ),
+                        html.Br(),
+
+                        # Container gare : le dropdown (la barre des options) existe toujours (elle est initialement cachée)
+                        html.Div(
+                            id='gare-container',
+                            children=[
+                                html.Label("Choisir la gare de départ:"),
+                                dcc.Dropdown(
+                                    id='gare-dropdown',
+                                    options=[],
+                                    value=None,
+                                    disabled=True,
+                                    clearable=False,
+                                    style={'display': 'none'}  # caché au départ
+                                )
+                            ]
+                        ),
+                        html.Br(),
+                        html.Div(id='annee-container', children=[
+                            html.Div(id='annee-choix', children=[
+                                html.Label("Choisir l'année:"),
+                                dcc.Dropdown(id='annee-dropdown', options=[], value=None, disabled=True)
+                            ]),
+                            html.P("Aucune donnée disponible pour la combinaison sélectionnée",
+                                   id='annee-message', style={'display': 'none'})
+                        ]),
+                        html.Br(),
+                        html.P("Graphique montrant les trains programmés, ayant circulé, en retard et annulés.")
+                    ])
+                ])
+            ], width=3),
 
-    # Si plusieurs gares -> on affiche et on remplit les options
-    options = [{'label': g, 'value': g} for g in gares]
-    value = gares[0]  # valeur par défaut (première)
-    return options, value, False, {'display': 'block'}, {'display': 'block'}
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        dcc.Graph(id='graphique')
+                    ])
+                ])
+            ], width=9)
+        ])
+    ], fluid=True)
+
+    # Cascade ville -> gare -> année exécutée dans le navigateur à partir de
+    # l'index envoyé une seule fois dans 'index-store' (aucun aller-retour serveur)
+    app.clientside_callback(
+        CASCADE_GARE_JS,
+        Output('gare-dropdown', 'options'),
+        Output('gare-dropdown', 'value'),
+        Output('gare-dropdown', 'disabled'),
+        Output('gare-dropdown', 'style'),
+        Output('gare-container', 'style'),
+        Input('ville-dropdown', 'value'),
+        State('index-store', 'data')
+    )
 
+    app.clientside_callback(
+        CASCADE_ANNEE_JS,
+        Output('annee-dropdown', 'options'),
+        Output('annee-dropdown', 'value'),
+        Output('annee-dropdown', 'disabled'),
+        Output('annee-choix', 'style'),
+        Output('annee-message', 'style'),
+        Input('ville-dropdown', 'value'),
+        Input('gare-dropdown', 'value'),
+        State('index-store', 'data')
+    )
 
+    # Callback (fonction qui sera un argument dans une autre fonction plus tard) unique pour mettre à jour le graphique (dépend de ville, gare, année)
+    @app.callback(
+        Output('graphique', 'figure'),
+        Input('ville-dropdown', 'value'),
+        Input('gare-dropdown', 'value'),
+        Input('annee-dropdown', 'value')
+    )
+    @cache_figures.memoiser
+    def update_graphique(ville, gare, annee):
+        """
+        Génère et met à jour la figure Plotly affichant les performances ferroviaires.
+
+        La fonction :
+        - vérifie et complète les selections manquantes (gare ou année),
+        - filtre les données selon la ville/gare/année,
+        - construit une figure Plotly combinant barres empilées et courbes,
+        - gère les cas où aucune donnée n'est disponible.
+
+        Les figures sont mises en cache (voir `cache_figures`) : une sélection
+        déjà affichée est resservie sans être reconstruite.
+
+        Paramètres
+        ----------
+        ville : str
+            La ville sélectionnée par l'utilisateur.
+        gare : str|None
+            La gare sélectionnée. Peut être None si la ville n'a qu'une seule gare.
+        annee : int|None
+            L'année sélectionnée. Si None, prend la première année disponible.
+
+        Retour
+        ------
+        plotly.graph_objects.Figure
+            La figure représentant les trains programmés, circulés, annulés et en retard.
+        """
+        if not ville:
+            return go.Figure().update_layout(title="Sélectionnez une ville")
+
+        # Si l'année ou la gare n'est pas fournie, on tente de prendre la première disponible
+        if gare is None:
+            gares = cube.gares(ville)
+            gare = gares[0] if gares else None
+
+        if annee is None:
+            annees = cube.annees(ville, gare)
+            annee = annees[0] if annees else None
+
+        if annee is None:
+            return go.Figure().update_layout(title=f"Aucune donnée pour {ville}")
+
+        # Série mensuelle pré-calculée (déjà triée par date)
+        data = cube.tranche(ville, gare, annee)
+
+        if data.empty:
+            titre = f"Aucune donnée pour {gare or 'N/A'} → {ville} en {annee}"
+            return go.Figure().update_layout(title=titre)
+        # Construire la figure
+        fig = go.Figure()
+        pastel_retard = '#FFC966'
+        pastel_annule = '#D4A5A5'
+        pastel_programme = '#B5EAD7'
+        pastel_circule = '#2E86AB'
+        fig.add_trace(go.Bar(x=data['Date_complete'], y=data[COLONNE_RETARD], name='Trains en retard'))
+        fig.add_trace(go.Bar(x=data['Date_complete'], y=data[COLONNE_ANNULE], name='Trains annulés'))
+        fig.add_trace(go.Scatter(x=data['Date_complete'], y=data[COLONNE_PROGRAMME], name='Trains programmés', mode='lines'))
+        fig.add_trace(go.Scatter(x=data['Date_complete'], y=data[COLONNE_CIRCULE], name='Trains ayant circulé', mode='lines'))
+
+        titre = f"Performance ferroviaire : {gare} → {ville} en {annee}"
+
+        fig.update_layout(
+            title=titre,
+            barmode='stack',
+            xaxis_title='Mois',
+            yaxis_title='Nombre de trains',
+            legend=dict(x=0.02, y=0.98)
+        )
 
-# Callback (fonction qui sera un argument dans une autre fonction plus tard) pour mettre à jour les années disponibles (dépend de ville ET gare)
-@app.callback(
-    Output('annee-container', 'children'),
-    Input('ville-dropdown', 'value'),
-    Input('gare-dropdown', 'value')
-)
-def update_annee(ville, gare):
-    """
-    Met à jour le dropdown des années disponibles en fonction de la ville et de la gare.
+        return fig
 
-    Cette fonction détermine quelles années sont disponibles pour la combinaison
-    ville + gare, et génère dynamiquement le composant Dash correspondant.
+    return app
 
-    Paramètres
-    ----------
-    ville : str
-        La ville sélectionnée.
-    gare : str|None
-        La gare sélectionnée ou None si non applicable.
-
-    Retour
-    ------
-    list|dash.html.Div
-        Composants Dash affichant soit le dropdown d'années, soit un message
-        d’indisponibilité si aucune donnée n'est trouvée.
-    """
-    if not ville:
-        return html.Div()
-
-    annees = get_available_years(toutes_donnees, ville, gare)
-    if not annees:
-        return html.P("Aucune donnée disponible pour la combinaison sélectionnée")
-
-    # Si une seule année, la liste de choix est désactivée
-    disabled = len(annees) == 1
-    return [
-        html.Label("Choisir l'année:"),
-        dcc.Dropdown(
-            id='annee-dropdown',
-            options=[{'label': str(a), 'value': a} for a in annees],
-            value=annees[0],
-            disabled=disabled
-        )
-    ]
-
-# Callback (fonction qui sera un argument dans une autre fonction plus tard) unique pour mettre à jour le graphique (dépend de ville, gare, année)
-@app.callback(
-    Output('graphique', 'figure'),
-    Input('ville-dropdown', 'value'),
-    Input('gare-dropdown', 'value'),
-    Input('annee-dropdown', 'value')
-)
-def update_graphique(ville, gare, annee):
-    """
-    Génère et met à jour la figure Plotly affichant les performances ferroviaires.
 
-    La fonction :
-    - vérifie et complète les selections manquantes (gare ou année),
-    - filtre les données selon la ville/gare/année,
-    - construit une figure Plotly combinant barres empilées et courbes,
-    - gère les cas où aucune donnée n'est disponible.
+def main():
+    """Lance le serveur de développement (debug activé par DASH_DEBUG=1)."""
+    import psutil
 
-    Paramètres
-    ----------
-    ville : str
-        La ville sélectionnée par l'utilisateur.
-    gare : str|None
-        La gare sélectionnée. Peut être None si la ville n'a qu'une seule gare.
-    annee : int|None
-        L'année sélectionnée. Si None, prend la première année disponible.
-
-    Retour
-    ------
-    plotly.graph_objects.Figure
-        La figure représentant les trains programmés, circulés, annulés et en retard.
-    """
-    if not ville:
-        return go.Figure().update_layout(title="Sélectionnez une ville")
-
-    # Si l'année ou la gare n'est pas fournie, on tente de prendre la première disponible
-    if gare is None:
-        gares = sorted(toutes_donnees[toutes_donnees['Ville'] == ville]['Départ'].dropna().unique())
-        gare = gares[0] if gares else None
-
-    if annee is None:
-        annees = get_available_years(toutes_donnees, ville, gare)
-        annee = annees[0] if annees else None
-
-    if annee is None:
-        return go.Figure().update_layout(title=f"Aucune donnée pour {ville}")
-
-    # Filtrer
-    data = toutes_donnees[(toutes_donnees['Ville'] == ville) & (toutes_donnees['Annee'] == int(annee))]
-    if gare:
-        data = data[data['Départ'] == gare]
-
-    if data.empty:
-        titre = f"Aucune donnée pour {gare or 'N/A'} → {ville} en {annee}"
-        return go.Figure().update_layout(title=titre)
-
-    # Tri par date
-    data = data.sort_values('Date_complete')
-    # Construire la figure
-    fig = go.Figure()
-    pastel_retard = '#FFC966'
-    pastel_annule = '#D4A5A5'
-    pastel_programme = '#B5EAD7'
-    pastel_circule = '#2E86AB'
-    fig.add_trace(go.Bar(x=data['Date_complete'], y=data[COLONNE_RETARD], name='Trains en retard'))
-    fig.add_trace(go.Bar(x=data['Date_complete'], y=data[COLONNE_ANNULE], name='Trains annulés'))
-    fig.add_trace(go.Scatter(x=data['Date_complete'], y=data[COLONNE_PROGRAMME], name='Trains programmés', mode='lines'))
-    fig.add_trace(go.Scatter(x=data['Date_complete'], y=data[COLONNE_CIRCULE], name='Trains ayant circulé', mode='lines'))
-
-    titre = f"Performance ferroviaire : {gare or data['Départ'].iloc[0]} → {ville} en {annee}"
-
-    fig.update_layout(
-        title=titre,
-        barmode='stack',
-        xaxis_title='Mois',
-        yaxis_title='Nombre de trains',
-        legend=dict(x=0.02, y=0.98)
-    )
+    # Avant l'exécution
+    process = psutil.Process(os.getpid())
+    mem_avant = process.memory_info().rss / 1024 / 1024  # Mo
 
-    return fig
+    # Début du chronomètre
+    start_time = time.time()
+    app = creer_app()
+    print("Toutes les données sont chargées")
 
+    # Après l'exécution
+    mem_apres = process.memory_info().rss / 1024 / 1024  # Mo
+    execution_time = time.time() - start_time
+    print(f"Mémoire utilisée : {mem_apres - mem_avant:.2f} Mo")
+    print(f"Temps d'exécution : {execution_time:.2f} secondes")
 
-end_time = time.time()
-execution_time = end_time - start_time
+    print("Application disponible sur: http://localhost:8050")
+    app.run(debug=os.environ.get('DASH_DEBUG') == '1', port=8050)
 
-# Après l'exécution
-mem_apres = process.memory_info().rss / 1024 / 1024  # Mo
-end_time = time.time()
-execution_time = end_time - start_time
-print(f"Mémoire utilisée : {mem_apres - mem_avant:.2f} Mo")
-print(f"Temps d'exécution : {execution_time:.2f} secondes")
 
 if __name__ == '__main__':
-    """Point d'entrée de l'application : lance le serveur Dash en mode debug."""
-    print("Application disponible sur: http://localhost:8050")
-    app.run(debug=True, port=8050)
\ No newline at end of file
+    main()
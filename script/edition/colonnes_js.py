@@ -0,0 +1,203 @@
+"""
+Format de données colonnaire compact pour les pages HTML autonomes.
+
+Au lieu d'une liste d'enregistrements (``to_dict('records')``) répétant les
+noms de colonnes à chaque ligne, les données sont intégrées sous la forme :
+
+    {
+        "n": <nombre de lignes>,
+        "dictionnaires": {"v": ["Albi", "Bayonne", ...], ...},
+        "colonnes": {
+            "v": [0, 0, 1, ...],                         # codes du dictionnaire
+            "r": [12, 7, ...],                           # entiers
+            "p": {"type": "int16", "b64": "AQACAA..."}   # tableau typé (option)
+        }
+    }
+
+- les clés sont courtes (voir le paramètre ``noms`` de encoder_colonnes),
+- les libellés répétés (villes, gares) sont remplacés par des codes entiers,
+- les colonnes entières peuvent être encodées en tableaux typés little-endian
+  en base64, décodés sans analyse JSON par DECODEUR_JS.
+
+La fonction JavaScript ``decoderColonnes(charge)`` (constante DECODEUR_JS)
+renvoie ``{n, colonnes, dictionnaires}`` où chaque colonne est un tableau
+(ou un tableau typé) et ``dictionnaires[cle][code]`` donne le libellé.
+
+Un index imbriqué (indexer_plages) peut accompagner la charge : pour des
+lignes triées, il donne directement les plages de lignes [début, fin) de
+chaque combinaison de clés, sans parcourir les données.
+"""
+
+import base64
+
+import numpy as np
+import pandas as pd
+
+# Types entiers autorisés, du plus compact au plus large
+TYPES_ENTIERS = ['int8', 'uint8', 'int16', 'uint16', 'int32']
+
+DECODEUR_JS = """
+        const TABLEAUX_TYPES = {
+            int8: Int8Array, uint8: Uint8Array,
+            int16: Int16Array, uint16: Uint16Array,
+            int32: Int32Array
+        };
+
+        function decoderTableau(valeur) {
+            if (Array.isArray(valeur)) {
+                return valeur;
+            }
+            const binaire = atob(valeur.b64);
+            const octets = new Uint8Array(binaire.length);
+            for (let i = 0; i < binaire.length; i++) {
+                octets[i] = binaire.charCodeAt(i);
+            }
+            return new TABLEAUX_TYPES[valeur.type](octets.buffer);
+        }
+
+        function decoderColonnes(charge) {
+            const colonnes = {};
+            for (const cle in charge.colonnes) {
+                colonnes[cle] = decoderTableau(charge.colonnes[cle]);
+            }
+            return {n: charge.n, colonnes: colonnes, dictionnaires: charge.dictionnaires};
+        }
+"""
+
+
+def type_entier(valeurs):
+    """
+    Plus petit type entier (TYPES_ENTIERS) pouvant contenir les valeurs.
+
+    Parameters
+    ----------
+    valeurs : numpy.ndarray
+        Tableau d'entiers.
+
+    Returns
+    -------
+    str
+    """
+    if len(valeurs) == 0:
+        return 'uint8'
+    mini, maxi = int(valeurs.min()), int(valeurs.max())
+    for nom in TYPES_ENTIERS:
+        info = np.iinfo(nom)
+        if info.min <= mini and maxi <= info.max:
+            return nom
+    raise ValueError(f"Valeurs hors de l'intervalle int32 : [{mini}, {maxi}]")
+
+
+def _encoder_tableau(valeurs, binaire):
+    if not binaire:
+        return valeurs.tolist()
+    nom = type_entier(valeurs)
+    octets = valeurs.astype(np.dtype(nom).newbyteorder('<')).tobytes()
+    return {'type': nom, 'b64': base64.b64encode(octets).decode('ascii')}
+
+
+def encoder_colonnes(df, noms, dictionnaires=(), binaire=False):
+    """
+    Encode un DataFrame au format colonnaire compact.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Données à encoder ; les colonnes hors dictionnaires doivent être
+        entières (les valeurs manquantes sont remplacées par 0).
+    noms : dict
+        Dictionnaire clé courte -> nom de colonne de df.
+    dictionnaires : iterable
+        Clés courtes des colonnes de libellés à encoder par dictionnaire.
+    binaire : bool
+        Si True, les tableaux sont encodés en tableaux typés base64.
+
+    Returns
+    -------
+    dict
+        Charge sérialisable en JSON (voir la description du module).
+    """
+    charge = {'n': len(df), 'dictionnaires': {}, 'colonnes': {}}
+    for cle, colonne in noms.items():
+        serie = df[colonne]
+        if cle in dictionnaires:
+            codes, libelles = pd.factorize(serie.astype(object), sort=True)
+            charge['dictionnaires'][cle] = [str(v) for v in libelles]
+            valeurs = codes
+        else:
+            valeurs = pd.to_numeric(serie).fillna(0).to_numpy(dtype='int64')
+        charge['colonnes'][cle] = _encoder_tableau(np.asarray(valeurs, dtype='int64'), binaire)
+    return charge
+
+
+def indexer_plages(df, colonnes):
+    """
+    Index imbriqué des plages de lignes contiguës.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Données triées selon les colonnes (dans l'ordre donné).
+    colonnes : list
+        Colonnes formant les niveaux de l'index.
+
+    Returns
+    -------
+    dict
+        {valeur_1: {valeur_2: ... {valeur_n: [début, fin]}}} où les valeurs sont
+        converties en texte (clés JSON) et [début, fin) sont des positions de
+        lignes de df.
+
+    Raises
+    ------
+    ValueError
+        Si une combinaison de clés n'est pas contiguë (df non trié).
+    """
+    index = {}
+    if df.empty:
+        return index
+    cles = df[colonnes].astype(str)
+    # Une plage commence à chaque changement de combinaison de clés
+    debuts = np.flatnonzero((cles != cles.shift()).any(axis=1).to_numpy())
+    fins = np.append(debuts[1:], len(df))
+    valeurs = cles.to_numpy()
+
+    for debut, fin in zip(debuts.tolist(), fins.tolist()):
+        *parents, feuille = valeurs[debut]
+        noeud = index
+        for valeur in parents:
+            noeud = noeud.setdefault(valeur, {})
+        if feuille in noeud:
+            raise ValueError(f"Lignes non triées selon {colonnes} : {list(valeurs[debut])}")
+        noeud[feuille] = [debut, fin]
+    return index
+
+
+def decoder_colonnes(charge, noms):
+    """
+    Reconstruit le DataFrame encodé par encoder_colonnes (équivalent Python
+    de decoderColonnes, utilisé pour les vérifications).
+
+    Parameters
+    ----------
+    charge : dict
+        Charge produite par encoder_colonnes.
+    noms : dict
+        Dictionnaire clé courte -> nom de colonne.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    colonnes = {}
+    for cle, colonne in noms.items():
+        valeur = charge['colonnes'][cle]
+        if isinstance(valeur, dict):
+            valeurs = np.frombuffer(base64.b64decode(valeur['b64']),
+                                    dtype=np.dtype(valeur['type']).newbyteorder('<'))
+        else:
+            valeurs = np.asarray(valeur, dtype='int64')
+        if cle in charge['dictionnaires']:
+            valeurs = np.asarray(charge['dictionnaires'][cle], dtype=object)[valeurs]
+        colonnes[colonne] = valeurs
+    return pd.DataFrame(colonnes)
@@ -0,0 +1,329 @@
+"""
+Construction incrémentale des pages générées du site (dossier docs/).
+
+Chaque page (cible) déclare :
+- les fichiers de données dont elle dépend,
+- les scripts qui la produisent,
+- la fonction qui la construit.
+
+Une clé est calculée pour chaque cible à partir des empreintes SHA-256 de ses
+données et de ses scripts (les données passant par DataLoader sont seulement
+revalidées dans le cache, pas relues). Les clés de la dernière construction
+sont enregistrées dans '<sortie>/.construction.json' : seules les pages dont
+la clé a changé (ou dont le fichier manque) sont reconstruites, en parallèle
+dans des processus séparés. Chaque processus recrée, hors ligne, un
+DataLoader avec les URLs, le cache et le registre du chargeur principal.
+Les données partagées par plusieurs pages (instantané Intercités) sont
+préparées une seule fois dans le processus principal avant de lancer les
+constructions, pour que deux processus ne les réécrivent pas en même temps.
+
+Utilisation :
+
+    python construction_site.py [--sortie ../../docs] [--force] [cible ...]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache_donnees import sha256_fichier
+from data_loader import DataLoader
+from snapshot_intercites import cle_sources, noms_intercites
+
+RACINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DOSSIER_EDITION = os.path.join(RACINE, 'script', 'edition')
+DOSSIER_VISUALISATION = os.path.join(RACINE, 'script', 'visualisation')
+DOSSIER_DOCS = os.path.join(RACINE, 'docs')
+
+# Fichier d'état des constructions, dans le dossier de sortie
+FICHIER_ETAT = '.construction.json'
+
+# Modules communs à toutes les pages construites à partir de DataLoader
+SCRIPTS_COMMUNS = [
+    os.path.join(DOSSIER_EDITION, nom) for nom in
+    ['data_loader.py', 'cache_donnees.py', 'lecteur_csv.py', 'schemas.py', 'nettoyage.py',
+     'snapshot_intercites.py']
+]
+
+
+class Cible:
+    """
+    Page générée du site.
+
+    Attributs
+    ---------
+    nom : str
+        Nom du fichier produit dans le dossier de sortie.
+    sources : callable
+        Fonction loader -> dictionnaire nom -> chemin des fichiers de données.
+    scripts : list[str]
+        Fichiers de code dont dépend la page.
+    construire : callable
+        Fonction (chemin de sortie, paramètres du chargeur) -> None, définie
+        au niveau d'un module pour pouvoir être exécutée dans un autre
+        processus (voir parametres_loader).
+    preparer : callable ou None
+        Fonction loader -> None exécutée une seule fois dans le processus
+        principal avant les constructions (données partagées entre pages).
+    """
+
+    def __init__(self, nom, sources, scripts, construire, preparer=None):
+        self.nom = nom
+        self.sources = sources
+        self.scripts = list(scripts)
+        self.construire = construire
+        self.preparer = preparer
+
+    def cle(self, loader, sources):
+        """
+        Clé des données et des scripts de la cible.
+
+        Parameters
+        ----------
+        loader : DataLoader
+            Chargeur connaissant les empreintes des fichiers en cache.
+        sources : dict
+            Fichiers de données de la cible (résultat de self.sources).
+        """
+        empreintes = {}
+        for nom, chemin in sources.items():
+            empreintes[nom] = loader.get_hash(nom) or sha256_fichier(chemin)
+        for script in self.scripts:
+            empreintes[f"code:{os.path.relpath(script, RACINE)}"] = sha256_fichier(script)
+        return cle_sources(empreintes)
+
+
+def sources_intercites(loader):
+    """Fichiers Intercités, récupérés (sans lecture) par le cache de DataLoader."""
+    return loader.fetch_all(noms_intercites(loader), parallel=True)
+
+
+def preparer_intercites(loader):
+    """Construit ou met à jour l'instantané Intercités lu par les pages."""
+    _preparer_chemins()
+    from snapshot_intercites import charger_intercites
+    charger_intercites(loader)
+
+
+def sources_docs_data(loader):
+    """Fichiers CSV de docs/data lus par analyse_retard.py."""
+    dossier = os.path.join(DOSSIER_DOCS, 'data')
+    return {f"docs/data/{f}": os.path.join(dossier, f)
+            for f in sorted(os.listdir(dossier)) if f.endswith('.csv')}
+
+
+def parametres_loader(loader):
+    """
+    Paramètres permettant de recréer un chargeur dans un autre processus.
+
+    Returns
+    -------
+    dict
+        Arguments de DataLoader : 'urls', 'cache_dir' et 'registry'.
+    """
+    return {'urls': dict(loader.urls), 'cache_dir': loader.cache.dossier,
+            'registry': dict(loader.cache.registre)}
+
+
+def _loader_hors_ligne(parametres):
+    # Le processus principal vient de revalider le cache : pas de requête réseau
+    return DataLoader(offline=True, **(parametres or {}))
+
+
+def _preparer_chemins():
+    for dossier in (DOSSIER_EDITION, DOSSIER_VISUALISATION):
+        if dossier not in sys.path:
+            sys.path.insert(0, dossier)
+
+
+def construire_performance(chemin, parametres=None):
+    """Page scatter de performance des relations Intercités."""
+    _preparer_chemins()
+    from creation_html_performances_intercites import generer_html
+    from performances_intercites import resumer_relations
+    from snapshot_intercites import charger_intercites
+
+    df = charger_intercites(_loader_hors_ligne(parametres))
+    generer_html(resumer_relations(df), chemin)
+
+
+def construire_retard_annulation(chemin, parametres=None):
+    """Page interactive retards / annulations par ville."""
+    _preparer_chemins()
+    from creation_html_graph_interactif_retard_annulation_intercites import generer_html
+    from nettoyage import PIPELINE_DASHBOARD
+    from snapshot_intercites import charger_intercites
+
+    df = charger_intercites(_loader_hors_ligne(parametres))
+    generer_html(PIPELINE_DASHBOARD(df), chemin)
+
+
+def construire_graphique(chemin, parametres=None):
+    """
+    Page produite par docs/analyse_retard.py.
+
+    Le script écrit 'graphique.html' dans son dossier courant : il est exécuté
+    dans un dossier temporaire puis le fichier est déplacé.
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        subprocess.run([sys.executable, os.path.join(DOSSIER_DOCS, 'analyse_retard.py')],
+                       cwd=dossier, check=True, stdout=subprocess.DEVNULL,
+                       env={**os.environ, 'BROWSER': 'true'})
+        shutil.move(os.path.join(dossier, 'graphique.html'), chemin)
+
+
+CIBLES = [
+    Cible('graph_interactif_performance.html', sources_intercites,
+          SCRIPTS_COMMUNS + [os.path.join(DOSSIER_EDITION, 'performances_intercites.py'),
+                             os.path.join(DOSSIER_EDITION, 'agregation_ponderee.py'),
+                             os.path.join(DOSSIER_EDITION, 'plotly_js.py'),
+                             os.path.join(DOSSIER_VISUALISATION, 'creation_html_performances_intercites.py')],
+          construire_performance, preparer_intercites),
+    Cible('graph_interactif_retard_annulation_intercites.html', sources_intercites,
+          SCRIPTS_COMMUNS + [os.path.join(DOSSIER_EDITION, 'cube_intercites.py'),
+                             os.path.join(DOSSIER_EDITION, 'colonnes_js.py'),
+                             os.path.join(DOSSIER_EDITION, 'plotly_js.py'),
+                             os.path.join(DOSSIER_VISUALISATION,
+                                          'creation_html_graph_interactif_retard_annulation_intercites.py')],
+          construire_retard_annulation, preparer_intercites),
+    Cible('graphique.html', sources_docs_data,
+          [os.path.join(DOSSIER_DOCS, 'analyse_retard.py')]
+          + [os.path.join(DOSSIER_EDITION, nom) for nom in
+             ['lecteur_csv.py', 'cache_donnees.py', 'schemas.py', 'nettoyage.py']],
+          construire_graphique),
+]
+
+
+def lire_etat(sortie):
+    """Clés de la dernière construction (dictionnaire nom -> clé)."""
+    chemin = os.path.join(sortie, FICHIER_ETAT)
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ecrire_etat(sortie, etat):
+    """Écriture atomique de l'état des constructions."""
+    chemin = os.path.join(sortie, FICHIER_ETAT)
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(etat, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(chemin + '.tmp', chemin)
+
+
+def a_reconstruire(cibles, sortie, cles, etat, force=False):
+    """
+    Cibles dont la clé a changé ou dont le fichier de sortie manque.
+
+    Returns
+    -------
+    list[Cible]
+    """
+    return [
+        cible for cible in cibles
+        if force
+        or etat.get(cible.nom) != cles[cible.nom]
+        or not os.path.exists(os.path.join(sortie, cible.nom))
+    ]
+
+
+def construire_site(cibles=None, sortie=DOSSIER_DOCS, loader=None, force=False,
+                    parallele=True, max_workers=None):
+    """
+    Reconstruit les pages dont les données ou les scripts ont changé.
+
+    Parameters
+    ----------
+    cibles : list[Cible] ou None
+        Pages à considérer (toutes par défaut).
+    sortie : str
+        Dossier de sortie.
+    loader : DataLoader ou None
+        Chargeur utilisé pour revalider les données ; ses URLs, son cache et
+        son registre sont transmis aux constructions (parametres_loader).
+    force : bool
+        Si True, reconstruit toutes les pages.
+    parallele : bool
+        Si True, les pages sont construites dans des processus séparés.
+    max_workers : int ou None
+        Nombre maximal de processus.
+
+    Returns
+    -------
+    dict
+        Dictionnaire nom -> 'reconstruite' ou 'à jour'.
+
+    Raises
+    ------
+    RuntimeError
+        Si au moins une construction a échoué (les autres sont enregistrées).
+    """
+    cibles = CIBLES if cibles is None else cibles
+    loader = loader or DataLoader()
+    os.makedirs(sortie, exist_ok=True)
+
+    # Les sources partagées par plusieurs pages ne sont revalidées qu'une fois
+    sources = {}
+    cles = {}
+    for cible in cibles:
+        if cible.sources not in sources:
+            sources[cible.sources] = cible.sources(loader)
+        cles[cible.nom] = cible.cle(loader, sources[cible.sources])
+    etat = lire_etat(sortie)
+    travaux = a_reconstruire(cibles, sortie, cles, etat, force)
+    parametres = parametres_loader(loader)
+    # Données partagées préparées une fois, avant de lancer les processus
+    for preparer in dict.fromkeys(cible.preparer for cible in travaux if cible.preparer):
+        preparer(loader)
+    resultat = {cible.nom: 'à jour' for cible in cibles}
+    echecs = {}
+
+    def terminer(cible, erreur):
+        if erreur is None:
+            etat[cible.nom] = cles[cible.nom]
+            ecrire_etat(sortie, etat)
+            resultat[cible.nom] = 'reconstruite'
+        else:
+            echecs[cible.nom] = erreur
+
+    if parallele and len(travaux) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(cible.construire, os.path.join(sortie, cible.nom), parametres): cible
+                       for cible in travaux}
+            for future in as_completed(futures):
+                terminer(futures[future], future.exception())
+    else:
+        for cible in travaux:
+            try:
+                cible.construire(os.path.join(sortie, cible.nom), parametres)
+                terminer(cible, None)
+            except Exception as e:
+                terminer(cible, e)
+
+    if echecs:
+        raise RuntimeError(f"Échec de construction : {echecs}")
+    return resultat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reconstruit les pages du site dont les données ont changé.")
+    parser.add_argument('cibles', nargs='*', help="pages à considérer (toutes par défaut)")
+    parser.add_argument('--sortie', default=DOSSIER_DOCS, help="dossier de sortie")
+    parser.add_argument('--force', action='store_true', help="tout reconstruire")
+    parser.add_argument('--sequentiel', action='store_true', help="construire dans ce processus")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus")
+    args = parser.parse_args()
+
+    choisies = [c for c in CIBLES if not args.cibles or c.nom in args.cibles]
+    start_time = time.time()
+    resultat = construire_site(choisies, args.sortie, force=args.force,
+                               parallele=not args.sequentiel, max_workers=args.workers)
+    for nom, statut in resultat.items():
+        print(f"  {nom:<55} {statut}")
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
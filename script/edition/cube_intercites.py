@@ -0,0 +1,121 @@
+"""
+Cube d'agrégats Ville × Départ × Année × Mois pour les tableaux de bord.
+
+Le cube est construit une seule fois au démarrage à partir de la table
+complétée par PIPELINE_DASHBOARD. Les callbacks n'ont ensuite plus besoin
+de parcourir toute la table avec des masques booléens : la liste des gares
+d'une ville, les années disponibles et la série mensuelle d'une sélection
+sont obtenues par simple lecture de dictionnaire.
+"""
+
+import pandas as pd
+
+# Colonnes sommées par mois dans le cube
+COLONNES_COMPTES = ['Trains_programmés', 'Trains_circulés', 'Trains_annulés', 'Trains_retard']
+
+CLES = ['Ville', 'Départ', 'Annee', 'Mois']
+
+
+class CubeIntercites:
+    """
+    Agrégats mensuels indexés par ville, gare de départ et année.
+
+    Attributs
+    ---------
+    cube : pandas.DataFrame
+        Sommes mensuelles, indexées par (Ville, Départ, Annee, Mois).
+    villes : list[str]
+        Villes disponibles, triées.
+    version : str
+        Empreinte du contenu du cube (change si les données changent).
+    """
+
+    def __init__(self, toutes_donnees):
+        """
+        Parameters
+        ----------
+        toutes_donnees : pandas.DataFrame
+            Table nettoyée complétée par PIPELINE_DASHBOARD (colonnes Ville,
+            Départ, Annee, Mois, Date_complete et comptes de trains).
+        """
+        df = toutes_donnees.dropna(subset=['Ville', 'Annee']).copy()
+        df['Ville'] = df['Ville'].astype(str)
+        df['Départ'] = df['Départ'].astype(str)
+        df['Annee'] = df['Annee'].astype(int)
+
+        colonnes = [c for c in COLONNES_COMPTES if c in df.columns]
+        agregats = {c: (c, 'sum') for c in colonnes}
+        agregats['Date_complete'] = ('Date_complete', 'first')
+        self.cube = df.groupby(CLES, sort=True).agg(**agregats)
+
+        self.villes = sorted(df['Ville'].unique())
+        self.version = format(int(pd.util.hash_pandas_object(self.cube).sum()) & (2**64 - 1), '016x')
+        self._gares = {}
+        self._annees = {}
+        self._tranches = {}
+
+        for (ville, gare, annee), tranche in self.cube.groupby(level=[0, 1, 2], sort=True):
+            annee = int(annee)
+            self._gares.setdefault(ville, set()).add(gare)
+            self._annees.setdefault((ville, gare), set()).add(annee)
+            self._annees.setdefault((ville, None), set()).add(annee)
+            self._tranches[(ville, gare, annee)] = (
+                tranche.reset_index(level=[0, 1, 2], drop=True).sort_values('Date_complete')
+            )
+
+        self._gares = {ville: sorted(gares) for ville, gares in self._gares.items()}
+        self._annees = {cle: sorted(annees, reverse=True) for cle, annees in self._annees.items()}
+
+    def gares(self, ville):
+        """Gares de départ disponibles pour une ville (triées)."""
+        return self._gares.get(ville, [])
+
+    def annees(self, ville, gare=None):
+        """
+        Années disponibles pour une ville et éventuellement une gare.
+
+        Returns
+        -------
+        list[int]
+            Années triées par ordre décroissant.
+        """
+        return self._annees.get((ville, gare), [])
+
+    def index_client(self):
+        """
+        Index compact ville -> gares -> années envoyé au navigateur.
+
+        Returns
+        -------
+        dict
+            {ville: {'gares': [...], 'annees': {gare: [...]}}}, sérialisable en
+            JSON (les années sont triées par ordre décroissant).
+        """
+        return {
+            ville: {
+                'gares': gares,
+                'annees': {gare: self._annees[(ville, gare)] for gare in gares},
+            }
+            for ville, gares in self._gares.items()
+        }
+
+    def tranche(self, ville, gare, annee):
+        """
+        Série mensuelle d'une sélection.
+
+        Parameters
+        ----------
+        ville : str
+        gare : str
+        annee : int
+
+        Returns
+        -------
+        pandas.DataFrame
+            Une ligne par mois (index 'Mois'), triée par date ; vide si la
+            combinaison n'existe pas.
+        """
+        tranche = self._tranches.get((ville, gare, int(annee)))
+        if tranche is None:
+            return self.cube.iloc[0:0].reset_index(level=[0, 1, 2], drop=True)
+        return tranche
@@ -1,5 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
 import pooch
-import pandas as pd
+
+from cache_donnees import CacheDonnees, charger_registre
+from lecteur_csv import lire_csv
+from schemas import famille
+
+# Registre des empreintes SHA-256 figées (optionnel, voir CacheDonnees.figer_registre)
+REGISTRE_DEFAUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registre_donnees.json')
+
+# Nombre maximal de téléchargements simultanés par défaut
+MAX_WORKERS_DEFAUT = 8
+
+
+def read_csv_file(filename, family=None, dialectes=None):
+    """
+    Lit un fichier CSV SNCF.
+
+    Le format (séparateur, encodage, guillemets, noms de colonnes) est
+    détecté sur le début du fichier par lecteur_csv, qui le lit une seule
+    fois ; les noms de colonnes sont ramenés aux noms canoniques du schéma.
+
+    Si une famille est donnée, son schéma (module schemas) est appliqué
+    dès la lecture : catégories pour les gares, entiers 32 bits pour les
+    nombres de trains, float32 pour les taux, périodes pour 'Date'. Les
+    valeurs qui ne respectent pas le schéma deviennent NaN, colonne par
+    colonne, sans relire le fichier.
+
+    Fonction définie au niveau du module pour pouvoir être envoyée
+    à un ProcessPoolExecutor.
+
+    Parameters
+    ----------
+    filename : str
+        Chemin local du fichier.
+    family : str ou None
+        Famille du fichier ('intercites', 'tgv', ...), voir schemas.famille.
+    dialectes : str ou None
+        Fichier JSON des dialectes déjà détectés (voir lecteur_csv).
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    return lire_csv(filename, family, dialectes)
+
 
 class DataLoader:
     """
@@ -9,13 +55,27 @@ class DataLoader:
     ---------
     urls : dict
         Dictionnaire nom -> URL des fichiers CSV.
+    cache : CacheDonnees
+        Cache local adressé par contenu (intégrité, revalidation, hors ligne).
     data_dict : dict
         Dictionnaire nom -> DataFrame chargé.
+
+    Parameters
+    ----------
+    urls : dict ou None
+        Dictionnaire nom -> URL remplaçant les URLs par défaut.
+    cache_dir : str ou None
+        Dossier du cache local (par défaut le dossier de cache utilisateur).
+    offline : bool
+        Si True, ne sert que les fichiers déjà présents dans le cache.
+    registry : dict, str ou None
+        Empreintes SHA-256 attendues (dictionnaire ou chemin d'un registre
+        JSON). Par défaut registre_donnees.json s'il existe.
     """
 
-    def __init__(self):
+    def __init__(self, urls=None, cache_dir=None, offline=False, registry=None):
         # Dictionnaire des fichiers et URLs
-        self.urls = {
+        self.urls = urls if urls is not None else {
             "albi_intercites": "https://drive.google.com/uc?export=download&id=1sOx07CWnSI4uF-EbekytHxp7pM-efv1T",
             "bayonne_intercites" : "https://drive.google.com/uc?export=download&id=1NmcPWkFA0oyWByA0qzFfDCmeAwGK26-W",
             "beziers_intercites" : "https://drive.google.com/uc?export=download&id=1UWqKtoOyDCjLX1VJ6ZmAW-wIMXGkL-y7",
@@ -31,30 +91,161 @@ class DataLoader:
             "toulouse_tgv" : "https://drive.google.com/uc?export=download&id=14mtGuOHL9T5S5DTch7wnKAOAMkPj6k5F",
             "cerbere_intercites" : "https://drive.google.com/uc?export=download&id=17aNXrns0-ncTSs1BZ6EGYUy3TIZJD7Jd",
         }
+        if registry is None:
+            registry = REGISTRE_DEFAUT
+        if isinstance(registry, (str, os.PathLike)):
+            registry = charger_registre(registry)
+        self.cache = CacheDonnees(
+            cache_dir or pooch.os_cache("projet_sncf"),
+            registre=registry,
+            hors_ligne=offline
+        )
         self.data_dict = {}
 
-    def load_all_data(self):
+    @property
+    def fichier_dialectes(self):
+        """Cache JSON des formats de fichiers détectés, dans le dossier du cache."""
+        return os.path.join(self.cache.dossier, 'dialectes.json')
+
+    def _fetch(self, name, url):
+        """Télécharge (ou retrouve dans le cache) un fichier et renvoie son chemin local."""
+        return self.cache.recuperer(name, url)
+
+    def _fetch_and_read(self, name, url):
+        """Télécharge puis lit un fichier (tâche exécutée dans un thread)."""
+        return read_csv_file(self._fetch(name, url), famille(name), self.fichier_dialectes)
+
+    def load_all_data(self, parallel=False, max_workers=None, process_parse=False):
         """
         Télécharge et charge tous les fichiers CSV listés dans self.urls.
 
+        Parameters
+        ----------
+        parallel : bool
+            Si True, les téléchargements sont lancés en parallèle dans un
+            pool de threads : le temps de chargement dépend alors du fichier
+            le plus lent et non de la somme de tous les fichiers.
+        max_workers : int ou None
+            Nombre de threads (et de processus) utilisés en mode parallèle.
+            Par défaut min(nombre de fichiers, MAX_WORKERS_DEFAUT).
+        process_parse : bool
+            En mode parallèle, lit les CSV dans un pool de processus une fois
+            les téléchargements terminés (utile pour les gros fichiers).
+
         Returns
         -------
         dict
-            Dictionnaire nom -> pandas.DataFrame
+            Dictionnaire nom -> pandas.DataFrame, dans l'ordre de self.urls.
         """
-        for name, url in self.urls.items():
-            try:
-                filename = pooch.retrieve(url=url, known_hash=None)
-                self.data_dict[name] = pd.read_csv(
-                    filename,
-                    sep=';',
-                    encoding='utf-8',
-                    on_bad_lines='skip'
-                )
-            except Exception as e:
-                print(f"Erreur lecture du fichier {name}: {e}")
+        if parallel:
+            results = self._load_parallel(max_workers, process_parse)
+        else:
+            results = {}
+            for name, url in self.urls.items():
+                try:
+                    results[name] = self._fetch_and_read(name, url)
+                except Exception as e:
+                    print(f"Erreur lecture du fichier {name}: {e}")
+
+        # Même ordre de clés quel que soit le mode de chargement
+        for name in self.urls:
+            if name in results:
+                self.data_dict[name] = results[name]
         return self.data_dict
 
+    def _load_parallel(self, max_workers, process_parse):
+        """
+        Chargement concurrent : threads pour les entrées/sorties réseau,
+        processus (optionnels) pour la lecture des CSV.
+
+        Returns
+        -------
+        dict
+            Dictionnaire nom -> pandas.DataFrame (fichiers en erreur exclus).
+        """
+        workers = max_workers or min(len(self.urls), MAX_WORKERS_DEFAUT) or 1
+        task = self._fetch if process_parse else self._fetch_and_read
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(task, name, url): name for name, url in self.urls.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    fetched[name] = future.result()
+                except Exception as e:
+                    print(f"Erreur lecture du fichier {name}: {e}")
+
+        if not process_parse or not fetched:
+            return fetched
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as pool:
+            futures = {
+                pool.submit(read_csv_file, path, famille(name), self.fichier_dialectes): name
+                for name, path in fetched.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Erreur lecture du fichier {name}: {e}")
+        return results
+
+    def fetch_all(self, names=None, parallel=False, max_workers=None):
+        """
+        Télécharge (ou revalide) des fichiers sans les lire.
+
+        Parameters
+        ----------
+        names : list ou None
+            Noms des fichiers souhaités (par défaut tous ceux de self.urls).
+        parallel : bool
+            Si True, les téléchargements sont lancés dans un pool de threads.
+        max_workers : int ou None
+            Nombre de threads en mode parallèle.
+
+        Returns
+        -------
+        dict
+            Dictionnaire nom -> chemin local, dans l'ordre demandé.
+        """
+        names = list(self.urls) if names is None else list(names)
+        paths = {}
+        if parallel:
+            workers = max_workers or min(len(names), MAX_WORKERS_DEFAUT) or 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(self._fetch, name, self.urls[name]): name for name in names}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        paths[name] = future.result()
+                    except Exception as e:
+                        print(f"Erreur téléchargement du fichier {name}: {e}")
+        else:
+            for name in names:
+                try:
+                    paths[name] = self._fetch(name, self.urls[name])
+                except Exception as e:
+                    print(f"Erreur téléchargement du fichier {name}: {e}")
+        return {name: paths[name] for name in names if name in paths}
+
+    def get_hash(self, name):
+        """
+        Empreinte SHA-256 de la version en cache d'un fichier.
+
+        Parameters
+        ----------
+        name : str
+            Nom du fichier souhaité.
+
+        Returns
+        -------
+        str ou None
+        """
+        return self.cache.empreinte(name)
+
     def get_data(self, name):
         """
         Récupère un DataFrame spécifique par son nom.
@@ -0,0 +1,363 @@
+"""
+Entrepôt incrémental des données mensuelles, partitionné par famille, année et mois.
+
+Les fichiers SNCF sont mensuels (colonne 'Date' au format YYYY-MM) mais chaque
+exécution relisait tout l'historique. L'entrepôt :
+- ne relit un fichier source que si son empreinte SHA-256 a changé,
+- n'ajoute que les mois absents de l'entrepôt (ajout seul : un mois déjà
+  ingéré n'est jamais réécrit),
+- stocke chaque mois d'un fichier dans sa propre partition Parquet :
+
+      <dossier>/<famille>/annee=YYYY/mois=MM/<source>.parquet
+
+- met à jour les agrégats par relation en ajoutant seulement les lignes des
+  nouveaux mois, sans recalculer l'historique : ce sont les sommes partielles
+  de agregation_ponderee (trains, nombre de mois, régularité pondérée par les
+  trains ayant circulé), additionnées par combiner ; les taux sont calculés
+  par finaliser, comme pour resumer_relations et la base analytique.
+
+Le fichier des agrégats enregistre lui-même, dans ses métadonnées Parquet, les
+mois de chaque source qu'il contient ; il est remplacé de façon atomique avec
+cette liste. Si une exécution s'arrête après l'écriture des agrégats mais avant
+celle de l'état, les mois déjà agrégés ne sont donc pas ajoutés une seconde
+fois à la reprise (leurs partitions sont simplement réécrites à l'identique).
+
+Le coût d'une mise à jour dépend donc du nombre de mois ajoutés, pas de la
+profondeur de l'historique.
+
+Utilisation en ligne de commande :
+
+    python entrepot.py [--dossier DOSSIER] [--reconstruire]
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from agregation_ponderee import combiner, finaliser, sommes_partielles
+from data_loader import DataLoader, read_csv_file
+from nettoyage import PIPELINE_INTERCITES, concatener
+from schemas import famille
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow est optionnel : sans lui, pas d'entrepôt
+    pyarrow = None
+    pq = None
+
+# Familles stockées : clés de relation et colonnes renommées vers celles de la
+# table Intercités nettoyée, attendues par agregation_ponderee
+AGREGATS = {
+    'intercites': (['Départ', 'Arrivée'], {}),
+    'tgv': (
+        ['Gare de départ', "Gare d'arrivée"],
+        {'Nombre de circulations prévues': 'Trains_programmés',
+         'Nombre de trains annulés': 'Trains_annulés',
+         "Nombre de trains en retard à l'arrivée": 'Trains_retard'},
+    ),
+}
+
+COLONNES_TRAINS = ['Trains_programmés', 'Trains_circulés', 'Trains_annulés', 'Trains_retard']
+
+FICHIER_ETAT = 'etat.json'
+
+# Clé des métadonnées Parquet des agrégats : mois agrégés par source (JSON)
+CLE_MOIS_AGREGES = b'mois_agreges'
+
+
+def preparer(nom, df):
+    """
+    Met un fichier brut au format stocké dans l'entrepôt.
+
+    Les fichiers Intercités passent par PIPELINE_INTERCITES (colonnes
+    renommées, sens corrigé, nombres convertis) ; les autres sont stockés
+    tels quels avec une colonne 'Source'.
+    """
+    if famille(nom) == 'intercites':
+        return PIPELINE_INTERCITES(concatener({nom: df}))
+    return df.rename(columns=str.strip).assign(Source=nom)
+
+
+def agreger(df, famille_):
+    """
+    Sommes partielles par relation d'un lot de lignes.
+
+    Les fichiers TGV sont ramenés aux colonnes de la table Intercités
+    (trains ayant circulé = prévus - annulés, pas de taux de régularité)
+    avant agregation_ponderee.sommes_partielles. Les résultats de deux lots
+    s'additionnent par agregation_ponderee.combiner.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par relation : sommes des trains, 'nb_mois',
+        'regularite_ponderee' et 'poids_regularite'.
+    """
+    cles, colonnes = AGREGATS[famille_]
+    table = df.rename(columns=str.strip).rename(columns=colonnes)
+    if 'Trains_circulés' not in table.columns:
+        programmes = pd.to_numeric(table['Trains_programmés'], errors='coerce').fillna(0)
+        table['Trains_circulés'] = programmes - pd.to_numeric(table['Trains_annulés'], errors='coerce').fillna(0)
+    if 'Taux_régularité' not in table.columns:
+        table['Taux_régularité'] = float('nan')
+    return sommes_partielles(table, cles)
+
+
+def indicateurs(agregats, famille_):
+    """
+    Calcule les taux d'une table d'agrégats (agregation_ponderee.finaliser).
+
+    - Taux_annulation : annulés / programmés (%),
+    - Taux_retard : trains en retard / trains ayant circulé (%),
+    - Taux_régularité : taux mensuels pondérés par les trains ayant circulé,
+      pour les familles qui en publient un (Intercités).
+
+    Les colonnes de trains reprennent les noms du fichier de la famille.
+    """
+    _, colonnes = AGREGATS[famille_]
+    resultat = finaliser(agregats)
+    if colonnes:
+        resultat = resultat.drop(columns=[c for c in resultat.columns if c.startswith('Taux_régularité')])
+    return resultat.rename(columns={v: k for k, v in colonnes.items()})
+
+
+class Entrepot:
+    """
+    Entrepôt Parquet partitionné, alimenté par ajout des nouveaux mois.
+
+    Attributs
+    ---------
+    dossier : str
+        Dossier racine de l'entrepôt.
+    etat : dict
+        Par famille et par source : empreinte du dernier fichier ingéré et
+        liste des mois présents.
+    """
+
+    def __init__(self, dossier):
+        if pyarrow is None:
+            raise ImportError("pyarrow est nécessaire pour l'entrepôt Parquet")
+        self.dossier = str(dossier)
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = os.path.join(self.dossier, FICHIER_ETAT)
+        self.etat = {}
+        if os.path.exists(chemin):
+            with open(chemin, encoding='utf-8') as f:
+                self.etat = json.load(f)
+
+    def _sauver_etat(self):
+        """Écriture atomique de l'état, après les partitions et les agrégats."""
+        chemin = os.path.join(self.dossier, FICHIER_ETAT)
+        with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.etat, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(chemin + '.tmp', chemin)
+
+    def chemin_partition(self, famille_, periode, source):
+        """Fichier Parquet d'un mois ('YYYY-MM') d'une source."""
+        annee, mois = str(periode).split('-')
+        return os.path.join(self.dossier, famille_, f"annee={annee}", f"mois={mois}", f"{source}.parquet")
+
+    def _chemin_agregats(self, famille_):
+        return os.path.join(self.dossier, famille_, 'agregats.parquet')
+
+    def mois(self, famille_, source):
+        """Mois ('YYYY-MM') déjà présents pour une source."""
+        return set(self.etat.get(famille_, {}).get(source, {}).get('mois', []))
+
+    def ingerer(self, source, df, empreinte=None):
+        """
+        Ajoute à l'entrepôt les mois d'une source qui n'y sont pas encore.
+
+        Parameters
+        ----------
+        source : str
+            Nom du jeu de données (clé de DataLoader.urls).
+        df : pandas.DataFrame
+            Fichier lu par read_csv_file (colonne 'Date' en périodes mensuelles).
+        empreinte : str ou None
+            Empreinte SHA-256 du fichier, enregistrée dans l'état.
+
+        Returns
+        -------
+        list[str]
+            Mois ajoutés, triés.
+        """
+        famille_ = famille(source)
+        donnees = preparer(source, df)
+        periodes = donnees['Date'].astype(str)
+        deja = self.mois(famille_, source)
+        nouvelles = donnees[donnees['Date'].notna() & ~periodes.isin(deja)]
+        ajoutes = sorted(nouvelles['Date'].astype(str).unique())
+
+        for periode, lignes in nouvelles.groupby(nouvelles['Date'].astype(str), sort=True):
+            chemin = self.chemin_partition(famille_, periode, source)
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            lignes.to_parquet(chemin + '.tmp', index=False)
+            os.replace(chemin + '.tmp', chemin)
+
+        if ajoutes:
+            self._fusionner_agregats(famille_, source, nouvelles)
+
+        entree = self.etat.setdefault(famille_, {}).setdefault(source, {})
+        entree['mois'] = sorted(deja | set(ajoutes))
+        entree['sha256'] = empreinte
+        self._sauver_etat()
+        return ajoutes
+
+    def _lire_agregats(self, famille_):
+        """Agrégats enregistrés (ou None) et mois agrégés par source."""
+        chemin = self._chemin_agregats(famille_)
+        if not os.path.exists(chemin):
+            return None, {}
+        table = pq.read_table(chemin)
+        couverture = (table.schema.metadata or {}).get(CLE_MOIS_AGREGES)
+        couverture = json.loads(couverture) if couverture else {}
+        agregats = table.to_pandas()
+        if 'poids_regularite' not in agregats.columns:
+            # Agrégats d'une version antérieure (moyenne simple des taux) :
+            # recalculés à partir des partitions des mois qu'ils couvrent
+            lignes = self.lire(famille_)
+            if lignes.empty:
+                return None, {}
+            couverts = pd.Series(list(zip(lignes['Source'].astype(str), lignes['Date'].astype(str))),
+                                 index=lignes.index).isin(
+                {(source, periode) for source, mois in couverture.items() for periode in mois})
+            agregats = agreger(lignes[couverts], famille_)
+        return agregats, couverture
+
+    def _fusionner_agregats(self, famille_, source, nouvelles):
+        """
+        Ajoute aux agrégats enregistrés les lignes des mois qu'ils ne
+        contiennent pas encore pour la source.
+
+        Les agrégats et la liste de leurs mois sont écrits dans un même
+        fichier, remplacé de façon atomique.
+        """
+        cles = AGREGATS[famille_][0]
+        agregats, couverture = self._lire_agregats(famille_)
+        deja = set(couverture.get(source, []))
+        periodes = nouvelles['Date'].astype(str)
+        nouvelles = nouvelles[~periodes.isin(deja)]
+        if nouvelles.empty:
+            return
+
+        partiels = agreger(nouvelles, famille_)
+        if agregats is not None:
+            partiels = combiner([agregats, partiels], cles)
+        couverture[source] = sorted(deja | set(nouvelles['Date'].astype(str)))
+
+        table = pyarrow.Table.from_pandas(partiels, preserve_index=False)
+        metadonnees = dict(table.schema.metadata or {})
+        metadonnees[CLE_MOIS_AGREGES] = json.dumps(couverture, sort_keys=True).encode('utf-8')
+        chemin = self._chemin_agregats(famille_)
+        pq.write_table(table.replace_schema_metadata(metadonnees), chemin + '.tmp')
+        os.replace(chemin + '.tmp', chemin)
+
+    def agregats(self, famille_):
+        """
+        Agrégats par relation de toute l'histoire stockée, avec leurs taux.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Vide si rien n'a encore été ingéré pour la famille.
+        """
+        chemin = self._chemin_agregats(famille_)
+        if not os.path.exists(chemin):
+            return pd.DataFrame()
+        return indicateurs(pd.read_parquet(chemin), famille_)
+
+    def lire(self, famille_, debut=None, fin=None):
+        """
+        Lit les lignes stockées d'une famille, éventuellement sur une période.
+
+        Seules les partitions de la période sont ouvertes.
+
+        Parameters
+        ----------
+        famille_ : str
+        debut, fin : str ou None
+            Bornes incluses au format 'YYYY-MM'.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        frames = []
+        motif = os.path.join(self.dossier, famille_, 'annee=*', 'mois=*', '*.parquet')
+        for chemin in sorted(glob.glob(motif)):
+            mois_dir = os.path.basename(os.path.dirname(chemin))
+            annee_dir = os.path.basename(os.path.dirname(os.path.dirname(chemin)))
+            periode = f"{annee_dir.split('=')[1]}-{mois_dir.split('=')[1]}"
+            if (debut and periode < debut) or (fin and periode > fin):
+                continue
+            frames.append(pd.read_parquet(chemin))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def vider(self):
+        """Supprime tout le contenu de l'entrepôt."""
+        for nom in os.listdir(self.dossier):
+            chemin = os.path.join(self.dossier, nom)
+            if os.path.isdir(chemin):
+                shutil.rmtree(chemin)
+            else:
+                os.remove(chemin)
+        self.etat = {}
+
+
+def mettre_a_jour(loader=None, entrepot=None):
+    """
+    Ingère les nouveaux mois de tous les fichiers Intercités et TGV.
+
+    Les fichiers dont l'empreinte n'a pas changé depuis la dernière ingestion
+    ne sont pas relus.
+
+    Parameters
+    ----------
+    loader : DataLoader ou None
+    entrepot : Entrepot ou None
+        Par défaut l'entrepôt du dossier 'entrepot' du cache de données.
+
+    Returns
+    -------
+    dict
+        Dictionnaire source -> liste des mois ajoutés.
+    """
+    loader = loader or DataLoader()
+    entrepot = entrepot or Entrepot(os.path.join(loader.cache.dossier, 'entrepot'))
+    noms = [nom for nom in loader.urls if famille(nom) in AGREGATS and 'liste_gares' not in nom]
+    paths = loader.fetch_all(noms, parallel=True)
+
+    ajouts = {}
+    for nom, path in paths.items():
+        empreinte = loader.get_hash(nom)
+        connue = entrepot.etat.get(famille(nom), {}).get(nom, {}).get('sha256')
+        if empreinte is not None and empreinte == connue:
+            ajouts[nom] = []
+            continue
+        ajouts[nom] = entrepot.ingerer(nom, read_csv_file(path, famille(nom)), empreinte)
+    return ajouts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ajoute les nouveaux mois des fichiers SNCF à l'entrepôt.")
+    parser.add_argument('--dossier', default=None, help="dossier de l'entrepôt")
+    parser.add_argument('--reconstruire', action='store_true', help="vider l'entrepôt avant l'ingestion")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    loader = DataLoader()
+    entrepot = Entrepot(args.dossier or os.path.join(loader.cache.dossier, 'entrepot'))
+    if args.reconstruire:
+        entrepot.vider()
+    for nom, mois in mettre_a_jour(loader, entrepot).items():
+        print(f"  {nom:<30} {len(mois):4d} mois ajoutés" + (f" ({mois[0]} -> {mois[-1]})" if mois else ""))
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
@@ -0,0 +1,239 @@
+"""
+Dimension des gares : identifiant entier unique pour chaque gare.
+
+Les noms de gares sont écrits différemment d'un fichier à l'autre
+('TOULOUSE-MATABIAU', 'Toulouse Matabiau', 'NÎMES', 'Nimes', ...). La
+dimension associe chaque écriture brute à un identifiant entier et, quand la
+gare figure dans la table de référence (frequentation_gares_occitanie.csv),
+à son code UIC :
+
+1. clé normalisée (majuscules, sans accents ni ponctuation, 'ST' -> 'SAINT') :
+   recherche directe dans la table des clés précalculée ;
+2. sinon, nom de ville desservie par plusieurs gares de référence : gare
+   retenue explicitement (ALIAS_VILLES, 'MONTPELLIER' -> Montpellier
+   Saint-Roch) ;
+3. sinon, clé dont les mots commencent une seule clé de référence
+   ('LATOUR DE CAROL' -> 'LATOUR DE CAROL ENVEITG') ;
+4. sinon, rapprochement approché (difflib) avec les clés connues ;
+5. sinon, pour une écriture à plusieurs terminus ('ALBI/RODEZ',
+   'TOULOUSE-MATABIAU/CERBERE'), parties essayées dans l'ordre par les
+   étapes 1 à 4 et retenue la première qui est résolue, même si ce n'est
+   pas la première écrite ('RODEZ/ALBI' -> Albi quand Rodez est absente de
+   la référence). C'est une approximation : la desserte est rattachée à un
+   seul de ses terminus ;
+6. sinon, nouvelle gare sans code UIC.
+
+Le résultat de chaque écriture brute est mémorisé (alias) : une écriture
+n'est normalisée et rapprochée qu'une fois. Sur une colonne, seules les
+valeurs distinctes sont traitées, puis les identifiants sont diffusés aux
+lignes par leurs codes ; les jointures et regroupements peuvent ensuite se
+faire sur ces entiers (ou sur une catégorie aux libellés canoniques).
+
+La dimension (gares ajoutées et alias) peut être enregistrée en JSON pour que
+les identifiants restent les mêmes d'une exécution à l'autre.
+"""
+
+import difflib
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DOSSIER_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                           'data', 'base_de_donnees_version_csv'))
+FICHIER_REFERENCE = os.path.join(DOSSIER_CSV, 'frequentation_gares_occitanie.csv')
+
+# Abréviations développées dans les clés
+ABREVIATIONS = {'ST': 'SAINT', 'STE': 'SAINTE'}
+
+# Villes desservies par plusieurs gares de référence : gare du nom seul
+ALIAS_VILLES = {'MONTPELLIER': 'MONTPELLIER SAINT ROCH'}
+
+# Similarité minimale d'un rapprochement approché (difflib)
+SEUIL_SIMILARITE = 0.88
+
+MOTIF_SEPARATEURS = re.compile(r'[^A-Z0-9/]+')
+
+
+@lru_cache(maxsize=None)
+def normaliser(nom):
+    """
+    Clé normalisée d'un nom de gare.
+
+    >>> normaliser('Nîmes Pont-du-Gard')
+    'NIMES PONT DU GARD'
+    """
+    texte = unicodedata.normalize('NFKD', str(nom)).encode('ascii', 'ignore').decode('ascii').upper()
+    mots = MOTIF_SEPARATEURS.sub(' ', texte).split()
+    return ' '.join(ABREVIATIONS.get(mot, mot) for mot in mots)
+
+
+class DimensionGares:
+    """
+    Table des gares et correspondance écriture brute -> identifiant.
+
+    Attributs
+    ---------
+    table : pandas.DataFrame
+        Une ligne par gare, indexée par l'identifiant : 'nom' (libellé
+        canonique), 'code_uic' (Int64, manquant hors référence) et 'cle'.
+    alias : dict
+        Écriture brute -> identifiant, pour les écritures déjà rencontrées.
+    """
+
+    def __init__(self, reference=None):
+        self._noms = []
+        self._codes = []
+        self._par_cle = {}
+        self.alias = {}
+        if reference is not None:
+            for nom, code in zip(reference['Nom de la gare'], reference['Code UIC']):
+                self.ajouter(nom, code)
+
+    @classmethod
+    def depuis_reference(cls, chemin=FICHIER_REFERENCE):
+        """Dimension initialisée avec les gares (et codes UIC) d'un fichier de fréquentation."""
+        from lecteur_csv import lire_csv
+        return cls(lire_csv(chemin, 'frequentation'))
+
+    def __len__(self):
+        return len(self._noms)
+
+    @property
+    def table(self):
+        return pd.DataFrame({
+            'nom': pd.Series(self._noms, dtype=object),
+            'code_uic': pd.Series(self._codes, dtype='Int64'),
+            'cle': pd.Series([normaliser(nom) for nom in self._noms], dtype=object),
+        })
+
+    def ajouter(self, nom, code_uic=None):
+        """
+        Ajoute une gare (ou renvoie l'identifiant de sa clé si elle existe).
+
+        Returns
+        -------
+        int
+        """
+        cle = normaliser(nom)
+        if cle in self._par_cle:
+            return self._par_cle[cle]
+        identifiant = len(self._noms)
+        self._noms.append(str(nom).strip())
+        self._codes.append(int(code_uic) if pd.notna(code_uic) else pd.NA)
+        self._par_cle[cle] = identifiant
+        return identifiant
+
+    def _resoudre(self, cle):
+        """Identifiant d'une clé (directe, alias de ville, puis rapprochée), ou None."""
+        identifiant = self._par_cle.get(cle)
+        if identifiant is None:
+            identifiant = self._par_cle.get(ALIAS_VILLES.get(cle))
+        if identifiant is None:
+            identifiant = self._rapprocher(cle)
+        return identifiant
+
+    def _rapprocher(self, cle):
+        """Identifiant d'une clé inconnue (préfixe unique, puis rapprochement approché), ou None."""
+        prefixe = cle + ' '
+        candidats = [c for c in self._par_cle if c.startswith(prefixe)]
+        if len(candidats) == 1:
+            return self._par_cle[candidats[0]]
+        proches = difflib.get_close_matches(cle, list(self._par_cle), n=1, cutoff=SEUIL_SIMILARITE)
+        return self._par_cle[proches[0]] if proches else None
+
+    def identifiant(self, nom):
+        """
+        Identifiant d'une écriture brute ; une gare inconnue est ajoutée.
+
+        Returns
+        -------
+        int
+        """
+        if nom in self.alias:
+            return self.alias[nom]
+        cle = normaliser(nom)
+        identifiant = self._resoudre(cle)
+        if identifiant is None and '/' in cle:
+            parties = (self._resoudre(partie) for partie in cle.split('/') if partie)
+            identifiant = next((i for i in parties if i is not None), None)
+        if identifiant is None:
+            identifiant = self.ajouter(nom)
+        self.alias[nom] = identifiant
+        return identifiant
+
+    def identifier(self, serie):
+        """
+        Identifiants d'une colonne de noms de gares.
+
+        Seules les valeurs distinctes sont résolues.
+
+        Parameters
+        ----------
+        serie : pandas.Series
+
+        Returns
+        -------
+        numpy.ndarray
+            Identifiants int32 ; -1 pour les valeurs manquantes.
+        """
+        codes, valeurs = pd.factorize(serie.astype(object), sort=False)
+        correspondance = np.array([self.identifiant(v) for v in valeurs] + [-1], dtype='int32')
+        # Code -1 de factorize (valeur manquante) -> dernier élément (-1)
+        return correspondance[codes]
+
+    def categories(self, serie):
+        """
+        Colonne catégorielle aux libellés canoniques (codes = identifiants).
+
+        Returns
+        -------
+        pandas.Series
+        """
+        identifiants = self.identifier(serie)
+        return pd.Series(pd.Categorical.from_codes(identifiants, categories=self._noms),
+                         index=serie.index, name=serie.name)
+
+    def encoder(self, df, colonnes):
+        """
+        Ajoute une colonne '<colonne>_id' (int32) pour chaque colonne de gares.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Copie de df.
+        """
+        return df.assign(**{f'{col}_id': self.identifier(df[col]) for col in colonnes if col in df.columns})
+
+    def code_uic(self, identifiants):
+        """Codes UIC (Int64, manquants hors référence) d'un tableau d'identifiants."""
+        codes = pd.array(self._codes + [pd.NA], dtype='Int64')
+        # Identifiant -1 (valeur manquante) -> dernier élément (manquant)
+        return pd.Series(codes[np.asarray(identifiants)])
+
+    def sauver(self, chemin):
+        """Enregistre les gares et les alias en JSON (écriture atomique)."""
+        contenu = {
+            'gares': [[nom, None if pd.isna(code) else int(code)]
+                      for nom, code in zip(self._noms, self._codes)],
+            'alias': self.alias,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(contenu, f, ensure_ascii=False, indent=2)
+        os.replace(chemin + '.tmp', chemin)
+
+    @classmethod
+    def charger(cls, chemin):
+        """Dimension enregistrée par sauver (mêmes identifiants)."""
+        with open(chemin, encoding='utf-8') as f:
+            contenu = json.load(f)
+        dimension = cls()
+        for nom, code in contenu['gares']:
+            dimension.ajouter(nom, code)
+        dimension.alias = {nom: int(i) for nom, i in contenu['alias'].items()}
+        return dimension
@@ -0,0 +1,20 @@
+"""
+Configuration gunicorn du tableau de bord (voir wsgi_dashboard.py).
+
+Variables d'environnement :
+- DASHBOARD_BIND : adresse d'écoute (défaut 0.0.0.0:8050),
+- DASHBOARD_WORKERS : nombre de workers (défaut 2 × CPU + 1).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Chargement des données dans le maître, partagé par fork entre les workers
+preload_app = True
+
+# Les callbacks sont courts (figures en cache) : des threads suffisent par worker
+threads = 4
+timeout = 60
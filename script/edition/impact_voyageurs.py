@@ -0,0 +1,273 @@
+"""
+Impact des retards pondéré par la fréquentation des gares.
+
+frequentation_gares_occitanie.csv donne, pour chaque gare, le nombre annuel
+de voyageurs dans des colonnes 'Total Voyageurs <année>'. Ce module :
+
+- met ces colonnes au format long une seule fois (une ligne par gare et par
+  année) ;
+- agrège les données Intercités par gare et par année (trains au départ ou à
+  l'arrivée de la gare, taux pondérés de agregation_ponderee) ;
+- joint les deux tables sur l'identifiant de gare (module gares) et l'année,
+  puis calcule en une passe vectorielle, pour toutes les gares et toutes les
+  années, les voyageurs concernés par les retards et les annulations ;
+- met la table en cache au format Parquet, avec la clé des fichiers sources
+  et du code qui la calcule (voir snapshot_intercites).
+
+Le fichier de fréquentation est récupéré par le cache de DataLoader comme les
+fichiers Intercités (empreinte du registre, mode hors ligne) : son URL est
+celle de loader.urls['frequentation_gares_occitanie'] si elle est donnée,
+sinon la copie du dépôt.
+
+Les voyageurs concernés sont une estimation : la fréquentation compte tous
+les voyageurs de la gare (TER, TGV, Intercités), répartis uniformément sur
+les trains ; elle sert à pondérer les gares entre elles, pas à compter les
+voyageurs d'un train donné.
+
+Utilisation en ligne de commande :
+
+    python impact_voyageurs.py [--force]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agregation_ponderee import combiner, finaliser, sommes_partielles
+from data_loader import DataLoader
+from gares import FICHIER_REFERENCE, DimensionGares
+from lecteur_csv import lire_csv
+from snapshot_intercites import (DOSSIER_EDITION, FICHIERS_PIPELINE, charger_intercites, cle_sources,
+                                 ecrire_snapshot, empreintes_code, lire_cle, noms_intercites, pq)
+
+PREFIXE_VOYAGEURS = 'Total Voyageurs '
+CLES = ['gare_id', 'Annee']
+
+# Fichier de fréquentation : nom dans le cache et URL par défaut (copie du dépôt)
+NOM_FREQUENTATION = 'frequentation_gares_occitanie'
+URL_FREQUENTATION = Path(FICHIER_REFERENCE).resolve().as_uri()
+
+# Code dont dépend la table en cache (nettoyage, gares, agrégations et impact)
+FICHIERS_CODE = FICHIERS_PIPELINE + [os.path.join(DOSSIER_EDITION, nom) for nom in
+                                     ['gares.py', 'agregation_ponderee.py', 'impact_voyageurs.py']]
+
+# Taux (%) -> voyageurs concernés
+IMPACTS = {
+    'Taux_retard': 'voyageurs_retardes',
+    'Taux_annulation': 'voyageurs_annulations',
+}
+
+
+def frequentation_longue(df, dimension):
+    """
+    Fréquentation au format long : une ligne par gare et par année.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Fichier de fréquentation (colonnes 'Total Voyageurs <année>').
+    dimension : DimensionGares
+        Dimension des gares, pour l'identifiant de chaque gare.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Colonnes 'gare_id', 'Annee' et 'voyageurs' ; les années sans
+        fréquentation sont retirées.
+    """
+    colonnes = [col for col in df.columns
+                if col.startswith(PREFIXE_VOYAGEURS) and col[len(PREFIXE_VOYAGEURS):].isdigit()]
+    annees = np.array([int(col[len(PREFIXE_VOYAGEURS):]) for col in colonnes], dtype='int64')
+    identifiants = dimension.identifier(df['Nom de la gare'])
+    valeurs = df[colonnes].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+
+    # Une ligne par (gare, année), dans l'ordre des lignes puis des colonnes
+    longue = pd.DataFrame({
+        'gare_id': np.repeat(identifiants, len(colonnes)),
+        'Annee': np.tile(annees, len(df)),
+        'voyageurs': valeurs.ravel(),
+    })
+    return longue[longue['voyageurs'].notna()].reset_index(drop=True)
+
+
+def retards_par_gare(df, dimension, niveau=0.95):
+    """
+    Taux pondérés par gare et par année.
+
+    Un train compte pour sa gare de départ et pour sa gare d'arrivée ; les
+    différentes écritures d'une même gare sont regroupées par la dimension.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table Intercités nettoyée (PIPELINE_INTERCITES).
+    dimension : DimensionGares
+    niveau : float
+        Niveau de confiance des intervalles.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par ('gare_id', 'Annee') : voir agregation_ponderee.finaliser.
+    """
+    partielles = []
+    for colonne in ['Départ', 'Arrivée']:
+        sommes = sommes_partielles(df, [colonne, 'Annee'])
+        sommes.insert(0, 'gare_id', dimension.identifier(sommes.pop(colonne)))
+        partielles.append(sommes)
+    sommes = combiner(partielles, CLES)
+    return finaliser(sommes[sommes['gare_id'] >= 0], niveau)
+
+
+def calculer(df, frequentation, dimension, niveau=0.95):
+    """
+    Jointure fréquentation x retards et indicateurs d'impact.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table Intercités nettoyée.
+    frequentation : pandas.DataFrame
+        Fichier de fréquentation brut.
+    dimension : DimensionGares
+    niveau : float
+        Niveau de confiance des intervalles.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par gare et par année présentes dans les deux tables :
+        'gare_id', 'Gare' (libellé canonique), 'Code UIC', 'Annee',
+        'voyageurs', sommes de trains et taux pondérés, puis pour chaque taux
+        de IMPACTS les voyageurs concernés et leur intervalle
+        ('voyageurs_retardes', '_bas', '_haut', ...) et 'part_voyageurs' (%
+        des voyageurs de l'année, parmi les gares de la table).
+    """
+    longue = frequentation_longue(frequentation, dimension)
+    retards = retards_par_gare(df, dimension, niveau)
+    impact = longue.merge(retards.astype({'gare_id': 'int32', 'Annee': 'int64'}), on=CLES, how='inner')
+
+    voyageurs = impact['voyageurs'].to_numpy()
+    for taux, nom in IMPACTS.items():
+        for suffixe in ['', '_bas', '_haut']:
+            impact[nom + suffixe] = voyageurs * impact[taux + suffixe].to_numpy() / 100
+    impact['part_voyageurs'] = impact['voyageurs'] / impact.groupby('Annee')['voyageurs'].transform('sum') * 100
+
+    impact.insert(1, 'Gare', dimension.table['nom'].to_numpy()[impact['gare_id'].to_numpy()])
+    impact.insert(2, 'Code UIC', dimension.code_uic(impact['gare_id']))
+    return impact.sort_values(CLES, ignore_index=True)
+
+
+def moyennes_ponderees(impact, cles=('Annee',)):
+    """
+    Taux moyens pondérés par la fréquentation (une gare très fréquentée
+    compte davantage qu'une petite gare).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par groupe : 'voyageurs', voyageurs concernés (sommes) et
+        taux de IMPACTS pondérés par les voyageurs (%).
+    """
+    colonnes = ['voyageurs'] + list(IMPACTS.values())
+    sommes = impact.groupby(list(cles), sort=True)[colonnes].sum()
+    for taux, nom in IMPACTS.items():
+        sommes[taux] = sommes[nom] / sommes['voyageurs'].where(sommes['voyageurs'] > 0) * 100
+    return sommes.reset_index()
+
+
+def chemin_defaut(loader):
+    """Emplacement de la table en cache, à côté du cache des données."""
+    return os.path.join(loader.cache.dossier, 'snapshots', 'impact_voyageurs.parquet')
+
+
+def recuperer_frequentation(loader, reference=None):
+    """
+    Chemin local du fichier de fréquentation, récupéré par le cache de loader.
+
+    Parameters
+    ----------
+    loader : DataLoader
+    reference : str ou None
+        Fichier local remplaçant l'URL de loader.urls (ou la copie du dépôt).
+
+    Returns
+    -------
+    str
+
+    Raises
+    ------
+    FileNotFoundError
+        En mode hors ligne, si le fichier n'est pas en cache.
+    ValueError
+        Si le contenu ne correspond pas à l'empreinte du registre.
+    """
+    if reference is not None:
+        url = Path(reference).resolve().as_uri()
+    else:
+        url = loader.urls.get(NOM_FREQUENTATION, URL_FREQUENTATION)
+    return loader.cache.recuperer(NOM_FREQUENTATION, url)
+
+
+def charger_impact(loader=None, chemin=None, reference=None, force=False):
+    """
+    Renvoie la table d'impact, depuis le cache si elle est à jour.
+
+    La clé du cache couvre les fichiers Intercités, le fichier de
+    fréquentation et le code (FICHIERS_CODE) ; le cache n'est pas réécrit si
+    un fichier Intercités n'a pas été récupéré.
+
+    Parameters
+    ----------
+    loader : DataLoader ou None
+    chemin : str ou None
+        Fichier Parquet de la table (par défaut dans le dossier du cache).
+    reference : str ou None
+        Fichier de fréquentation local (voir recuperer_frequentation).
+    force : bool
+        Si True, recalcule la table même si elle est à jour.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Voir calculer.
+    """
+    loader = loader or DataLoader()
+    chemin = chemin or chemin_defaut(loader)
+
+    noms = noms_intercites(loader)
+    paths = loader.fetch_all(noms, parallel=True)
+    reference = recuperer_frequentation(loader, reference)
+    empreintes = {nom: loader.get_hash(nom) for nom in [*paths, NOM_FREQUENTATION]}
+    cle = cle_sources({**empreintes, **empreintes_code(FICHIERS_CODE)})
+
+    if not force and lire_cle(chemin) == cle:
+        return pd.read_parquet(chemin)
+
+    frequentation = lire_csv(reference, 'frequentation')
+    impact = calculer(charger_intercites(loader), frequentation, DimensionGares(frequentation))
+    manquants = [nom for nom in noms if nom not in paths]
+    if manquants:
+        print(f"Sources manquantes ({', '.join(manquants)}) : table d'impact non mise en cache")
+    elif pq is None:
+        print("pyarrow non installé : table d'impact non mise en cache")
+    else:
+        ecrire_snapshot(impact, chemin, cle)
+    return impact
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calcule et met en cache l'impact des retards sur les voyageurs.")
+    parser.add_argument('--force', action='store_true', help="recalculer même si le cache est à jour")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    impact = charger_impact(force=args.force)
+    colonnes = ['Gare', 'Annee', 'voyageurs', 'Taux_retard', 'voyageurs_retardes', 'voyageurs_annulations']
+    print(impact[colonnes].round(1).to_string())
+    print(moyennes_ponderees(impact).round(1).to_string())
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
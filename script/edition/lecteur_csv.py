@@ -0,0 +1,295 @@
+"""
+Lecture des CSV SNCF avec détection du format.
+
+Les fichiers ne suivent pas tous la même convention : la plupart utilisent
+';' avec un BOM UTF-8 et des noms de colonnes en clair, mais certains (ex:
+liste_gares_occitanie.csv) utilisent ',', des guillemets et des noms de
+colonnes à points ('Nombre.de.trains.programmés'). Au lieu de lire le fichier
+avec ';' puis de le relire avec un autre séparateur en cas d'échec, ce module :
+
+- détecte le dialecte à partir des premiers Ko du fichier : BOM, encodage,
+  séparateur, guillemets, noms de colonnes bruts et convention de nommage
+  ('espaces' ou 'points') ;
+- garde le dialecte en mémoire (et optionnellement dans un fichier JSON)
+  sous l'empreinte SHA-256 du fichier : un fichier inchangé n'est pas
+  réanalysé ;
+- associe les noms de colonnes bruts aux noms canoniques du schéma de la
+  famille (espaces, apostrophes et points ignorés) ;
+- lit le fichier une seule fois, puis applique le schéma de types colonne
+  par colonne : une valeur non conforme devient NaN sans relecture.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+from cache_donnees import sha256_fichier
+from nettoyage import _vers_nombres
+from schemas import COLONNES_PERIODES, SCHEMAS, convertir_periodes
+
+# Taille de l'échantillon analysé en début de fichier
+TAILLE_ECHANTILLON = 64 * 1024
+
+SEPARATEURS = ';,\t|'
+SEPARATEUR_DEFAUT = ';'
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Dialectes détectés, par empreinte de fichier (partagés par les threads)
+_DIALECTES = {}
+_VERROU = threading.Lock()
+
+MOTIF_EMPREINTE = re.compile(r'^[0-9a-f]{64}$')
+MOTIF_NON_ALPHANUMERIQUE = re.compile(r'[\W_]+')
+
+
+def empreinte(chemin):
+    """
+    Empreinte SHA-256 d'un fichier.
+
+    Les fichiers du cache de données sont déjà nommés par leur empreinte
+    (objets/<sha256>) : elle est alors reprise sans relire le fichier.
+    """
+    nom = os.path.basename(chemin)
+    if MOTIF_EMPREINTE.match(nom):
+        return nom
+    return sha256_fichier(chemin)
+
+
+def cle_colonne(nom):
+    """Clé de comparaison d'un nom de colonne (minuscules, sans ponctuation ni espaces)."""
+    return MOTIF_NON_ALPHANUMERIQUE.sub('', str(nom).lower())
+
+
+def analyser(echantillon):
+    """
+    Détecte le dialecte d'un début de fichier.
+
+    Parameters
+    ----------
+    echantillon : bytes
+        Premiers octets du fichier.
+
+    Returns
+    -------
+    dict
+        'encoding', 'sep', 'quotechar', 'colonnes' (noms bruts de l'en-tête)
+        et 'convention' ('points' si les noms sont séparés par des points,
+        'espaces' sinon).
+    """
+    encoding = next((enc for bom, enc in BOMS if echantillon.startswith(bom)), None)
+    if encoding is None:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(echantillon)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'cp1252'
+    texte = codecs.getincrementaldecoder(encoding)(errors='replace').decode(echantillon)
+
+    # Seules les lignes complètes sont analysées
+    lignes = texte.splitlines(keepends=True)
+    if len(lignes) > 1 and not lignes[-1].endswith(('\n', '\r')):
+        lignes = lignes[:-1]
+    complet = ''.join(lignes)
+
+    try:
+        dialecte = csv.Sniffer().sniff(complet, delimiters=SEPARATEURS)
+        sep, quotechar = dialecte.delimiter, dialecte.quotechar or '"'
+    except csv.Error:
+        premiere = lignes[0] if lignes else ''
+        sep = max(SEPARATEURS, key=premiere.count) if premiere else SEPARATEUR_DEFAUT
+        sep = sep if premiere.count(sep) else SEPARATEUR_DEFAUT
+        quotechar = '"'
+
+    en_tete = next(csv.reader(io.StringIO(complet), delimiter=sep, quotechar=quotechar), [])
+    colonnes = list(en_tete)
+    convention = 'points' if any('.' in c and ' ' not in c.strip() for c in colonnes) else 'espaces'
+    return {'encoding': encoding, 'sep': sep, 'quotechar': quotechar,
+            'colonnes': colonnes, 'convention': convention}
+
+
+def _lire_cache(fichier_cache):
+    if not fichier_cache or not os.path.exists(fichier_cache):
+        return {}
+    try:
+        with open(fichier_cache, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ecrire_cache(fichier_cache, cle, dialecte):
+    """Ajoute un dialecte au fichier JSON (écriture atomique)."""
+    contenu = _lire_cache(fichier_cache)
+    contenu[cle] = dialecte
+    os.makedirs(os.path.dirname(os.path.abspath(fichier_cache)), exist_ok=True)
+    temporaire = f"{fichier_cache}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(contenu, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporaire, fichier_cache)
+
+
+def detecter_dialecte(chemin, fichier_cache=None):
+    """
+    Dialecte d'un fichier, depuis le cache si son empreinte y figure.
+
+    Parameters
+    ----------
+    chemin : str
+        Fichier CSV.
+    fichier_cache : str ou None
+        Fichier JSON empreinte -> dialecte, partagé entre les exécutions
+        (par défaut, cache en mémoire seulement).
+
+    Returns
+    -------
+    dict
+        Voir analyser.
+    """
+    cle = empreinte(chemin)
+    with _VERROU:
+        if cle in _DIALECTES:
+            return _DIALECTES[cle]
+    dialecte = _lire_cache(fichier_cache).get(cle)
+    if dialecte is None:
+        with open(chemin, 'rb') as f:
+            dialecte = analyser(f.read(TAILLE_ECHANTILLON))
+        if fichier_cache:
+            with _VERROU:
+                _ecrire_cache(fichier_cache, cle, dialecte)
+    with _VERROU:
+        _DIALECTES[cle] = dialecte
+    return dialecte
+
+
+def noms_canoniques(colonnes, family=None):
+    """
+    Association nom brut -> nom canonique du schéma de la famille.
+
+    Un nom brut est associé au nom du schéma (ou 'Date') ayant la même clé
+    (voir cle_colonne) ; les noms sans correspondance sont seulement
+    débarrassés de leurs espaces de début et de fin.
+
+    Returns
+    -------
+    dict
+        Seulement les noms qui changent.
+    """
+    canoniques = list(SCHEMAS.get(family, {})) + list(COLONNES_PERIODES)
+    par_cle = {cle_colonne(nom): nom for nom in canoniques}
+    noms = {}
+    for brut in colonnes:
+        nom = par_cle.get(cle_colonne(brut), str(brut).strip())
+        if nom != brut:
+            noms[brut] = nom
+    return noms
+
+
+def types_a_la_lecture(colonnes, noms, schema):
+    """
+    Types du schéma déclarables dès la lecture, sur les noms bruts.
+
+    Seuls les types non numériques (libellés) sont déclarés : leur
+    conversion ne peut pas échouer. Les colonnes numériques sont lues avec
+    les types devinés par pandas puis converties par appliquer_schema.
+    """
+    types = {}
+    for brut in colonnes:
+        type_ = schema.get(noms.get(brut, brut))
+        if type_ is not None and not pd.api.types.is_numeric_dtype(type_):
+            types[brut] = type_
+    return types
+
+
+def appliquer_schema(df, schema):
+    """
+    Convertit les colonnes de df aux types du schéma, une par une.
+
+    Une colonne qui ne respecte pas son type (ex: '1 234' ou '98,5 %' dans
+    une colonne numérique) passe par la conversion de nettoyage
+    (_vers_nombres) : seules ses valeurs invalides deviennent NaN, sans
+    relire le fichier. Leur nombre par colonne est affiché et enregistré
+    dans df.attrs['valeurs_invalides'].
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table aux noms canoniques (modifiée en place).
+    schema : dict
+        Nom de colonne -> type (voir schemas.SCHEMAS).
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    invalides = {}
+    for col, type_ in schema.items():
+        if col not in df.columns or df[col].dtype == type_:
+            continue
+        try:
+            df[col] = df[col].astype(type_)
+            continue
+        except (ValueError, TypeError):
+            pass
+        serie = df[col]
+        nombres = _vers_nombres(serie)
+        n = int((nombres.isna() & serie.notna()).sum())
+        if n:
+            invalides[col] = n
+        try:
+            df[col] = nombres.astype(type_)
+        except (ValueError, TypeError):
+            # Valeurs non entières dans une colonne entière : gardées en réels
+            df[col] = nombres
+
+    if invalides:
+        print(f"Valeurs non conformes au schéma remplacées par NaN : {invalides}")
+    df.attrs['valeurs_invalides'] = invalides
+    return df
+
+
+def lire_csv(chemin, family=None, fichier_cache=None):
+    """
+    Lit un fichier CSV SNCF en une seule analyse, selon son dialecte.
+
+    Si une famille est donnée, son schéma (module schemas) est appliqué :
+    les libellés dès la lecture, puis les colonnes numériques une par une
+    (appliquer_schema). Une valeur non conforme devient NaN sans que le
+    fichier soit relu.
+
+    Parameters
+    ----------
+    chemin : str
+        Chemin local du fichier.
+    family : str ou None
+        Famille du fichier ('intercites', 'tgv', ...), voir schemas.famille.
+    fichier_cache : str ou None
+        Cache JSON des dialectes (voir detecter_dialecte).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Colonnes aux noms canoniques.
+    """
+    dialecte = detecter_dialecte(chemin, fichier_cache)
+    options = dict(sep=dialecte['sep'], quotechar=dialecte['quotechar'],
+                   encoding=dialecte['encoding'], on_bad_lines='skip')
+    noms = noms_canoniques(dialecte['colonnes'], family)
+    schema = SCHEMAS.get(family)
+    if schema is None:
+        return pd.read_csv(chemin, **options).rename(columns=noms)
+
+    # Libellés déclarés sur les noms bruts : le fichier n'est lu qu'une fois
+    types = types_a_la_lecture(dialecte['colonnes'], noms, schema)
+    df = pd.read_csv(chemin, dtype=types, **options).rename(columns=noms)
+    return convertir_periodes(appliquer_schema(df, schema))
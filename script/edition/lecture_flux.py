@@ -0,0 +1,175 @@
+"""
+Lecture par lots du fichier Intercités national (retard_france_intercites.csv).
+
+Le fichier national grossit chaque mois : au lieu de le lire en entier, il
+est lu par lots de taille_lot lignes. Chaque lot passe par le nettoyage
+(mêmes étapes que PIPELINE_INTERCITES) puis par sommes_partielles, et seules
+les sommes courantes par groupe sont conservées entre deux lots.
+
+La mémoire utilisée est donc bornée par un lot de lignes plus une ligne de
+sommes par groupe (relation, mois, ...), quelle que soit la longueur de
+l'historique. Le résultat final est celui de agreger_ponderes sur le fichier
+entier.
+
+Le sens Départ/Arrivée (REGLES_SENS) se décide sur le fichier entier : pour
+les fichiers concernés, une première lecture par lots de la seule colonne
+testée décide de l'inversion, appliquée ensuite à tous les lots.
+
+Le format du fichier (séparateur, encodage, noms de colonnes) est détecté
+une seule fois par lecteur_csv ; les valeurs non conformes au schéma sont
+converties dans chaque lot, sans relire le fichier.
+
+Utilisation :
+
+    python lecture_flux.py [fichier.csv] [--taille-lot N] [--cles Départ Arrivée]
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from agregation_ponderee import RELATION, combiner, finaliser, sommes_partielles
+from nettoyage import (REGLES_SENS, Pipeline, concatener, convertir_numeriques,
+                       inverser_sens, normaliser_colonnes, valider)
+from lecteur_csv import (appliquer_schema, cle_colonne, detecter_dialecte,
+                         noms_canoniques, types_a_la_lecture)
+from schemas import SCHEMAS, convertir_periodes
+
+DOSSIER_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                           'data', 'base_de_donnees_version_csv'))
+FICHIER_NATIONAL = os.path.join(DOSSIER_CSV, 'retard_france_intercites.csv')
+
+TAILLE_LOT = 50_000
+
+# PIPELINE_INTERCITES sans corriger_sens, décidé sur le fichier entier
+PIPELINE_LOT = Pipeline([normaliser_colonnes, convertir_numeriques, valider])
+
+
+def lire_par_lots(chemin, famille_=None, taille_lot=TAILLE_LOT, schema=True, **options):
+    """
+    Lit un fichier CSV SNCF par lots de lignes.
+
+    Le dialecte (séparateur, encodage, guillemets) et les noms canoniques
+    des colonnes sont déterminés une seule fois par lecteur_csv ; chaque lot
+    est renommé puis converti colonne par colonne (appliquer_schema), de
+    sorte qu'une valeur invalide ne fait pas relire le fichier.
+
+    Parameters
+    ----------
+    chemin : str
+        Fichier CSV.
+    famille_ : str ou None
+        Famille du fichier : son schéma (module schemas) est appliqué à
+        chaque lot si schema vaut True.
+    taille_lot : int
+        Nombre de lignes par lot.
+    schema : bool
+        Si False, les types sont devinés par pandas.
+    **options
+        Options supplémentaires de pandas.read_csv (ex: usecols).
+
+    Yields
+    ------
+    pandas.DataFrame
+        Lots aux noms canoniques.
+    """
+    dialecte = detecter_dialecte(chemin)
+    noms = noms_canoniques(dialecte['colonnes'], famille_)
+    types = SCHEMAS.get(famille_) if schema else None
+    if types:
+        options.setdefault('dtype', types_a_la_lecture(dialecte['colonnes'], noms, types))
+    with pd.read_csv(chemin, sep=dialecte['sep'], quotechar=dialecte['quotechar'],
+                     encoding=dialecte['encoding'], on_bad_lines='skip',
+                     chunksize=taille_lot, **options) as lecteur:
+        for lot in lecteur:
+            lot = lot.rename(columns=noms)
+            yield convertir_periodes(appliquer_schema(lot, types)) if types else lot
+
+
+def sens_a_inverser(chemin, nom, taille_lot=TAILLE_LOT):
+    """
+    Applique la règle REGLES_SENS d'un fichier sur toutes ses lignes.
+
+    Returns
+    -------
+    bool
+        True si Départ et Arrivée doivent être inversés dans tout le fichier.
+    """
+    if nom not in REGLES_SENS:
+        return False
+    colonne, motif = REGLES_SENS[nom]
+    for lot in lire_par_lots(chemin, taille_lot=taille_lot, schema=False, dtype=str,
+                             usecols=lambda c: cle_colonne(c) == cle_colonne(colonne)):
+        if lot.iloc[:, 0].str.contains(motif, case=False, na=False).any():
+            print(f"Correction inversion Départ/Arrivée pour {nom}")
+            return True
+    return False
+
+
+def _agreger_lots(chemin, nom, cles, taille_lot, inverser):
+    courant = None
+    nb_lots = 0
+    for lot in lire_par_lots(chemin, 'intercites', taille_lot):
+        propre = PIPELINE_LOT(concatener({nom: lot}))
+        if inverser:
+            propre = inverser_sens(propre, pd.Series(True, index=propre.index))
+        partiel = sommes_partielles(propre, cles)
+        courant = partiel if courant is None else combiner([courant, partiel], cles)
+        nb_lots += 1
+    return courant, nb_lots
+
+
+def agreger_flux(chemin=FICHIER_NATIONAL, nom='france_intercites', cles=RELATION,
+                 taille_lot=TAILLE_LOT, niveau=0.95):
+    """
+    Agrège un fichier Intercités lot par lot, en mémoire bornée.
+
+    Parameters
+    ----------
+    chemin : str
+        Fichier CSV Intercités brut.
+    nom : str
+        Nom du jeu de données (colonne 'Source', règles REGLES_SENS).
+    cles : list
+        Clés de regroupement (voir agregation_ponderee.sommes_partielles).
+    taille_lot : int
+        Nombre de lignes lues par lot.
+    niveau : float
+        Niveau de confiance des intervalles.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Même résultat que agreger_ponderes sur la table nettoyée du fichier
+        entier ; le nombre de lots lus est dans attrs['lots'].
+
+    Raises
+    ------
+    ValueError
+        Si le fichier ne contient aucune ligne valide.
+    """
+    cles = list(cles)
+    inverser = sens_a_inverser(chemin, nom, taille_lot)
+    courant, nb_lots = _agreger_lots(chemin, nom, cles, taille_lot, inverser)
+    if courant is None:
+        raise ValueError(f"Aucune ligne lue dans {chemin}")
+
+    resultat = finaliser(courant, niveau)
+    resultat.attrs['lots'] = nb_lots
+    return resultat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Agrège le fichier Intercités national par lots.")
+    parser.add_argument('fichier', nargs='?', default=FICHIER_NATIONAL, help="fichier CSV")
+    parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help="lignes lues par lot")
+    parser.add_argument('--cles', nargs='+', default=RELATION, help="clés de regroupement")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    resultat = agreger_flux(args.fichier, cles=args.cles, taille_lot=args.taille_lot)
+    print(resultat.to_string())
+    print(f"{len(resultat)} groupes, {resultat.attrs['lots']} lots lus")
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
@@ -0,0 +1,310 @@
+"""
+Pipeline de nettoyage des données Intercités.
+
+Ce module est la seule implémentation des règles de nettoyage partagées par
+tous les scripts. Il expose des étapes vectorisées, composables dans un
+objet Pipeline qui chronomètre chacune d'elles :
+
+    normaliser_colonnes -> corriger_sens -> convertir_numeriques -> valider
+
+ainsi que des étapes complémentaires pour les tableaux de bord
+(ajouter_ville, ajouter_dates).
+"""
+
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+# Mapping des colonnes
+MAPPING_COLONNES = {
+    'Date': 'Date',
+    'Départ': 'Départ',
+    'Arrivée': 'Arrivée',
+    'Nombre de trains programmés': 'Trains_programmés',
+    'Nombre de trains ayant circulé': 'Trains_circulés',
+    'Nombre de trains annulés': 'Trains_annulés',
+    "Nombre de trains en retard à l'arrivée": 'Trains_retard',
+    'Taux de régularité': 'Taux_régularité'
+}
+
+COLONNES_NUMERIQUES = ['Trains_programmés', 'Trains_circulés',
+                       'Trains_annulés', 'Trains_retard', 'Taux_régularité']
+
+# Virgule décimale -> point, espaces (y compris insécables) supprimés
+TRADUCTION_NUMERIQUE = str.maketrans({',': '.', ' ': None, '\u00a0': None, '\u202f': None})
+
+# Point utilisé comme séparateur de milliers (ex: 1.234,5)
+MOTIF_MILLIERS = re.compile(r'\.(?=\d{3}(?:,|$))')
+
+# Caractères à retirer des valeurs numériques (%, unités, ...)
+MOTIF_NON_NUMERIQUE = re.compile(r'[^\d\.\-]')
+
+# Nombre en notation scientifique suivi seulement de symboles (ex: 2.5e1%) :
+# l'exposant n'est gardé que dans ce cas ('12 retards' donne 12, pas '12e')
+MOTIF_EXPOSANT = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)[eE][-+]?\d+)[^A-Za-z]*$')
+
+COLONNES_REQUISES = ['Date', 'Départ', 'Arrivée', 'Trains_programmés',
+                     'Trains_circulés', 'Trains_annulés', 'Trains_retard']
+
+# Règles d'inversion Départ/Arrivée : fichier -> (colonne à tester, motif).
+# - Tarbes : si Tarbes est en Départ, on inverse avec Arrivée.
+# - Albi, Cerbère, Latour-de-Carol : ces lignes partent de Paris-Austerlitz,
+#   donc Paris doit être en Départ.
+REGLES_SENS = {
+    "tarbes_intercites": ('Départ', 'Tarbes'),
+    "albi_intercites": ('Arrivée', 'Paris'),
+    "cerbere_intercites": ('Arrivée', 'Paris'),
+    "latour_de_carol_intercites": ('Arrivée', 'Paris'),
+}
+
+# Ville affichée et gare de départ imposée pour chaque fichier
+# (None = on garde la colonne Départ du fichier).
+VILLES = {
+    'albi_intercites': ('Albi', 'Paris-Austerlitz'),
+    'bayonne_intercites': ('Bayonne', 'Toulouse-Matabiau'),
+    'beziers_intercites': ('Beziers', 'Clermont-Ferrand'),
+    'cerbere_intercites': ('Cerbere', 'Paris-Austerlitz'),
+    'latour_de_carol_intercites': ('Latour de Carol', 'Paris-Austerlitz'),
+    'nimes_intercites': ('Nîmes', 'Clermont-Ferrand'),
+    'tarbes_intercites': ('Tarbes', 'Paris-Austerlitz'),
+    'toulouse_intercites': ('Toulouse', None),
+}
+
+
+class Pipeline:
+    """
+    Suite d'étapes de nettoyage appliquées à un DataFrame.
+
+    Chaque étape est une fonction DataFrame -> DataFrame ; sa durée
+    d'exécution est enregistrée dans l'attribut durees.
+
+    Attributs
+    ---------
+    etapes : list
+        Liste de fonctions appliquées dans l'ordre.
+    durees : dict
+        Dictionnaire nom de l'étape -> durée de la dernière exécution (s).
+    """
+
+    def __init__(self, etapes):
+        self.etapes = list(etapes)
+        self.durees = {}
+
+    def __add__(self, autre):
+        """Compose deux pipelines (ou un pipeline et une liste d'étapes)."""
+        etapes = autre.etapes if isinstance(autre, Pipeline) else list(autre)
+        return Pipeline(self.etapes + etapes)
+
+    def __call__(self, df):
+        """
+        Exécute toutes les étapes.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        self.durees = {}
+        for etape in self.etapes:
+            debut = time.perf_counter()
+            df = etape(df)
+            self.durees[etape.__name__] = time.perf_counter() - debut
+        return df
+
+    def rapport(self):
+        """Affiche la durée de chaque étape de la dernière exécution."""
+        for nom, duree in self.durees.items():
+            print(f"  {nom:<22} {duree * 1000:8.1f} ms")
+
+
+def concatener(data_dict):
+    """
+    Concatène les fichiers en gardant leur nom dans une colonne 'Source'.
+
+    Parameters
+    ----------
+    data_dict : dict
+        Dictionnaire nom -> DataFrame brut.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    if not data_dict:
+        raise ValueError("Aucune donnée 'intercites' trouvée")
+    frames = []
+    for nom, df in data_dict.items():
+        df = df.rename(columns=str.strip)
+        df['Source'] = nom
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def normaliser_colonnes(df):
+    """Standardise et renomme les colonnes en noms courts."""
+    df = df.rename(columns=str.strip)
+    return df.rename(columns={k: v for k, v in MAPPING_COLONNES.items() if k in df.columns})
+
+
+def corriger_sens(df):
+    """
+    Inverse Départ et Arrivée pour les fichiers concernés par REGLES_SENS.
+
+    La règle est évaluée une fois par fichier (colonne 'Source') puis
+    l'inversion est appliquée en une seule opération vectorisée.
+    """
+    if 'Source' not in df.columns or 'Départ' not in df.columns or 'Arrivée' not in df.columns:
+        return df
+
+    a_inverser = pd.Series(False, index=df.index)
+    for source, (colonne, motif) in REGLES_SENS.items():
+        lignes = df['Source'] == source
+        if not lignes.any():
+            continue
+        if df.loc[lignes, colonne].astype(str).str.contains(motif, case=False, na=False).any():
+            print(f"Correction inversion Départ/Arrivée pour {source}")
+            a_inverser |= lignes
+
+    if a_inverser.any():
+        df = inverser_sens(df, a_inverser)
+    return df
+
+
+def inverser_sens(df, a_inverser):
+    """Échange Départ et Arrivée sur les lignes indiquées (masque booléen)."""
+    depart = df['Départ'].astype(object)
+    arrivee = df['Arrivée'].astype(object)
+    return df.assign(
+        Départ=np.where(a_inverser, arrivee, depart),
+        Arrivée=np.where(a_inverser, depart, arrivee),
+    )
+
+
+def _vers_nombres(serie):
+    """
+    Convertit une colonne texte en nombres en une seule passe.
+
+    La table TRADUCTION_NUMERIQUE remplace la virgule décimale par un point et
+    supprime les espaces (séparateurs de milliers) ; seules les valeurs encore
+    invalides passent ensuite par le nettoyage par expressions régulières.
+    """
+    texte = serie.astype(str).str.translate(TRADUCTION_NUMERIQUE)
+    nombres = pd.to_numeric(texte, errors='coerce')
+
+    echecs = nombres.isna() & serie.notna()
+    if echecs.any():
+        repris = (
+            serie[echecs].astype(str)
+            .str.replace(MOTIF_MILLIERS, '', regex=True)
+            .str.translate(TRADUCTION_NUMERIQUE)
+        )
+        repris = repris.str.extract(MOTIF_EXPOSANT, expand=False).fillna(
+            repris.str.replace(MOTIF_NON_NUMERIQUE, '', regex=True))
+        nombres[echecs] = pd.to_numeric(repris, errors='coerce')
+    return nombres
+
+
+def convertir_numeriques(df):
+    """
+    Convertit les colonnes numériques (virgule décimale, espaces, symboles).
+
+    Les colonnes déjà lues comme numériques par pandas sont laissées telles
+    quelles. Le nombre de valeurs non vides devenues NaN est affiché et
+    enregistré dans df.attrs['valeurs_invalides'].
+    """
+    df = df.copy()
+    invalides = {}
+    for col in COLONNES_NUMERIQUES:
+        if col not in df.columns or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        serie = df[col]
+        df[col] = _vers_nombres(serie)
+        n = int((df[col].isna() & serie.notna()).sum())
+        if n:
+            invalides[col] = n
+
+    if invalides:
+        print(f"Valeurs non numériques remplacées par NaN : {invalides}")
+    df.attrs['valeurs_invalides'] = invalides
+    return df
+
+
+def valider(df):
+    """
+    Vérifie les colonnes requises et retire les relations invalides
+    (Départ ou Arrivée manquante, ou Départ identique à l'Arrivée).
+    """
+    manquantes = [c for c in COLONNES_REQUISES if c not in df.columns]
+    if manquantes:
+        raise KeyError(f"Colonnes manquantes: {manquantes}")
+
+    mask_valide = (
+        df['Départ'].notna() &
+        df['Arrivée'].notna() &
+        (df['Départ'].astype(object) != df['Arrivée'].astype(object))
+    )
+    return df[mask_valide].reset_index(drop=True)
+
+
+def ajouter_ville(df):
+    """Ajoute la colonne 'Ville' et impose la gare de départ définie dans VILLES."""
+    villes = {source: ville for source, (ville, _) in VILLES.items()}
+    departs = {source: depart for source, (_, depart) in VILLES.items() if depart}
+
+    source = df['Source'].astype(object)
+    depart_impose = source.map(departs)
+    return df.assign(
+        Ville=source.map(villes),
+        Départ=depart_impose.fillna(df['Départ'].astype(object)).fillna('Inconnu'),
+    )
+
+
+def ajouter_dates(df):
+    """
+    Ajoute 'Date_complete', 'Annee' et 'Mois' à partir de 'Date'.
+
+    'Date' est une période mensuelle (schéma de lecture) ou un texte au
+    format YYYY-MM ; les lignes non conformes donnent NaT.
+    """
+    if isinstance(df['Date'].dtype, pd.PeriodDtype):
+        date_complete = df['Date'].dt.to_timestamp()
+    else:
+        date_complete = pd.to_datetime(df['Date'].astype(str) + '-01', format='%Y-%m-%d', errors='coerce')
+    return df.assign(
+        Date_complete=date_complete,
+        Annee=date_complete.dt.year,
+        Mois=date_complete.dt.month,
+    )
+
+
+# Pipeline standard de la table Intercités
+PIPELINE_INTERCITES = Pipeline([normaliser_colonnes, corriger_sens, convertir_numeriques, valider])
+
+# Étapes complémentaires des tableaux de bord retards/annulations
+PIPELINE_DASHBOARD = Pipeline([ajouter_ville, ajouter_dates])
+
+
+def nettoyer_intercites(data_dict, pipeline=None):
+    """
+    Nettoie et concatène les fichiers Intercités.
+
+    Parameters
+    ----------
+    data_dict : dict
+        Dictionnaire nom -> DataFrame brut (fichiers "intercites").
+    pipeline : Pipeline ou None
+        Pipeline à appliquer (PIPELINE_INTERCITES par défaut).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Table concaténée avec les colonnes renommées, une colonne 'Source'
+        (nom du fichier d'origine) et des colonnes numériques converties.
+    """
+    pipeline = pipeline or PIPELINE_INTERCITES
+    return pipeline(concatener(data_dict))
@@ -0,0 +1,137 @@
+"""
+Bundle plotly.js utilisé par les pages HTML générées.
+
+Les pages chargeaient ``plotly-latest.min.js`` : le bundle complet (~3,5 Mo)
+et une version non figée. Ce module fournit la balise <script> à intégrer
+dans une page, selon deux modes :
+
+- 'cdn' : bundle partiel ``plotly-basic`` (traces bar, scatter, pie) en
+  version figée (VERSION_PLOTLY), servi par le CDN de Plotly ;
+- 'local' : le même bundle copié dans le dossier ``vendor/`` à côté de la
+  page, sous un nom contenant son empreinte (ex:
+  ``plotly-basic-2.35.2.3f9a0c1b2d4e.min.js``). Le nom change avec le
+  contenu : le fichier peut être servi avec un cache de longue durée
+  (``Cache-Control: max-age=31536000, immutable``) et la page fonctionne
+  sans accès à Internet (bornes, kiosques).
+
+Le bundle est téléchargé une fois dans le cache de données (CacheDonnees,
+vérifié par le registre d'empreintes s'il y figure). Sans réseau ni cache,
+le bundle complet fourni par le paquet Python plotly est utilisé (les pages
+n'utilisent que des attributs communs aux versions 2 et suivantes).
+"""
+
+import os
+import shutil
+import urllib.error
+
+import plotly
+from plotly.offline import get_plotlyjs_version
+
+from cache_donnees import sha256_fichier
+
+# Version figée du bundle partiel (API compatible avec les pages générées)
+VERSION_PLOTLY = '2.35.2'
+PAQUET_PLOTLY = 'plotly-basic'
+URL_PLOTLY = f"https://cdn.plot.ly/{PAQUET_PLOTLY}-{VERSION_PLOTLY}.min.js"
+
+# Sous-dossier des fichiers tiers copiés à côté des pages
+DOSSIER_VENDOR = 'vendor'
+
+MODES = ('cdn', 'local')
+
+
+def bundle_paquet():
+    """Chemin du bundle plotly.js complet fourni par le paquet Python plotly."""
+    return os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+
+
+def recuperer_bundle(cache=None):
+    """
+    Renvoie le bundle partiel figé.
+
+    Parameters
+    ----------
+    cache : CacheDonnees ou None
+        Cache utilisé pour le téléchargement (celui de DataLoader par défaut).
+
+    Returns
+    -------
+    tuple
+        (chemin local, nom du bundle) : le bundle partiel, ou le bundle
+        complet du paquet plotly (ex: 'plotly-4.1.1') s'il ne peut pas être
+        obtenu.
+    """
+    if cache is None:
+        from data_loader import DataLoader
+        cache = DataLoader().cache
+    try:
+        return cache.recuperer(PAQUET_PLOTLY, URL_PLOTLY), f"{PAQUET_PLOTLY}-{VERSION_PLOTLY}"
+    except (urllib.error.URLError, OSError) as e:
+        print(f"{PAQUET_PLOTLY} {VERSION_PLOTLY} indisponible ({e}), bundle complet du paquet plotly utilisé")
+        return bundle_paquet(), f"plotly-{get_plotlyjs_version()}"
+
+
+def vendoriser(dossier_page, source=None, cache=None):
+    """
+    Copie le bundle dans '<dossier_page>/vendor/' sous un nom à empreinte.
+
+    Les anciennes versions du bundle présentes dans le dossier sont supprimées.
+
+    Parameters
+    ----------
+    dossier_page : str
+        Dossier de la page HTML.
+    source : tuple ou None
+        (chemin, nom) du bundle à copier (par défaut recuperer_bundle(cache)).
+    cache : CacheDonnees ou None
+        Cache passé à recuperer_bundle.
+
+    Returns
+    -------
+    str
+        Chemin du bundle relatif au dossier de la page (à utiliser dans src).
+    """
+    chemin, base = source or recuperer_bundle(cache)
+    dossier = os.path.join(dossier_page, DOSSIER_VENDOR)
+    os.makedirs(dossier, exist_ok=True)
+
+    nom = f"{base}.{sha256_fichier(chemin)[:12]}.min.js"
+    destination = os.path.join(dossier, nom)
+    if not os.path.exists(destination):
+        shutil.copyfile(chemin, destination)
+
+    for fichier in os.listdir(dossier):
+        if fichier.startswith('plotly-') and fichier.endswith('.min.js') and fichier != nom:
+            os.remove(os.path.join(dossier, fichier))
+    return f"{DOSSIER_VENDOR}/{nom}"
+
+
+def balise_plotly(chemin_page, mode='cdn', cache=None):
+    """
+    Balise <script> chargeant plotly.js pour une page.
+
+    Parameters
+    ----------
+    chemin_page : str
+        Fichier HTML qui contiendra la balise.
+    mode : str
+        'cdn' (bundle partiel figé sur le CDN) ou 'local' (bundle copié à
+        côté de la page, voir vendoriser).
+    cache : CacheDonnees ou None
+        Cache utilisé en mode 'local'.
+
+    Returns
+    -------
+    str
+
+    Raises
+    ------
+    ValueError
+        Si le mode est inconnu.
+    """
+    if mode == 'cdn':
+        return f'<script src="{URL_PLOTLY}"></script>'
+    if mode == 'local':
+        src = vendoriser(os.path.dirname(os.path.abspath(chemin_page)), cache=cache)
+        return f'<script src="{src}"></script>'
+    raise ValueError(f"Mode plotly.js inconnu : {mode} (attendu : {', '.join(MODES)})")
@@ -0,0 +1,203 @@
+"""
+Regroupement par mois et gare de départ des fichiers Intercités par gare.
+
+Généralise l'ancien traitement du seul fichier de Toulouse-Matabiau : chaque
+fichier est regroupé par 'Date' et 'Départ' (sommes des nombres de trains,
+moyennes des taux, première gare d'arrivée), puis écrit dans le dossier de
+sortie en CSV (';', UTF-8) et/ou en Parquet :
+
+    <sortie>/<fichier>_REGROUPE.csv
+    <sortie>/<fichier>_REGROUPE.parquet
+
+Les fichiers sont traités en parallèle dans des processus séparés ; les
+sorties sont écrites par lots de lignes (taille_lot) dans un fichier
+temporaire puis renommées, un fichier à moitié écrit n'est donc jamais
+visible.
+
+Utilisation (par défaut : tous les fichiers *_intercites.csv par gare) :
+
+    python regroupement.py [fichier.csv ...] [--sortie DOSSIER] [--formats csv parquet]
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_loader import read_csv_file
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow est optionnel : sans lui, sortie CSV seulement
+    pyarrow = None
+
+DOSSIER_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                           'data', 'base_de_donnees_version_csv'))
+DOSSIER_REGROUPE = os.path.join(DOSSIER_CSV, 'regroupe')
+
+CLES = ['Date', 'Départ']
+
+# Agrégation de chaque colonne du fichier brut
+AGREGATION = {
+    'Nombre de trains programmés': 'sum',
+    'Nombre de trains ayant circulé': 'sum',
+    'Nombre de trains annulés': 'sum',
+    "Nombre de trains en retard à l'arrivée": 'sum',
+    'Taux de régularité': 'mean',
+    "Nombre de trains à l'heure pour un train en retard à l'arrivée": 'mean',
+    'Arrivée': 'first',
+}
+
+FORMATS = ('csv', 'parquet')
+SUFFIXE = '_REGROUPE'
+TAILLE_LOT = 10_000
+
+
+def fichiers_gares(dossier=DOSSIER_CSV):
+    """Fichiers Intercités par gare du dossier (hors fichier national)."""
+    return sorted(f for f in glob.glob(os.path.join(dossier, '*_intercites.csv'))
+                  if not os.path.basename(f).startswith('retard_france'))
+
+
+def regrouper(df):
+    """
+    Regroupe un fichier Intercités brut par mois et gare de départ.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Fichier lu par read_csv_file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Une ligne par (Date, Départ) ; les colonnes absentes du fichier sont
+        ignorées.
+    """
+    agregation = {col: fonction for col, fonction in AGREGATION.items() if col in df.columns}
+    return df.groupby(CLES, observed=True, sort=True).agg(agregation).reset_index()
+
+
+def ecrire_csv(df, chemin, taille_lot=TAILLE_LOT):
+    """Écrit df en CSV par lots de lignes (écriture atomique)."""
+    with open(chemin + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        for debut in range(0, max(len(df), 1), taille_lot):
+            df.iloc[debut:debut + taille_lot].to_csv(f, sep=';', index=False, header=debut == 0)
+    os.replace(chemin + '.tmp', chemin)
+
+
+def ecrire_parquet(df, chemin, taille_lot=TAILLE_LOT):
+    """Écrit df en Parquet, un groupe de lignes par lot (écriture atomique)."""
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(chemin + '.tmp', table.schema) as writer:
+        for lot in table.to_batches(max_chunksize=taille_lot):
+            writer.write_table(pyarrow.Table.from_batches([lot], schema=table.schema))
+    os.replace(chemin + '.tmp', chemin)
+
+
+def traiter_fichier(chemin, sortie, formats=FORMATS, taille_lot=TAILLE_LOT):
+    """
+    Regroupe un fichier et écrit ses sorties.
+
+    Fonction définie au niveau du module pour pouvoir être envoyée
+    à un ProcessPoolExecutor.
+
+    Parameters
+    ----------
+    chemin : str
+        Fichier CSV Intercités brut.
+    sortie : str
+        Dossier des fichiers regroupés.
+    formats : iterable
+        Formats à écrire parmi FORMATS.
+    taille_lot : int
+        Nombre de lignes écrites par lot.
+
+    Returns
+    -------
+    dict
+        {'lignes_avant': int, 'lignes_apres': int, 'fichiers': [chemins écrits]}
+    """
+    df = read_csv_file(chemin, 'intercites')
+    regroupe = regrouper(df)
+    # Dates au format YYYY-MM du fichier d'origine, quel que soit le format de sortie
+    regroupe['Date'] = regroupe['Date'].astype(str)
+
+    base = os.path.join(sortie, os.path.splitext(os.path.basename(chemin))[0] + SUFFIXE)
+    fichiers = []
+    if 'csv' in formats:
+        ecrire_csv(regroupe, base + '.csv', taille_lot)
+        fichiers.append(base + '.csv')
+    if 'parquet' in formats:
+        if pyarrow is None:
+            print(f"pyarrow non installé : pas de sortie Parquet pour {os.path.basename(chemin)}")
+        else:
+            ecrire_parquet(regroupe, base + '.parquet', taille_lot)
+            fichiers.append(base + '.parquet')
+    return {'lignes_avant': len(df), 'lignes_apres': len(regroupe), 'fichiers': fichiers}
+
+
+def regrouper_fichiers(chemins, sortie, formats=FORMATS, taille_lot=TAILLE_LOT,
+                       parallele=True, max_workers=None):
+    """
+    Regroupe plusieurs fichiers, en parallèle par défaut.
+
+    Returns
+    -------
+    dict
+        Dictionnaire chemin -> résultat de traiter_fichier.
+
+    Raises
+    ------
+    ValueError
+        Si un format est inconnu.
+    RuntimeError
+        Si au moins un fichier a échoué (les autres sont écrits).
+    """
+    inconnus = set(formats) - set(FORMATS)
+    if inconnus:
+        raise ValueError(f"Formats inconnus : {sorted(inconnus)} (attendu : {', '.join(FORMATS)})")
+    os.makedirs(sortie, exist_ok=True)
+
+    resultats = {}
+    echecs = {}
+    if parallele and len(chemins) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(traiter_fichier, chemin, sortie, formats, taille_lot): chemin
+                       for chemin in chemins}
+            for future in as_completed(futures):
+                try:
+                    resultats[futures[future]] = future.result()
+                except Exception as e:
+                    echecs[futures[future]] = e
+    else:
+        for chemin in chemins:
+            try:
+                resultats[chemin] = traiter_fichier(chemin, sortie, formats, taille_lot)
+            except Exception as e:
+                echecs[chemin] = e
+
+    if echecs:
+        raise RuntimeError(f"Échec du regroupement : {echecs}")
+    return resultats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Regroupe les fichiers Intercités par mois et gare de départ.")
+    parser.add_argument('fichiers', nargs='*', help="fichiers CSV (par défaut : tous les fichiers par gare)")
+    parser.add_argument('--sortie', default=DOSSIER_REGROUPE, help="dossier de sortie")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS), help="formats écrits")
+    parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help="lignes écrites par lot")
+    parser.add_argument('--sequentiel', action='store_true', help="traiter dans ce processus")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    resultats = regrouper_fichiers(args.fichiers or fichiers_gares(), args.sortie, args.formats,
+                                   args.taille_lot, parallele=not args.sequentiel,
+                                   max_workers=args.workers)
+    for chemin, resultat in sorted(resultats.items()):
+        print(f"  {os.path.basename(chemin):<50} {resultat['lignes_avant']:6d} -> {resultat['lignes_apres']:6d} lignes")
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
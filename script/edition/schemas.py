@@ -0,0 +1,125 @@
+"""
+Schémas de types déclarés pour chaque famille de fichiers CSV.
+
+Au lieu de laisser pandas deviner les types (object pour les gares, int64 et
+float64 pour tous les nombres), chaque famille de fichiers déclare :
+- 'category' pour les gares, relations et autres libellés répétés,
+- des entiers 32 bits (nullables) pour les nombres de trains et de voyageurs,
+- 'float32' pour les taux, pourcentages et retards moyens,
+- des périodes mensuelles pour la colonne 'Date' (format YYYY-MM).
+
+Les schémas sont appliqués à la lecture par DataLoader (read_csv_file).
+"""
+
+import pandas as pd
+
+# Nombre de trains : entier nullable 32 bits (une valeur manquante ne fait pas échouer la lecture)
+ENTIER = 'Int32'
+REEL = 'float32'
+LIBELLE = 'category'
+
+SCHEMA_INTERCITES = {
+    'Départ': LIBELLE,
+    'Arrivée': LIBELLE,
+    'Région': LIBELLE,
+    'Nombre de trains programmés': ENTIER,
+    'Nombre de trains ayant circulé': ENTIER,
+    'Nombre de trains annulés': ENTIER,
+    "Nombre de trains en retard à l'arrivée": ENTIER,
+    'Taux de régularité': REEL,
+    "Nombre de trains à l'heure pour un train en retard à l'arrivée": REEL,
+}
+
+SCHEMA_TGV = {
+    'Service': LIBELLE,
+    'Gare de départ': LIBELLE,
+    "Gare d'arrivée": LIBELLE,
+    'Durée moyenne du trajet': ENTIER,
+    'Nombre de circulations prévues': ENTIER,
+    'Nombre de trains annulés': ENTIER,
+    'Nombre de trains en retard au départ': ENTIER,
+    'Retard moyen des trains en retard au départ': REEL,
+    'Retard moyen de tous les trains au départ': REEL,
+    "Nombre de trains en retard à l'arrivée": ENTIER,
+    "Retard moyen des trains en retard à l'arrivée": REEL,
+    "Retard moyen de tous les trains à l'arrivée": REEL,
+    'Nombre trains en retard > 15min': ENTIER,
+    'Retard moyen trains en retard > 15 (si liaison concurrencée par vol)': REEL,
+    'Nombre trains en retard > 30min': ENTIER,
+    'Nombre trains en retard > 60min': ENTIER,
+    'Prct retard pour causes externes': REEL,
+    'Prct retard pour cause infrastructure': REEL,
+    'Prct retard pour cause gestion trafic': REEL,
+    'Prct retard pour cause matériel roulant': REEL,
+    'Prct retard pour cause gestion en gare et réutilisation de matériel': REEL,
+    'Prct retard pour cause prise en compte voyageurs (affluence, gestions PSH, correspondances)': REEL,
+}
+
+SCHEMA_FREQUENTATION = {
+    'Nom de la gare': LIBELLE,
+    'Code UIC': ENTIER,
+    'Code postal': LIBELLE,
+    'Direction Régionale Gares': LIBELLE,
+    'Segmentation DRG': LIBELLE,
+    'Segmentation Marketing': LIBELLE,
+    '% Non Voyageurs': REEL,
+}
+# Une colonne par année : les années absentes du fichier sont ignorées par read_csv
+for _annee in range(2015, 2041):
+    SCHEMA_FREQUENTATION[f'Total Voyageurs {_annee}'] = ENTIER
+    SCHEMA_FREQUENTATION[f'Total Voyageurs + Non voyageurs {_annee}'] = ENTIER
+
+SCHEMA_TEMPS_MOYEN = {
+    'Relations': LIBELLE,
+    'Année': 'Int16',
+    'Temps estimé en minutes': REEL,
+}
+
+SCHEMAS = {
+    'intercites': SCHEMA_INTERCITES,
+    'tgv': SCHEMA_TGV,
+    'frequentation': SCHEMA_FREQUENTATION,
+    'temps_moyen': SCHEMA_TEMPS_MOYEN,
+}
+
+# Colonnes converties en périodes mensuelles après lecture
+COLONNES_PERIODES = ['Date']
+
+
+def famille(nom):
+    """
+    Détermine la famille d'un jeu de données à partir de son nom.
+
+    Parameters
+    ----------
+    nom : str
+        Nom du jeu de données (clé de DataLoader.urls) ou nom de fichier.
+
+    Returns
+    -------
+    str ou None
+        'intercites', 'tgv', 'frequentation', 'temps_moyen', ou None si la
+        famille est inconnue (les types sont alors devinés par pandas).
+    """
+    nom = nom.lower()
+    if 'tgv' in nom:
+        return 'tgv'
+    if 'intercites' in nom or 'liste_gares' in nom or 'retard_arrivee' in nom:
+        return 'intercites'
+    if 'frequentation' in nom:
+        return 'frequentation'
+    if 'temps_moyen' in nom:
+        return 'temps_moyen'
+    return None
+
+
+def convertir_periodes(df):
+    """
+    Convertit la colonne 'Date' (YYYY-MM) en période mensuelle.
+
+    Les valeurs non conformes deviennent NaT.
+    """
+    for col in COLONNES_PERIODES:
+        if col in df.columns and not isinstance(df[col].dtype, pd.PeriodDtype):
+            df[col] = pd.to_datetime(df[col], format='%Y-%m', errors='coerce').dt.to_period('M')
+    return df
@@ -0,0 +1,220 @@
+"""
+Instantané (snapshot) Parquet de la table Intercités nettoyée.
+
+Ce module :
+- construit la table Intercités nettoyée, typée et concaténée,
+- l'écrit au format Parquet en y enregistrant une clé calculée à partir des
+  empreintes SHA-256 des fichiers sources et du code du pipeline (lecture,
+  schémas, nettoyage),
+- relit directement l'instantané tant que cette clé correspond aux sources
+  et au code, sans réanalyser les CSV bruts.
+
+Si un fichier source n'a pas pu être récupéré, la table est construite avec
+les fichiers disponibles mais l'instantané n'est pas réécrit.
+
+Utilisation en ligne de commande (étape de construction) :
+
+    python snapshot_intercites.py [--force]
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from cache_donnees import sha256_fichier
+from data_loader import DataLoader, read_csv_file
+from schemas import famille
+from nettoyage import PIPELINE_INTERCITES, nettoyer_intercites
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow est optionnel : sans lui, pas d'instantané
+    pa = None
+    pq = None
+
+# Clé des métadonnées Parquet contenant l'empreinte des sources
+CLE_METADONNEES = b'cle_sources'
+
+# Colonnes texte stockées en catégories dans l'instantané
+COLONNES_CATEGORIES = ['Départ', 'Arrivée', 'Source']
+
+DOSSIER_EDITION = os.path.dirname(os.path.abspath(__file__))
+
+# Code dont dépend la table nettoyée : le modifier invalide l'instantané
+FICHIERS_PIPELINE = [
+    os.path.join(DOSSIER_EDITION, nom) for nom in
+    ['lecteur_csv.py', 'schemas.py', 'nettoyage.py', 'snapshot_intercites.py']
+]
+
+
+def noms_intercites(loader):
+    """Noms des fichiers Intercités connus du DataLoader."""
+    return [nom for nom in loader.urls if "intercites" in nom]
+
+
+def cle_sources(empreintes):
+    """
+    Calcule la clé d'un ensemble de fichiers sources.
+
+    Parameters
+    ----------
+    empreintes : dict
+        Dictionnaire nom -> empreinte SHA-256.
+
+    Returns
+    -------
+    str
+        Empreinte SHA-256 de la liste triée des couples nom/empreinte.
+    """
+    contenu = "\n".join(f"{nom}:{empreintes[nom]}" for nom in sorted(empreintes))
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def empreintes_code(fichiers):
+    """
+    Empreintes de fichiers de code, à ajouter à celles des sources.
+
+    Returns
+    -------
+    dict
+        Dictionnaire 'code:<fichier>' -> empreinte SHA-256.
+    """
+    return {f"code:{os.path.basename(fichier)}": sha256_fichier(fichier) for fichier in fichiers}
+
+
+def chemin_defaut(loader):
+    """Emplacement par défaut de l'instantané, à côté du cache des données."""
+    return os.path.join(loader.cache.dossier, 'snapshots', 'intercites.parquet')
+
+
+def lire_cle(chemin):
+    """
+    Lit la clé des sources enregistrée dans un instantané.
+
+    Seul le pied de page du fichier Parquet est lu.
+
+    Returns
+    -------
+    str ou None
+        Clé enregistrée, ou None si l'instantané n'existe pas.
+    """
+    if pq is None or not os.path.exists(chemin):
+        return None
+    metadonnees = pq.read_schema(chemin).metadata or {}
+    cle = metadonnees.get(CLE_METADONNEES)
+    return cle.decode('utf-8') if cle else None
+
+
+def typer(df):
+    """Convertit les colonnes texte répétitives en catégories."""
+    df = df.copy()
+    for col in COLONNES_CATEGORIES:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def ecrire_snapshot(df, chemin, cle):
+    """
+    Écrit la table nettoyée au format Parquet avec la clé des sources.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table nettoyée.
+    chemin : str
+        Chemin du fichier Parquet.
+    cle : str
+        Clé des sources (voir cle_sources).
+    """
+    if pq is None:
+        raise ImportError("pyarrow est nécessaire pour écrire un instantané Parquet")
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadonnees = dict(table.schema.metadata or {})
+    metadonnees[CLE_METADONNEES] = cle.encode('utf-8')
+    table = table.replace_schema_metadata(metadonnees)
+
+    # Écriture atomique : un lecteur ne voit jamais de fichier partiel, et
+    # deux écrivains simultanés n'écrivent jamais le même fichier temporaire
+    fd, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin) or '.', suffix='.part')
+    os.close(fd)
+    try:
+        pq.write_table(table, temporaire)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+
+def construire(loader, paths):
+    """Lit les CSV sources et renvoie la table nettoyée et typée."""
+    data_dict = {nom: read_csv_file(path, famille(nom)) for nom, path in paths.items()}
+    df = nettoyer_intercites(data_dict, PIPELINE_INTERCITES)
+    print("Durée des étapes de nettoyage :")
+    PIPELINE_INTERCITES.rapport()
+    return typer(df)
+
+
+def charger_intercites(loader=None, chemin=None, force=False):
+    """
+    Renvoie la table Intercités nettoyée, depuis l'instantané s'il est à jour.
+
+    Les fichiers sources sont revalidés via le cache de DataLoader (sans être
+    lus) pour calculer leur clé, avec celle du code du pipeline
+    (FICHIERS_PIPELINE) ; si elle correspond à celle de l'instantané,
+    celui-ci est lu directement. Sinon la table est reconstruite à partir des
+    CSV puis l'instantané est réécrit, sauf si un fichier source manque.
+
+    Parameters
+    ----------
+    loader : DataLoader ou None
+        Chargeur à utiliser (un DataLoader par défaut sinon).
+    chemin : str ou None
+        Chemin de l'instantané (par défaut dans le dossier du cache).
+    force : bool
+        Si True, reconstruit l'instantané même s'il est à jour.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    loader = loader or DataLoader()
+    chemin = chemin or chemin_defaut(loader)
+
+    noms = noms_intercites(loader)
+    paths = loader.fetch_all(noms, parallel=True)
+    empreintes = {nom: loader.get_hash(nom) for nom in paths}
+    cle = cle_sources({**empreintes, **empreintes_code(FICHIERS_PIPELINE)})
+
+    if not force and lire_cle(chemin) == cle:
+        return pd.read_parquet(chemin)
+
+    df = construire(loader, paths)
+    manquants = [nom for nom in noms if nom not in paths]
+    if manquants:
+        print(f"Sources manquantes ({', '.join(manquants)}) : instantané Parquet non réécrit")
+    elif pq is None:
+        print("pyarrow non installé : instantané Parquet non écrit")
+    else:
+        ecrire_snapshot(df, chemin, cle)
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construit l'instantané Parquet des données Intercités.")
+    parser.add_argument('--force', action='store_true', help="reconstruire même si l'instantané est à jour")
+    parser.add_argument('--chemin', default=None, help="chemin du fichier Parquet")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    loader = DataLoader()
+    df = charger_intercites(loader, chemin=args.chemin, force=args.force)
+    print(f"{len(df)} lignes -> {args.chemin or chemin_defaut(loader)}")
+    print(f"Temps d'exécution : {time.time() - start_time:.2f} secondes")
@@ -0,0 +1,18 @@
+"""
+Point d'entrée WSGI du tableau de bord retards / annulations Intercités.
+
+Les données sont chargées une seule fois à l'import de ce module. Avec
+``preload_app = True`` (voir gunicorn_dashboard.conf.py), gunicorn importe le
+module dans le processus maître avant de créer les workers : la table, le cube
+et les figures déjà en cache sont partagés en copie sur écriture au lieu
+d'être retéléchargés et réanalysés par chaque worker.
+
+Lancement :
+
+    gunicorn -c gunicorn_dashboard.conf.py wsgi_dashboard:server
+"""
+
+from code_graph_interactif_retard_annulation_intercite import creer_app
+
+app = creer_app()
+server = app.server
@@ -1,78 +1,171 @@
-import pandas as pd
+import argparse
+import hashlib
 import json
+import os
+import re
+import unicodedata
 from data_loader import DataLoader
-
-# --- Charger uniquement les fichiers "intercites"
-loader = DataLoader()
-data_dict = loader.load_all_data()
-data_dict = {k: df for k, df in data_dict.items() if 'intercites' in k}
-
-REQUIRED_COLS = [
-    "Nombre de trains en retard à l'arrivée",
-    "Nombre de trains annulés",
-    "Nombre de trains programmés",
-    "Nombre de trains ayant circulé",
-    "Date"
-]
-
-# Vérification et concaténation
-frames = []
-for k, df in data_dict.items():
-    missing = [c for c in REQUIRED_COLS if c not in df.columns]
-    if missing:
-        raise KeyError(f"Fichier {k} incomplet, colonnes manquantes: {missing}")
-    frames.append(df)
-
-# Extraire les DataFrames individuellement
-albi = data_dict['albi_intercites']
-bayonne = data_dict['bayonne_intercites']
-beziers = data_dict['beziers_intercites']
-cerbere = data_dict['cerbere_intercites']
-latour = data_dict['latour_de_carol_intercites']
-nimes = data_dict['nimes_intercites']
-tarbes = data_dict['tarbes_intercites']
-toulouse = data_dict['toulouse_intercites']
-
-# Ajout données
-albi['Ville'], albi['Départ'] = 'Albi', 'Paris-Austerlitz'
-bayonne['Ville'], bayonne['Départ'] = 'Bayonne', 'Toulouse-Matabiau'
-beziers['Ville'], beziers['Départ'] = 'Beziers', 'Clermont-Ferrand'
-cerbere['Ville'], cerbere['Départ'] = 'Cerbere', 'Paris-Austerlitz'
-latour['Ville'], latour['Départ'] = 'Latour de Carol', 'Paris-Austerlitz'
-nimes['Ville'], nimes['Départ'] = 'Nîmes', 'Clermont-Ferrand'
-tarbes['Ville'], tarbes['Départ'] = 'Tarbes', 'Paris-Austerlitz'
-toulouse['Ville'] = 'Toulouse'
-if 'Départ' not in toulouse.columns:
-    toulouse['Départ'] = 'Inconnu'
-
-# Combinaison et dates
-toutes_donnees = pd.concat([albi, bayonne, beziers, cerbere, latour, nimes, tarbes, toulouse], ignore_index=True)
-toutes_donnees['Date_complete'] = pd.to_datetime(toutes_donnees['Date'].astype(str) + '-01', errors='coerce')
-toutes_donnees['Annee'] = toutes_donnees['Date_complete'].dt.year
-toutes_donnees['Mois'] = toutes_donnees['Date_complete'].dt.month
-toutes_donnees['Date_iso'] = toutes_donnees['Date_complete'].dt.strftime('%Y-%m-%d')
-
-COLONNE_RETARD = "Nombre de trains en retard à l'arrivée"
-COLONNE_ANNULE = "Nombre de trains annulés"
-COLONNE_PROGRAMME = "Nombre de trains programmés"
-COLONNE_CIRCULE = "Nombre de trains ayant circulé"
-
-# Colonnes à exporter pour JS
-cols_export = ['Ville', 'Départ', 'Date', 'Date_iso', 'Annee', 'Mois',
-               COLONNE_RETARD, COLONNE_ANNULE, COLONNE_PROGRAMME, COLONNE_CIRCULE]
-
-
-donnees_js = toutes_donnees[cols_export].to_dict('records')
-
-# Création du fichier HTML
-html_content = f'''
+from nettoyage import PIPELINE_DASHBOARD
+from snapshot_intercites import charger_intercites
+from cube_intercites import CubeIntercites
+from colonnes_js import encoder_colonnes, indexer_plages, DECODEUR_JS
+from plotly_js import balise_plotly, MODES
+
+COLONNE_RETARD = "Trains_retard"
+COLONNE_ANNULE = "Trains_annulés"
+COLONNE_PROGRAMME = "Trains_programmés"
+COLONNE_CIRCULE = "Trains_circulés"
+
+# Clés courtes de la charge colonnaire -> colonnes du cube mensuel
+NOMS_CHARGE = {
+    'v': 'Ville',
+    'g': 'Départ',
+    'y': 'Annee',
+    'm': 'Mois',
+    'r': COLONNE_RETARD,
+    'a': COLONNE_ANNULE,
+    'p': COLONNE_PROGRAMME,
+    'c': COLONNE_CIRCULE,
+}
+
+
+def main():
+    """Génère graph_interactif_retard_intercites.html à partir de la table nettoyée."""
+    parser = argparse.ArgumentParser(description="Génère la page HTML retards / annulations Intercités.")
+    parser.add_argument('--fragments', action='store_true',
+                        help="écrire un fichier de données par ville, chargé à la demande par la page")
+    parser.add_argument('--binaire', action='store_true', help="tableaux typés encodés en base64")
+    parser.add_argument('--plotly', choices=MODES, default='cdn',
+                        help="plotly.js figé sur le CDN ou copié à côté de la page (hors ligne)")
+    args = parser.parse_args()
+
+    # Table Intercités nettoyée par le pipeline partagé, avec ville et dates
+    toutes_donnees = PIPELINE_DASHBOARD(charger_intercites(DataLoader()))
+    generer_html(toutes_donnees, "graph_interactif_retard_intercites.html",
+                 binaire=args.binaire, fragments=args.fragments, plotly=args.plotly)
+    print("Fichier HTML créé: graph_interactif_retard_intercites.html")
+
+
+def nom_fichier(ville):
+    """Nom de fichier ASCII d'une ville (ex: 'Nîmes' -> 'nimes')."""
+    ascii_ = unicodedata.normalize('NFKD', ville).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_.lower()).strip('-') or 'ville'
+
+
+def dossier_fragments(chemin):
+    """Dossier des fragments d'une page : '<page>_donnees' à côté du HTML."""
+    return os.path.splitext(chemin)[0] + '_donnees'
+
+
+def ecrire_fragments(mensuel, catalogue, dossier, binaire=False):
+    """
+    Écrit un fragment JSON par ville et le manifeste correspondant.
+
+    Chaque fragment contient la charge colonnaire des lignes de la ville et
+    son index gare -> année -> plage de lignes. Le nom d'un fragment contient
+    l'empreinte de son contenu : il peut être mis en cache sans limite par le
+    navigateur et n'est réécrit que si ses données changent.
+
+    Paramètres
+    ----------
+    mensuel : pandas.DataFrame
+        Cube mensuel trié par (Ville, Départ, Annee, Mois).
+    catalogue : dict
+        Index ville -> gares -> années (CubeIntercites.index_client).
+    dossier : str
+        Dossier des fragments (les fichiers obsolètes y sont supprimés).
+    binaire : bool
+        Si True, les colonnes sont encodées en tableaux typés base64.
+
+    Retour
+    ------
+    dict
+        Manifeste ville -> nom du fichier de fragment.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    manifeste = {}
+    for ville, lignes in mensuel.groupby('Ville', sort=True):
+        lignes = lignes.reset_index(drop=True)
+        fragment = {
+            'charge': encoder_colonnes(lignes, NOMS_CHARGE, dictionnaires=('v', 'g'), binaire=binaire),
+            'index': indexer_plages(lignes, ['Départ', 'Annee']),
+        }
+        contenu = json.dumps(fragment, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        fichier = f"{nom_fichier(ville)}.{hashlib.sha256(contenu).hexdigest()[:12]}.json"
+        chemin = os.path.join(dossier, fichier)
+        if not os.path.exists(chemin):
+            with open(chemin, 'wb') as f:
+                f.write(contenu)
+        manifeste[ville] = fichier
+
+    # Suppression des fragments d'une génération précédente
+    for fichier in os.listdir(dossier):
+        if fichier.endswith('.json') and fichier != 'manifeste.json' and fichier not in manifeste.values():
+            os.remove(os.path.join(dossier, fichier))
+
+    with open(os.path.join(dossier, 'manifeste.json'), 'w', encoding='utf-8') as f:
+        json.dump({'villes': catalogue, 'fichiers': manifeste}, f, ensure_ascii=False, indent=2)
+    return manifeste
+
+
+def generer_html(toutes_donnees, chemin, binaire=False, fragments=False, plotly='cdn'):
+    """
+    Écrit la page HTML autonome du graphique retards / annulations.
+
+    Les sommes mensuelles par ville et gare sont intégrées au format
+    colonnaire compact du module `colonnes_js` (villes et gares encodées
+    par dictionnaire), accompagnées d'un index ville -> gare -> année -> plage
+    de lignes : chaque sélection est une lecture directe de l'index.
+
+    En mode fragments, la page n'intègre que le catalogue ville -> gares ->
+    années : les données de chaque ville sont écrites dans un fichier JSON
+    séparé (voir ecrire_fragments), téléchargé seulement quand la ville est
+    sélectionnée puis gardé en mémoire. La page doit alors être servie par
+    HTTP (GitHub Pages, ``python -m http.server``), pas ouverte en file://.
+
+    Paramètres
+    ----------
+    toutes_donnees : pandas.DataFrame
+        Table nettoyée complétée par PIPELINE_DASHBOARD.
+    chemin : str
+        Fichier HTML à écrire.
+    binaire : bool
+        Si True, les colonnes sont intégrées en tableaux typés base64.
+    fragments : bool
+        Si True, les données sont écrites par ville dans '<page>_donnees/'.
+    plotly : str
+        Chargement de plotly.js : 'cdn' ou 'local' (voir plotly_js).
+    """
+    cube = CubeIntercites(toutes_donnees)
+    mensuel = cube.cube.reset_index()
+    catalogue = cube.index_client()
+
+    if fragments:
+        dossier = dossier_fragments(chemin)
+        charge = index = None
+        source_fragments = {
+            'dossier': os.path.basename(dossier),
+            'fichiers': ecrire_fragments(mensuel, catalogue, dossier, binaire),
+        }
+    else:
+        charge = encoder_colonnes(mensuel, NOMS_CHARGE, dictionnaires=('v', 'g'), binaire=binaire)
+        # Le cube est trié par (Ville, Départ, Annee, Mois) : chaque année d'une
+        # gare occupe une plage de lignes contiguë
+        index = indexer_plages(mensuel, ['Ville', 'Départ', 'Annee'])
+        source_fragments = None
+
+    def js(valeur):
+        return json.dumps(valeur, ensure_ascii=False, separators=(',', ':'))
+
+    # Création du fichier HTML
+    html_content = f'''
 <!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Analyse des retards ferroviaires - Occitanie</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    {balise_plotly(chemin, plotly)}
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
     <style>
         body {{
@@ -178,9 +271,41 @@ html_content = f'''
     </div>
 
     <script>
-        // Données intégrées dans la page
-        const toutesDonnees = {json.dumps(donnees_js, ensure_ascii=False)};
-        
+        // Catalogue ville -> gares -> années (remplissage des listes sans données)
+        const CATALOGUE = {js(catalogue)};
+        // Mode intégré : données (format colonnaire, voir colonnes_js) et index
+        // ville -> gare -> année -> [début, fin) des lignes ; null en mode fragments
+        const CHARGE = {js(charge)};
+        const INDEX = {js(index)};
+        // Mode fragments : dossier et fichier de données de chaque ville
+        const FRAGMENTS = {js(source_fragments)};
+{DECODEUR_JS}
+        const VILLES = Object.keys(CATALOGUE).sort();
+        const donneesIntegrees = CHARGE ? decoderColonnes(CHARGE) : null;
+
+        // Fragments déjà demandés : ville -> Promise({{donnees, index}})
+        const fragments = new Map();
+
+        function chargerFragment(ville) {{
+            if (!fragments.has(ville)) {{
+                let promesse;
+                if (FRAGMENTS) {{
+                    promesse = fetch(FRAGMENTS.dossier + '/' + FRAGMENTS.fichiers[ville])
+                        .then(reponse => {{
+                            if (!reponse.ok) throw new Error('HTTP ' + reponse.status);
+                            return reponse.json();
+                        }})
+                        .then(f => ({{donnees: decoderColonnes(f.charge), index: f.index}}));
+                    // Un échec n'est pas gardé en cache : nouvel essai à la prochaine sélection
+                    promesse.catch(() => fragments.delete(ville));
+                }} else {{
+                    promesse = Promise.resolve({{donnees: donneesIntegrees, index: INDEX[ville] || {{}}}});
+                }}
+                fragments.set(ville, promesse);
+            }}
+            return fragments.get(ville);
+        }}
+
         // Variables globales
         let currentVille = '';
         let currentGare = '';
@@ -197,11 +322,40 @@ html_content = f'''
             mettreAJourGraphique();
         }}
 
+        // Années disponibles pour la ville (et la gare) courantes, d'après le catalogue
+        function anneesDisponibles() {{
+            const entree = CATALOGUE[currentVille];
+            if (!entree) return [];
+            const gares = currentGare ? [currentGare] : entree.gares;
+            const annees = new Set();
+            gares.forEach(gare => (entree.annees[gare] || []).forEach(a => annees.add(a)));
+            return [...annees].sort((a, b) => b - a);
+        }}
+
+        // Plages [début, fin) de lignes de la sélection courante dans l'index
+        // gare -> année -> plage d'une ville
+        function plagesSelection(indexVille) {{
+            const gares = currentGare ? [currentGare] : Object.keys(indexVille);
+            const plages = [];
+            gares.forEach(gare => {{
+                const parAnnee = indexVille[gare] || {{}};
+                if (currentAnnee) {{
+                    if (parAnnee[currentAnnee]) plages.push(parAnnee[currentAnnee]);
+                }} else {{
+                    plages.push(...Object.values(parAnnee));
+                }}
+            }});
+            return plages;
+        }}
+
+        function garesVille() {{
+            return CATALOGUE[currentVille] ? CATALOGUE[currentVille].gares : [];
+        }}
+
         function initialiserSelectVilles() {{
-            const villes = [...new Set(toutesDonnees.map(d => d.Ville))].sort();
             const select = document.getElementById('ville-select');
             
-            villes.forEach(ville => {{
+            VILLES.forEach(ville => {{
                 const option = document.createElement('option');
                 option.value = ville;
                 option.textContent = ville;
@@ -209,7 +363,7 @@ html_content = f'''
             }});
 
             // Sélectionner Albi par défaut
-            if (villes.includes('Albi')) {{
+            if (VILLES.includes('Albi')) {{
                 select.value = 'Albi';
                 select.dispatchEvent(new Event('change'));
             }}
@@ -244,9 +398,7 @@ html_content = f'''
                 return;
             }}
 
-            const gares = [...new Set(toutesDonnees
-                .filter(d => d.Ville === currentVille)
-                .map(d => d.Départ))].sort();
+            const gares = garesVille();
 
             selectGare.innerHTML = '';
             
@@ -276,12 +428,7 @@ html_content = f'''
                 return;
             }}
 
-            let donneesFiltrees = toutesDonnees.filter(d => d.Ville === currentVille);
-            if (currentGare) {{
-                donneesFiltrees = donneesFiltrees.filter(d => d.Départ === currentGare);
-            }}
-
-            const annees = [...new Set(donneesFiltrees.map(d => d.Annee))].sort((a, b) => b - a);
+            const annees = anneesDisponibles();
 
             selectAnnee.innerHTML = '';
             
@@ -308,34 +455,46 @@ html_content = f'''
                 return;
             }}
 
-            // Filtrer les données
-            let donneesFiltrees = toutesDonnees.filter(d => d.Ville === currentVille);
-            
-            if (currentGare) {{
-                donneesFiltrees = donneesFiltrees.filter(d => d.Départ === currentGare);
-            }}
-            
-            if (currentAnnee) {{
-                donneesFiltrees = donneesFiltrees.filter(d => d.Annee === parseInt(currentAnnee));
-            }}
+            // Données de la ville (fragment téléchargé une seule fois en mode fragments)
+            const selection = cleSelection();
+            chargerFragment(currentVille).then(fragment => {{
+                // Une autre sélection a pu être faite pendant le chargement
+                if (selection === cleSelection()) {{
+                    tracerGraphique(fragment);
+                }}
+            }}).catch(erreur => {{
+                document.getElementById('graphique').innerHTML = '<div class="loading">Données indisponibles (' + erreur.message + ')</div>';
+            }});
+        }}
+
+        function cleSelection() {{
+            return [currentVille, currentGare, currentAnnee].join('|');
+        }}
+
+        function tracerGraphique(fragment) {{
+            const col = fragment.donnees.colonnes;
+
+            // Plages de lignes de la sélection (lecture directe de l'index)
+            const plages = plagesSelection(fragment.index);
 
             // Grouper par mois
             const donneesParMois = {{}};
-            donneesFiltrees.forEach(d => {{
-                if (!donneesParMois[d.Date]) {{
-                    donneesParMois[d.Date] = {{
-                        date: new Date(d.Date_iso),
+            plages.forEach(([debut, fin]) => {{ for (let i = debut; i < fin; i++) {{
+                const cle = col.y[i] * 12 + col.m[i] - 1;
+                if (!donneesParMois[cle]) {{
+                    donneesParMois[cle] = {{
+                        date: new Date(col.y[i], col.m[i] - 1, 1),
                         retard: 0,
                         annules: 0,
                         programmes: 0,
                         circules: 0
                     }};
                 }}
-                donneesParMois[d.Date].retard += d["{COLONNE_RETARD}"] || 0;
-                donneesParMois[d.Date].annules += d["{COLONNE_ANNULE}"] || 0;
-                donneesParMois[d.Date].programmes += d["{COLONNE_PROGRAMME}"] || 0;
-                donneesParMois[d.Date].circules += d["{COLONNE_CIRCULE}"] || 0;
-            }});
+                donneesParMois[cle].retard += col.r[i];
+                donneesParMois[cle].annules += col.a[i];
+                donneesParMois[cle].programmes += col.p[i];
+                donneesParMois[cle].circules += col.c[i];
+            }} }});
 
             const donneesTriées = Object.values(donneesParMois).sort((a, b) => a.date - b.date);
 
@@ -380,13 +539,13 @@ html_content = f'''
             }};
 
             const layout = {{
-                title: getTitre(),
+                title: {{ text: getTitre() }},
                 barmode: 'stack',
                 xaxis: {{ 
-                    title: 'Mois',
+                    title: {{ text: 'Mois' }},
                     tickformat: '%b %Y'
                 }},
-                yaxis: {{ title: 'Nombre de trains' }},
+                yaxis: {{ title: {{ text: 'Nombre de trains' }} }},
                 legend: {{ x: 0.02, y: 0.98 }},
                 hovermode: 'closest',
                 paper_bgcolor: 'white',
@@ -403,9 +562,7 @@ html_content = f'''
                 titre += currentGare + ' → ' + currentVille;
             }} else {{
                 // Trouver la gare par défaut
-                const gares = [...new Set(toutesDonnees
-                    .filter(d => d.Ville === currentVille)
-                    .map(d => d.Départ))].sort();
+                const gares = garesVille();
                 titre += (gares[0] || '') + ' → ' + currentVille;
             }}
             
@@ -420,9 +577,10 @@ html_content = f'''
 </html>
 '''
 
-# Sauvegarde
-with open("graph_interactif_retard_intercites.html","w",encoding="utf-8") as f:
-    f.write(html_content)
+    # Sauvegarde
+    with open(chemin,"w",encoding="utf-8") as f:
+        f.write(html_content)
 
-print("Fichier HTML créé: graph_interactif_retard_intercites.html")
 
+if __name__ == '__main__':
+    main()
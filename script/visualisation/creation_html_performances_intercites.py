@@ -1,84 +1,48 @@
-import pandas as pd
+import argparse
 import json
 from data_loader import DataLoader
-
-# Charger les données via ta classe
-loader = DataLoader()
-data_dict = loader.load_all_data()
-
-#Charger les fichiers "intercites" uniquement
-data_dict = {k: df for k, df in data_dict.items() if "intercites" in k}
-
-# Correction Départ/Arrivée
-for k, df in data_dict.items():
-    df.columns = df.columns.str.strip()
-    if k == "tarbes_intercites":
-        if 'Départ' in df.columns and 'Arrivée' in df.columns:
-            tarbes_in_depart = df['Départ'].astype(str).str.contains('Tarbes', case=False, na=False).any()
-            if tarbes_in_depart:
-                df[['Départ', 'Arrivée']] = df[['Arrivée', 'Départ']]
-    elif k in ["albi_intercites", "cerbere_intercites", "latour_de_carol_intercites"]:
-        if 'Départ' in df.columns and 'Arrivée' in df.columns:
-            paris_in_arrivee = df['Arrivée'].astype(str).str.contains('Paris', case=False, na=False).any()
-            if paris_in_arrivee:
-                df[['Départ', 'Arrivée']] = df[['Arrivée', 'Départ']]
-
-# Concaténer tous les DataFrames
-df_complet = pd.concat(data_dict.values(), ignore_index=True)
-df_complet.columns = df_complet.columns.str.strip()
-
-# Renommer colonnes
-mapping_colonnes = {
-    'Date': 'Date',
-    'Départ': 'Départ',
-    'Arrivée': 'Arrivée',
-    'Nombre de trains programmés': 'Trains_programmés',
-    'Nombre de trains ayant circulé': 'Trains_circulés',
-    'Nombre de trains annulés': 'Trains_annulés',
-    "Nombre de trains en retard à l'arrivée": 'Trains_retard',
-    'Taux de régularité': 'Taux_régularité'
-}
-df_complet = df_complet.rename(columns={k: v for k, v in mapping_colonnes.items() if k in df_complet.columns})
-
-# Nettoyage et conversion des colonnes numériques
-df_filtre = df_complet[
-    df_complet['Départ'].notna() & 
-    df_complet['Arrivée'].notna() & 
-    (df_complet['Départ'] != df_complet['Arrivée'])
-].copy()
-
-for col in ['Trains_programmés', 'Trains_circulés', 'Trains_annulés', 'Trains_retard', 'Taux_régularité']:
-    if col in df_filtre.columns:
-        df_filtre[col] = pd.to_numeric(
-            df_filtre[col].astype(str)
-                     .str.replace(',', '.', regex=False)
-                     .str.replace(' ', '', regex=False),
-            errors='coerce'
-        )
-
-# Agrégation par Départ / Arrivée
-df_summary = df_filtre.groupby(['Départ', 'Arrivée']).agg({
-    'Trains_programmés':'sum',
-    'Trains_circulés':'sum',
-    'Trains_retard':'sum',
-    'Trains_annulés':'sum',
-    'Taux_régularité':'mean'
-}).reset_index()
-
-df_summary['Taux_annulation'] = (df_summary['Trains_annulés'] / df_summary['Trains_programmés'] * 100).round(1).fillna(0)
-df_summary['Taux_retard'] = (df_summary['Trains_retard'] / df_summary['Trains_circulés'] * 100).round(1).fillna(0)
-
-# Préparer les données pour JS
-donnees_js = df_summary.to_dict('records')
-
-# Générer le HTML avec Plotly Scatter
-html_content = f"""
+from snapshot_intercites import charger_intercites
+from performances_intercites import resumer_relations
+from plotly_js import balise_plotly, MODES
+
+
+def main():
+    """Génère graph_interactif_performance.html à partir de la table nettoyée."""
+    parser = argparse.ArgumentParser(description="Génère la page HTML de performance Intercités.")
+    parser.add_argument('--plotly', choices=MODES, default='cdn',
+                        help="plotly.js figé sur le CDN ou copié à côté de la page (hors ligne)")
+    args = parser.parse_args()
+
+    # Table Intercités nettoyée (instantané Parquet si à jour), agrégée par relation
+    df_summary = resumer_relations(charger_intercites(DataLoader()))
+    generer_html(df_summary, "graph_interactif_performance.html", plotly=args.plotly)
+    print("Fichier HTML créé: graph_interactif_performance.html")
+
+
+def generer_html(df_summary, chemin, plotly='cdn'):
+    """
+    Écrit la page HTML autonome du scatter plot de performance.
+
+    Paramètres
+    ----------
+    df_summary : pandas.DataFrame
+        Une ligne par relation (voir resumer_relations).
+    chemin : str
+        Fichier HTML à écrire.
+    plotly : str
+        Chargement de plotly.js : 'cdn' ou 'local' (voir plotly_js).
+    """
+    # Préparer les données pour JS
+    donnees_js = df_summary.to_dict('records')
+
+    # Générer le HTML avec Plotly Scatter
+    html_content = f"""
 <!DOCTYPE html>
 <html lang="fr">
 <head>
 <meta charset="UTF-8">
 <title>Performance Intercités Occitanie</title>
-<script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+{balise_plotly(chemin, plotly)}
 </head>
 <body>
 <h1>Performance Intercités - Occitanie</h1>
@@ -141,9 +105,9 @@ const minY = Math.min(...data.map(d => d.Taux_régularité));
 const maxY = Math.max(...data.map(d => d.Taux_régularité));
 
 const layout = {{
-    title: "Performance du réseau Intercités d'Occitanie",
-    xaxis: {{ title: "Trains programmés", tickformat: ",d" }},
-    yaxis: {{ title: "Taux de régularité (%)",  range: [minY - 2, maxY + 2] }},
+    title: {{ text: "Performance du réseau Intercités d'Occitanie" }},
+    xaxis: {{ title: {{ text: "Trains programmés" }}, tickformat: ",d" }},
+    yaxis: {{ title: {{ text: "Taux de régularité (%)" }},  range: [minY - 2, maxY + 2] }},
     hovermode: "closest"
 }};
 
@@ -153,7 +117,9 @@ Plotly.newPlot('graph', traces, layout);
 </html>
 """
 
-with open("graph_interactif_performance.html","w",encoding="utf-8") as f:
-    f.write(html_content)
+    with open(chemin,"w",encoding="utf-8") as f:
+        f.write(html_content)
+
 
-print("Fichier HTML créé: graph_interactif_performance.html")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Sources locales partagées par les tests : les fichiers CSV du dépôt sont
+copiés dans un dossier temporaire et servis à DataLoader par des URLs file://.
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import DataLoader
+
+DOSSIER_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'base_de_donnees_version_csv')
+
+
+class AvecSourcesLocales(unittest.TestCase):
+    """Copie les fichiers FICHIERS (nom -> fichier du dépôt) dans un dossier temporaire"""
+
+    FICHIERS = {}
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+        self.sources = os.path.join(self.dossier, 'sources')
+        os.makedirs(self.sources)
+        self.chemins = {}
+        self.urls = {}
+        for nom, fichier in self.FICHIERS.items():
+            self.chemins[nom] = shutil.copy(os.path.join(DOSSIER_CSV, fichier), self.sources)
+            self.urls[nom] = Path(self.chemins[nom]).resolve().as_uri()
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def loader(self, **options):
+        return DataLoader(urls=self.urls, cache_dir=os.path.join(self.dossier, 'cache'), **options)
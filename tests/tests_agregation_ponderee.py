@@ -0,0 +1,102 @@
+"""
+TESTS des indicateurs pondérés par le trafic
+
+"""
+import unittest
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from agregation_ponderee import agreger_ponderes, intervalle_wilson
+from performances_intercites import resumer_relations
+
+
+class TestAgregationPonderee(unittest.TestCase):
+    """Tests des taux pondérés et de leurs intervalles de confiance"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Date': pd.PeriodIndex(['2023-01', '2023-02', '2024-01', '2024-01'], freq='M'),
+            'Départ': ['TOULOUSE', 'TOULOUSE', 'TOULOUSE', 'PARIS'],
+            'Arrivée': ['PARIS', 'PARIS', 'PARIS', 'TOULOUSE'],
+            'Trains_programmés': [12, 310, 100, 50],
+            'Trains_circulés': [10, 300, 100, 50],
+            'Trains_annulés': [2, 10, 0, 0],
+            'Trains_retard': [5, 30, 20, 1234],
+            'Taux_régularité': [50.0, 90.0, 80.0, 1234.5],
+            'Source': 'toulouse_intercites',
+        })
+
+    def test_regularite_ponderee(self):
+        """La régularité est pondérée par les trains ayant circulé"""
+        resultat = agreger_ponderes(self.df).set_index(['Départ', 'Arrivée'])
+        ligne = resultat.loc[('TOULOUSE', 'PARIS')]
+        attendu = (50 * 10 + 90 * 300 + 80 * 100) / 410
+        self.assertAlmostEqual(ligne['Taux_régularité'], attendu)
+        self.assertEqual(ligne['Trains_programmés'], 422)
+        self.assertEqual(ligne['nb_mois'], 3)
+        self.assertEqual(ligne['Taux_annulation'], round(12 / 422 * 100, 1))
+        self.assertTrue(ligne['Taux_régularité_bas'] < attendu < ligne['Taux_régularité_haut'])
+        # Taux aberrant ignoré : aucune régularité pour cette relation
+        self.assertTrue(pd.isna(resultat.loc[('PARIS', 'TOULOUSE'), 'Taux_régularité']))
+        print("Régularité pondérée OK")
+
+    def test_cles_derivees(self):
+        """Regroupement par année (clé dérivée de la date)"""
+        resultat = agreger_ponderes(self.df, ['Annee'])
+        self.assertEqual(resultat['Annee'].tolist(), [2023, 2024])
+        self.assertEqual(resultat['Trains_circulés'].tolist(), [310, 150])
+        print("Clés dérivées OK")
+
+    def test_cle_famille(self):
+        """Regroupement par famille de fichiers (clé dérivée de la source)"""
+        df = pd.concat([self.df, self.df.assign(Source='france_tgv'),
+                        self.df.assign(Source='inconnue')], ignore_index=True)
+        resultat = agreger_ponderes(df, ['Famille'])
+        self.assertEqual(resultat['Famille'].tolist(), ['intercites', 'tgv'])
+        self.assertEqual(resultat['Trains_circulés'].tolist(), [460, 460])
+        print("Clé famille OK")
+
+    def test_date_manquante(self):
+        """Une date 'NaT' n'interrompt pas le regroupement : la ligne est écartée"""
+        df = self.df.copy()
+        df['Date'] = pd.PeriodIndex(['2023-01', None, '2024-01', '2024-01'], freq='M')
+        resultat = agreger_ponderes(df, ['Annee', 'Mois'])
+        self.assertEqual(resultat[['Annee', 'Mois']].values.tolist(), [[2023, 1], [2024, 1]])
+        self.assertEqual(resultat['Annee'].dtype, 'int64')
+        self.assertEqual(resultat['Trains_circulés'].tolist(), [10, 150])
+        print("Date manquante OK")
+
+    def test_intervalle_wilson(self):
+        """Intervalle de Wilson : borné dans [0, 100], indéfini sans effectif"""
+        bas, haut = intervalle_wilson([0, 50, 10], [10, 100, 0])
+        self.assertAlmostEqual(bas[0], 0.0)
+        self.assertTrue(0 < haut[0] < 35)
+        self.assertTrue(bas[1] < 50 < haut[1])
+        self.assertTrue(pd.isna(bas[2]) and pd.isna(haut[2]))
+        print("Intervalle de Wilson OK")
+
+    def test_resumer_relations(self):
+        """resumer_relations écarte les relations sans régularité valide"""
+        resultat = resumer_relations(self.df)
+        self.assertEqual(resultat[['Départ', 'Arrivée']].values.tolist(), [['TOULOUSE', 'PARIS']])
+        print("Résumé des relations OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS AGRÉGATION PONDÉRÉE")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestAgregationPonderee)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS D'AGRÉGATION PONDÉRÉE PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,87 @@
+"""
+TESTS du regroupement des CSV par schéma (graphique_int/src/analyse_retard.py)
+
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'graphique_int', 'src'))
+from analyse_retard import charger_csv
+from lecteur_csv import lire_csv
+
+DOSSIER_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'base_de_donnees_version_csv')
+
+
+class TestAnalyseRetard(unittest.TestCase):
+    """Tests de charger_csv : une table par schéma"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def copier(self, *fichiers):
+        for fichier in fichiers:
+            shutil.copy(os.path.join(DOSSIER_CSV, fichier), self.dossier)
+
+    def test_en_tetes_a_points_reunis(self):
+        """Noms à points et noms en clair d'un même schéma : une seule table, en-tête en clair"""
+        self.copier('liste_gares_occitanie.csv', 'tarbes_retard_arrivee_intercites.csv')
+        tables = charger_csv(self.dossier)
+        self.assertEqual(list(tables), ['Intercités'])
+        table = tables['Intercités']
+        self.assertIn("Nombre de trains en retard à l'arrivée", table.columns)
+        self.assertFalse(any('.' in c for c in table.columns))
+        self.assertEqual(sorted(table['source_fichier'].unique()),
+                         ['liste_gares_occitanie.csv', 'tarbes_retard_arrivee_intercites.csv'])
+        self.assertFalse(table['Départ'].isna().any())
+        print("En-têtes à points réunis OK")
+
+    def test_schemas_differents_separes(self):
+        """Des schémas différents ne sont jamais réunis dans une même table"""
+        self.copier('tarbes_retard_arrivee_intercites.csv', 'nimes_retard_arrivee+depart_tgv.csv',
+                    'occitanie_retard_arrivee.csv', 'frequentation_gares_occitanie.csv',
+                    'temps_moyen_narbonne-paris.csv')
+        tables = charger_csv(self.dossier)
+        self.assertEqual(sorted(tables), ['Fréquentation', 'Intercités', 'Régional', 'TGV', 'Temps de trajet'])
+        for nom, table in tables.items():
+            fichiers = table['source_fichier'].unique()
+            self.assertEqual(len(fichiers), 1, nom)
+            # Aucune colonne héritée d'un autre fichier
+            source = lire_csv(os.path.join(self.dossier, fichiers[0]))
+            self.assertEqual(len(table.columns), len(source.columns) + 1, nom)
+        self.assertNotIn('Gare de départ', tables['Intercités'].columns)
+        self.assertNotIn('Départ', tables['TGV'].columns)
+        print("Schémas différents séparés OK")
+
+    def test_meme_famille_schemas_differents(self):
+        """Deux schémas d'une même famille : tables numérotées"""
+        self.copier('temps_moyen_narbonne-paris.csv', 'temps_moyen_occitanie-paris.csv')
+        with open(os.path.join(self.dossier, 'temps_moyen_autre.csv'), 'w', encoding='utf-8') as f:
+            f.write("Relations;Année;Temps estimé en minutes;Distance\nA - B;2020;95;120\n")
+        tables = charger_csv(self.dossier)
+        self.assertEqual(sorted(tables), ['Temps de trajet', 'Temps de trajet (2)'])
+        self.assertEqual(sorted(t['source_fichier'].nunique() for t in tables.values()), [1, 2])
+        print("Même famille, schémas différents OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS ANALYSE DES RETARDS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestAnalyseRetard)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS D'ANALYSE DES RETARDS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,101 @@
+"""
+TESTS de l'analyse des retards TGV
+
+"""
+import unittest
+import os
+import sys
+import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import read_csv_file
+from snapshot_intercites import lire_cle
+import analyse_tgv
+from analyse_tgv import CAUSES, RELATION, calculer, charger_analyses_tgv, chemins_defaut
+from sources_locales import DOSSIER_CSV, AvecSourcesLocales
+
+FICHIERS = {
+    'montpellier_tgv': 'montpellier_retard_arrivee+depart_tgv.csv',
+    'nimes_tgv': 'nimes_retard_arrivee+depart_tgv.csv',
+}
+
+
+class TestAnalyseTgv(AvecSourcesLocales):
+    """Tests des mesures TGV et de leur mise en cache"""
+
+    FICHIERS = FICHIERS
+
+    def setUp(self):
+        super().setUp()
+        self.donnees = {nom: read_csv_file(os.path.join(DOSSIER_CSV, f), 'tgv') for nom, f in FICHIERS.items()}
+
+    def test_mesures(self):
+        """Tranches, minutes par cause et totaux cohérents"""
+        tables = calculer(self.donnees)
+        relations, mois = tables['relations'], tables['mois']
+        self.assertEqual(relations['trains_circules'].sum(), mois['trains_circules'].sum())
+
+        tranches = relations[['tranche_0_15', 'tranche_15_30', 'tranche_30_60', 'tranche_60_plus']].sum(axis=1)
+        self.assertTrue((tranches - relations['trains_circules']).abs().max() < 1e-9)
+
+        parts = relations[[f'part_{cause}' for cause in CAUSES.values()]].sum(axis=1).dropna()
+        self.assertTrue(((parts - 100).abs() < 1e-6).all())
+
+        df = self.donnees['montpellier_tgv']
+        ligne = df.iloc[0]
+        attendu = (ligne["Nombre de trains en retard à l'arrivée"]
+                   * ligne["Retard moyen des trains en retard à l'arrivée"]
+                   * ligne['Prct retard pour cause infrastructure'] / 100)
+        une_ligne = calculer({'montpellier_tgv': df.iloc[[0]]})['relations']
+        self.assertAlmostEqual(une_ligne['minutes_infrastructure'].iloc[0], attendu, places=3)
+        print("Mesures TGV OK")
+
+    def test_cache(self):
+        """Les tables sont relues depuis le cache tant que les sources sont inchangées"""
+        loader = self.loader()
+        premier = charger_analyses_tgv(loader)
+        chemins = chemins_defaut(loader)
+        self.assertTrue(all(os.path.exists(c) for c in chemins.values()))
+        dates = {nom: os.path.getmtime(c) for nom, c in chemins.items()}
+
+        second = charger_analyses_tgv(self.loader())
+        self.assertEqual(dates, {nom: os.path.getmtime(c) for nom, c in chemins.items()})
+        self.assertEqual(second['relations'][RELATION].astype(str).values.tolist(),
+                         premier['relations'][RELATION].astype(str).values.tolist())
+        print("Cache des analyses TGV OK")
+
+    def test_cache_invalide_si_code_modifie(self):
+        """Une modification du code d'analyse recalcule les tables"""
+        code = os.path.join(self.dossier, 'analyse_tgv.py')
+        shutil.copy(analyse_tgv.FICHIERS_CODE[-1], code)
+        fichiers = analyse_tgv.FICHIERS_CODE
+        analyse_tgv.FICHIERS_CODE = fichiers[:-1] + [code]
+        loader = self.loader()
+        chemin = chemins_defaut(loader)['relations']
+        try:
+            charger_analyses_tgv(loader)
+            cle_initiale = lire_cle(chemin)
+            with open(code, 'a', encoding='utf-8') as f:
+                f.write("\n# nouvelle mesure\n")
+            charger_analyses_tgv(loader)
+        finally:
+            analyse_tgv.FICHIERS_CODE = fichiers
+        self.assertNotEqual(lire_cle(chemin), cle_initiale)
+        print("Invalidation par le code OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS ANALYSE TGV")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestAnalyseTgv)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS D'ANALYSE TGV PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
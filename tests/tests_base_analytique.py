@@ -0,0 +1,135 @@
+"""
+TESTS de la base analytique SQL embarquée
+
+"""
+import unittest
+import os
+import sys
+import sqlite3
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import read_csv_file
+import base_analytique
+from base_analytique import BaseAnalytique
+from nettoyage import PIPELINE_DASHBOARD, PIPELINE_INTERCITES, concatener
+from performances_intercites import resumer_relations
+from sources_locales import AvecSourcesLocales
+
+FICHIERS = {
+    'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+    'toulouse_intercites': 'toulouse_matabiau_retard_arrivee_intercites.csv',
+}
+
+
+class TestBaseAnalytique(AvecSourcesLocales):
+    """Tests des agrégations SQL (moteur sqlite, toujours disponible)"""
+
+    FICHIERS = FICHIERS
+
+    def setUp(self):
+        super().setUp()
+        self.base = BaseAnalytique(os.path.join(self.dossier, 'intercites.db'), moteur='sqlite')
+        self.donnees = {nom: read_csv_file(chemin, 'intercites') for nom, chemin in self.chemins.items()}
+
+    def tearDown(self):
+        self.base.fermer()
+        super().tearDown()
+
+    def test_ingestion_incrementale(self):
+        """Un fichier inchangé n'est pas réingéré, un fichier modifié est remplacé"""
+        premier = self.base.ingerer(self.loader())
+        self.assertTrue(all(n > 0 for n in premier.values()))
+        self.assertEqual(self.base.ingerer(self.loader()), {nom: 0 for nom in FICHIERS})
+
+        with open(self.chemins['tarbes_intercites'], 'a', encoding='utf-8') as f:
+            f.write("2030-01;PARIS-AUSTERLITZ;TARBES;20;20;0;2;90.0;9.0\n")
+        second = self.base.ingerer(self.loader())
+        self.assertEqual(second['toulouse_intercites'], 0)
+        self.assertEqual(second['tarbes_intercites'], premier['tarbes_intercites'] + 1)
+        total = self.base.requete("SELECT COUNT(*) AS n FROM intercites")['n'].iloc[0]
+        self.assertEqual(total, sum(premier.values()) + 1)
+        print("Ingestion incrémentale OK")
+
+    def test_reingestion_si_pipeline_modifie(self):
+        """Un fichier inchangé est réingéré si le code de nettoyage a changé"""
+        premier = self.base.ingerer(self.loader())
+        self.base.connexion.execute("UPDATE intercites SET programmes = 0")
+        self.base.connexion.commit()
+        self.assertEqual(self.base.ingerer(self.loader()), {nom: 0 for nom in FICHIERS})
+
+        with mock.patch.object(base_analytique, 'VERSION_PIPELINE', 'autre version'):
+            self.assertEqual(self.base.ingerer(self.loader()), premier)
+            self.assertEqual(self.base.version('tarbes_intercites'), 'autre version')
+        zeros = self.base.requete("SELECT COUNT(*) AS n FROM intercites WHERE programmes = 0")['n'].iloc[0]
+        self.assertLess(zeros, sum(premier.values()))
+
+        # Base créée avant le suivi de version : la colonne est ajoutée, les fichiers réingérés
+        self.base.fermer()
+        chemin = os.path.join(self.dossier, 'ancienne.db')
+        ancienne = sqlite3.connect(chemin)
+        ancienne.executescript("CREATE TABLE sources (nom TEXT PRIMARY KEY, sha256 TEXT);")
+        ancienne.close()
+        self.base = BaseAnalytique(chemin, moteur='sqlite')
+        self.assertIsNone(self.base.version('tarbes_intercites'))
+        self.assertEqual(self.base.ingerer(self.loader()), premier)
+        self.assertEqual(self.base.version('tarbes_intercites'), base_analytique.VERSION_PIPELINE)
+        print("Réingestion si pipeline modifié OK")
+
+    def test_relations_identiques_a_pandas(self):
+        """relations() donne le même résultat que resumer_relations"""
+        for nom, df in self.donnees.items():
+            self.base.ingerer_fichier(nom, df)
+        attendu = resumer_relations(PIPELINE_INTERCITES(concatener(self.donnees)))
+        attendu = attendu.astype({'Départ': str, 'Arrivée': str}).sort_values(['Départ', 'Arrivée'])
+        obtenu = self.base.relations()
+
+        self.assertEqual(len(obtenu), len(attendu))
+        self.assertEqual(obtenu.columns.tolist(), attendu.columns.tolist())
+        for colonne in attendu.columns:
+            valeurs = obtenu[colonne].tolist()
+            if pd.api.types.is_float_dtype(attendu[colonne]):
+                for a, b in zip(valeurs, attendu[colonne].tolist()):
+                    self.assertAlmostEqual(a, b, places=4)
+            else:
+                self.assertEqual(valeurs, attendu[colonne].tolist())
+        print("Relations identiques à pandas OK")
+
+    def test_regroupement_et_serie(self):
+        """Regroupement par date et départ, et série mensuelle du tableau de bord"""
+        nom = 'toulouse_intercites'
+        self.base.ingerer_fichier(nom, self.donnees[nom])
+        propre = PIPELINE_INTERCITES(concatener({nom: self.donnees[nom]}))
+
+        regroupe = self.base.par_date_depart(nom)
+        attendu = propre.groupby([propre['Date'].astype(str), 'Départ'], observed=True)['Trains_annulés'].sum()
+        self.assertEqual(regroupe['Trains_annulés'].tolist(), attendu.tolist())
+
+        tableau = PIPELINE_DASHBOARD(propre)
+        ligne = tableau.iloc[0]
+        serie = self.base.serie_mensuelle(ligne['Ville'], ligne['Départ'], ligne['Annee'])
+        masque = ((tableau['Ville'] == ligne['Ville']) & (tableau['Départ'] == ligne['Départ'])
+                  & (tableau['Annee'] == ligne['Annee']))
+        attendu = tableau[masque].groupby('Mois')['Trains_retard'].sum()
+        self.assertEqual(serie['Mois'].tolist(), attendu.index.tolist())
+        self.assertEqual(serie['Trains_retard'].tolist(), attendu.tolist())
+        print("Regroupement et série mensuelle OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS BASE ANALYTIQUE")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestBaseAnalytique)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE LA BASE ANALYTIQUE PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,92 @@
+"""
+TESTS du cache des figures du tableau de bord
+
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from cache_figures import CacheFigures
+
+
+def figure(ville, gare, annee):
+    return go.Figure(go.Bar(x=[1, 2], y=[3, 4])).update_layout(title=f"{gare} → {ville} en {annee}")
+
+
+class TestCacheFigures(unittest.TestCase):
+    """Tests du cache LRU/TTL des figures"""
+
+    def setUp(self):
+        self.appels = []
+
+        def construire(ville, gare, annee):
+            self.appels.append((ville, gare, annee))
+            return figure(ville, gare, annee)
+        self.construire = construire
+
+    def test_figure_resservie(self):
+        """Une sélection déjà affichée n'est pas reconstruite"""
+        cache = CacheFigures(version='v1')
+        callback = cache.memoiser(self.construire)
+        premiere = callback('Albi', 'Paris-Austerlitz', 2024)
+        seconde = callback('Albi', 'Paris-Austerlitz', 2024)
+
+        self.assertIs(seconde, premiere)
+        self.assertEqual(len(self.appels), 1)
+        self.assertEqual(cache.taux_succes(), 0.5)
+        print("Figure resservie OK")
+
+    def test_taille_et_ttl(self):
+        """Les figures les plus anciennes sont évincées et les figures expirées reconstruites"""
+        cache = CacheFigures(taille_max=2)
+        callback = cache.memoiser(self.construire)
+        for annee in (2022, 2023, 2024):
+            callback('Albi', 'Paris-Austerlitz', annee)
+        callback('Albi', 'Paris-Austerlitz', 2022)
+        self.assertEqual(cache.stats['evictions'], 2)
+        self.assertEqual(len(self.appels), 4)
+
+        cache.ttl = -1
+        callback('Albi', 'Paris-Austerlitz', 2022)
+        self.assertEqual(cache.stats['expirations'], 1)
+        self.assertEqual(len(self.appels), 5)
+        print("Éviction et expiration OK")
+
+    def test_stockage_disque_partage(self):
+        """Deux processus partageant le dossier ne construisent la figure qu'une fois"""
+        with tempfile.TemporaryDirectory() as dossier:
+            worker_1 = CacheFigures(version='v1', dossier=dossier).memoiser(self.construire)
+            cache_2 = CacheFigures(version='v1', dossier=dossier)
+            worker_2 = cache_2.memoiser(self.construire)
+
+            attendu = worker_1('Tarbes', 'Paris-Austerlitz', 2023)
+            relue = worker_2('Tarbes', 'Paris-Austerlitz', 2023)
+            self.assertEqual(len(self.appels), 1)
+            self.assertEqual(cache_2.stats['hits_disque'], 1)
+            self.assertEqual(relue.layout.title.text, attendu.layout.title.text)
+
+            # Une nouvelle version des données invalide les figures
+            CacheFigures(version='v2', dossier=dossier).memoiser(self.construire)('Tarbes', 'Paris-Austerlitz', 2023)
+            self.assertEqual(len(self.appels), 2)
+        print("Stockage disque partagé OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS CACHE DES FIGURES")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCacheFigures)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU CACHE DES FIGURES PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
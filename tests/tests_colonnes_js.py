@@ -0,0 +1,73 @@
+"""
+TESTS du format colonnaire compact des pages HTML
+
+"""
+import json
+import unittest
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from colonnes_js import encoder_colonnes, decoder_colonnes, indexer_plages, type_entier
+
+NOMS = {'v': 'Ville', 'g': 'Départ', 'y': 'Annee', 'r': 'Trains_retard'}
+
+
+class TestColonnesJs(unittest.TestCase):
+    """Tests de l'encodage colonnaire"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Ville': ['Tarbes', 'Albi', 'Tarbes'],
+            'Départ': ['Paris-Austerlitz'] * 3,
+            'Annee': [2023, 2023, 2024],
+            'Trains_retard': [3, 1, 40000],
+        })
+
+    def test_aller_retour(self):
+        """Les données décodées sont identiques, en JSON comme en binaire"""
+        for binaire in (False, True):
+            charge = json.loads(json.dumps(encoder_colonnes(self.df, NOMS, ('v', 'g'), binaire)))
+            resultat = decoder_colonnes(charge, NOMS)
+            self.assertEqual(resultat['Ville'].tolist(), self.df['Ville'].tolist())
+            self.assertEqual(resultat['Trains_retard'].tolist(), self.df['Trains_retard'].tolist())
+        print("Aller-retour OK")
+
+    def test_dictionnaires_et_types(self):
+        """Les libellés sont codés par dictionnaire et les entiers au plus petit type"""
+        charge = encoder_colonnes(self.df, NOMS, ('v', 'g'), binaire=True)
+        self.assertEqual(charge['dictionnaires']['v'], ['Albi', 'Tarbes'])
+        self.assertEqual(charge['colonnes']['v']['type'], 'int8')
+        self.assertEqual(charge['colonnes']['y']['type'], 'int16')
+        self.assertEqual(charge['colonnes']['r']['type'], 'uint16')
+        self.assertEqual(type_entier(pd.Series([-1, 70000]).to_numpy()), 'int32')
+        print("Dictionnaires et types OK")
+
+    def test_index_plages(self):
+        """L'index imbriqué donne les plages de lignes de chaque combinaison"""
+        df = self.df.sort_values(['Ville', 'Annee']).reset_index(drop=True)
+        index = indexer_plages(df, ['Ville', 'Départ', 'Annee'])
+        self.assertEqual(index['Albi'], {'Paris-Austerlitz': {'2023': [0, 1]}})
+        self.assertEqual(index['Tarbes']['Paris-Austerlitz'], {'2023': [1, 2], '2024': [2, 3]})
+        with self.assertRaises(ValueError):
+            indexer_plages(self.df, ['Ville'])
+        print("Index des plages OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS FORMAT COLONNAIRE")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestColonnesJs)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU FORMAT COLONNAIRE PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,138 @@
+"""
+TESTS de la construction incrémentale du site
+
+"""
+import json
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import DataLoader
+from construction_site import Cible, construire_site
+
+CONSTRUITES = []
+
+
+def construire_page(chemin, parametres=None):
+    CONSTRUITES.append(os.path.basename(chemin))
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write("<html></html>")
+
+
+def construire_parametres(chemin, parametres=None):
+    """Page contenant les paramètres du chargeur reçus par le processus."""
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid(), **parametres}, f)
+
+
+class TestConstructionSite(unittest.TestCase):
+    """Tests de la reconstruction des seules pages dont les entrées ont changé"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+        self.sortie = os.path.join(self.dossier, 'site')
+        self.donnees = {}
+        for nom in ('a.csv', 'b.csv'):
+            self.donnees[nom] = os.path.join(self.dossier, nom)
+            with open(self.donnees[nom], 'w', encoding='utf-8') as f:
+                f.write("Date;Valeur\n2024-01;1\n")
+        script = os.path.join(self.dossier, 'script.py')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write("# générateur\n")
+
+        self.cibles = [
+            Cible('page_a.html', lambda loader: {'a.csv': self.donnees['a.csv']}, [script], construire_page),
+            Cible('page_b.html', lambda loader: {'b.csv': self.donnees['b.csv']}, [script], construire_page),
+        ]
+        self.loader = DataLoader(urls={}, cache_dir=os.path.join(self.dossier, 'cache'))
+        CONSTRUITES.clear()
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def construire(self):
+        CONSTRUITES.clear()
+        return construire_site(self.cibles, self.sortie, self.loader, parallele=False)
+
+    def test_reconstruction_incrementale(self):
+        """Seule la page dont la donnée a changé est reconstruite"""
+        self.assertEqual(set(self.construire().values()), {'reconstruite'})
+        self.assertEqual(set(self.construire().values()), {'à jour'})
+
+        with open(self.donnees['b.csv'], 'a', encoding='utf-8') as f:
+            f.write("2024-02;2\n")
+        resultat = self.construire()
+        self.assertEqual(resultat, {'page_a.html': 'à jour', 'page_b.html': 'reconstruite'})
+        self.assertEqual(CONSTRUITES, ['page_b.html'])
+        print("Reconstruction incrémentale OK")
+
+    def test_page_manquante_ou_script_modifie(self):
+        """Une page supprimée ou un script modifié déclenche la reconstruction"""
+        self.construire()
+        os.remove(os.path.join(self.sortie, 'page_a.html'))
+        self.construire()
+        self.assertEqual(CONSTRUITES, ['page_a.html'])
+
+        with open(self.cibles[0].scripts[0], 'a', encoding='utf-8') as f:
+            f.write("# modifié\n")
+        self.construire()
+        self.assertEqual(sorted(CONSTRUITES), ['page_a.html', 'page_b.html'])
+        print("Page manquante et script modifié OK")
+
+    def test_construction_parallele(self):
+        """En parallèle, chaque page est construite dans un processus avec le chargeur de l'appelant"""
+        for cible in self.cibles:
+            cible.construire = construire_parametres
+        self.loader.urls['a.csv'] = 'file:///inexistant/a.csv'
+        resultat = construire_site(self.cibles, self.sortie, self.loader, parallele=True, max_workers=2)
+        self.assertEqual(set(resultat.values()), {'reconstruite'})
+
+        for nom in ('page_a.html', 'page_b.html'):
+            with open(os.path.join(self.sortie, nom), encoding='utf-8') as f:
+                page = json.load(f)
+            self.assertNotEqual(page['pid'], os.getpid())
+            self.assertEqual(page['cache_dir'], self.loader.cache.dossier)
+            self.assertEqual(page['urls'], self.loader.urls)
+
+        resultat = construire_site(self.cibles, self.sortie, self.loader, parallele=True)
+        self.assertEqual(set(resultat.values()), {'à jour'})
+        print("Construction parallèle OK")
+
+    def test_preparation_partagee(self):
+        """Les données partagées sont préparées une fois, avant les constructions, et seulement si besoin"""
+        preparations = []
+
+        def preparer(loader):
+            self.assertIs(loader, self.loader)
+            self.assertEqual(CONSTRUITES, [])
+            preparations.append(loader)
+
+        for cible in self.cibles:
+            cible.preparer = preparer
+        self.construire()
+        self.assertEqual(len(preparations), 1)
+        self.assertEqual(sorted(CONSTRUITES), ['page_a.html', 'page_b.html'])
+
+        self.construire()
+        self.assertEqual(len(preparations), 1)
+        print("Préparation partagée OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS CONSTRUCTION DU SITE")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestConstructionSite)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE CONSTRUCTION PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
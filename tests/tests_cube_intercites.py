@@ -0,0 +1,65 @@
+"""
+TESTS du cube d'agrégats Intercités du tableau de bord
+
+"""
+import json
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from nettoyage import PIPELINE_INTERCITES, PIPELINE_DASHBOARD, concatener
+from cube_intercites import CubeIntercites
+import tests_nettoyage
+
+
+class TestCubeIntercites(unittest.TestCase):
+    """Tests du cube d'agrégats utilisé par le tableau de bord"""
+
+    def setUp(self):
+        # Mêmes données que les tests du nettoyage
+        tests_nettoyage.TestNettoyage.setUp(self)
+        self.toutes_donnees = (PIPELINE_INTERCITES + PIPELINE_DASHBOARD)(concatener(self.data_dict))
+        self.cube = CubeIntercites(self.toutes_donnees)
+
+    def test_index(self):
+        """Villes, gares et années sont disponibles sans filtrer la table"""
+        self.assertEqual(self.cube.villes, ['Albi', 'Tarbes'])
+        self.assertEqual(self.cube.gares('Tarbes'), ['Paris-Austerlitz'])
+        self.assertEqual(self.cube.annees('Tarbes', 'Paris-Austerlitz'), [2023])
+        self.assertEqual(self.cube.annees('Tarbes'), [2023])
+        self.assertEqual(self.cube.gares('Inconnue'), [])
+        print("Index du cube OK")
+
+    def test_index_client(self):
+        """L'index envoyé au navigateur est sérialisable et cohérent avec le cube"""
+        index = json.loads(json.dumps(self.cube.index_client()))
+        self.assertEqual(sorted(index), self.cube.villes)
+        self.assertEqual(index['Albi'], {'gares': ['Paris-Austerlitz'], 'annees': {'Paris-Austerlitz': [2023]}})
+        print("Index navigateur OK")
+
+    def test_tranche_identique_au_filtrage(self):
+        """La tranche mensuelle correspond au filtrage de la table complète"""
+        tranche = self.cube.tranche('Tarbes', 'Paris-Austerlitz', 2023)
+        attendu = self.toutes_donnees[self.toutes_donnees['Ville'] == 'Tarbes'].sort_values('Date_complete')
+        self.assertEqual(list(tranche.index), [1, 2])
+        self.assertEqual(list(tranche['Trains_retard']), list(attendu['Trains_retard']))
+        self.assertTrue(self.cube.tranche('Tarbes', 'Paris-Austerlitz', 1999).empty)
+        print("Tranche du cube OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS CUBE INTERCITÉS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCubeIntercites)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU CUBE INTERCITÉS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,115 @@
+"""
+TESTS du tableau de bord Dash et de son point d'entrée WSGI
+
+"""
+import unittest
+import os
+import sys
+import importlib
+from unittest import mock
+
+import flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+import code_graph_interactif_retard_annulation_intercite as dashboard
+from code_graph_interactif_retard_annulation_intercite import creer_app
+from sources_locales import AvecSourcesLocales
+
+FICHIERS = {
+    'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+    'toulouse_intercites': 'toulouse_matabiau_retard_arrivee_intercites.csv',
+}
+
+
+def requete_graphique(ville, gare=None, annee=None):
+    """Corps de la requête envoyée par le navigateur pour le callback du graphique."""
+    return {
+        'output': 'graphique.figure',
+        'outputs': {'id': 'graphique', 'property': 'figure'},
+        'inputs': [{'id': 'ville-dropdown', 'property': 'value', 'value': ville},
+                   {'id': 'gare-dropdown', 'property': 'value', 'value': gare},
+                   {'id': 'annee-dropdown', 'property': 'value', 'value': annee}],
+        'changedPropIds': ['ville-dropdown.value'],
+        'state': [],
+    }
+
+
+class TestDashboard(AvecSourcesLocales):
+    """Tests de creer_app et de wsgi_dashboard sur des sources locales"""
+
+    FICHIERS = FICHIERS
+
+    def setUp(self):
+        super().setUp()
+        self.figures = os.path.join(self.dossier, 'figures')
+
+    def test_layout(self):
+        """Dropdowns alimentés par le cube, index envoyé au navigateur"""
+        app = creer_app(loader=self.loader(), dossier_figures=self.figures)
+        composants = {c.id: c for c in app.layout._traverse() if getattr(c, 'id', None)}
+        for id_ in ['index-store', 'ville-dropdown', 'gare-dropdown', 'annee-dropdown', 'graphique']:
+            self.assertIn(id_, composants)
+        self.assertEqual(app.cube.villes, ['Tarbes', 'Toulouse'])
+        self.assertEqual([o['value'] for o in composants['ville-dropdown'].options], app.cube.villes)
+        self.assertEqual(composants['ville-dropdown'].value, 'Tarbes')
+        self.assertEqual(composants['index-store'].data, app.cube.index_client())
+        print("Layout OK")
+
+    def test_callbacks(self):
+        """Cascade exécutée dans le navigateur, graphique construit par le serveur puis mis en cache"""
+        app = creer_app(loader=self.loader(), dossier_figures=self.figures)
+        # Seul le graphique a une fonction Python : la cascade est en JavaScript
+        serveur = [sortie for sortie, c in app.callback_map.items() if 'callback' in c]
+        navigateur = [sortie for sortie, c in app.callback_map.items() if 'callback' not in c]
+        self.assertEqual(serveur, ['graphique.figure'])
+        self.assertEqual(len(navigateur), 2)
+        self.assertTrue(any('gare-dropdown.options' in s for s in navigateur))
+        self.assertTrue(any('annee-dropdown.options' in s for s in navigateur))
+
+        client = app.server.test_client()
+        reponse = client.post('/_dash-update-component', json=requete_graphique('Tarbes'))
+        self.assertEqual(reponse.status_code, 200)
+        figure = reponse.get_json()['response']['graphique']['figure']
+        annee = app.cube.annees('Tarbes', app.cube.gares('Tarbes')[0])[0]
+        self.assertTrue(figure['layout']['title']['text'].endswith(f"Tarbes en {annee}"))
+        self.assertEqual(len(figure['data']), 4)
+        self.assertTrue(os.listdir(self.figures))
+
+        vide = client.post('/_dash-update-component', json=requete_graphique(None)).get_json()
+        self.assertEqual(vide['response']['graphique']['figure']['layout']['title']['text'],
+                         "Sélectionnez une ville")
+        print("Callbacks OK")
+
+    def test_wsgi(self):
+        """wsgi_dashboard expose l'application Flask importée par gunicorn"""
+        sys.modules.pop('wsgi_dashboard', None)
+        with mock.patch.object(dashboard, 'DataLoader', return_value=self.loader()), \
+                mock.patch.dict(os.environ, {'CACHE_FIGURES': self.figures}):
+            wsgi_dashboard = importlib.import_module('wsgi_dashboard')
+        self.addCleanup(sys.modules.pop, 'wsgi_dashboard', None)
+
+        self.assertIsInstance(wsgi_dashboard.server, flask.Flask)
+        self.assertIs(wsgi_dashboard.server, wsgi_dashboard.app.server)
+        client = wsgi_dashboard.server.test_client()
+        self.assertEqual(client.get('/').status_code, 200)
+        layout = client.get('/_dash-layout')
+        self.assertEqual(layout.status_code, 200)
+        self.assertIn('ville-dropdown', layout.get_data(as_text=True))
+        print("Point d'entrée WSGI OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS TABLEAU DE BORD")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDashboard)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU TABLEAU DE BORD PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
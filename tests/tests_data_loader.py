@@ -1,6 +1,21 @@
 import pandas as pd
 import unittest
 import os
+import sys
+import tempfile
+import threading
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import quote
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import DataLoader
+from cache_donnees import CacheDonnees, sha256_fichier
+
+# Dossier des CSV servis par le serveur HTTP local (remplace Google Drive)
+DOSSIER_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'base_de_donnees_version_csv')
 
 class TestDataLoader(unittest.TestCase):
     """Tests pour la classe DataLoader"""
@@ -124,12 +139,182 @@ class TestDataLoader(unittest.TestCase):
         
         print("Filtrage type train OK")
 
+class _HandlerSilencieux(SimpleHTTPRequestHandler):
+    """Serveur de fichiers statiques sans journalisation des requêtes"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _AvecServeurLocal(unittest.TestCase):
+    """Démarre un serveur HTTP local servant les CSV du dépôt"""
+
+    FICHIERS = {
+        'albi_intercites': 'albi_retard_arrivee_intercites.csv',
+        'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+        'montpellier_tgv': 'montpellier_retard_arrivee+depart_tgv.csv',
+        'france_intercites': 'retard_france_intercites.csv',
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        handler = partial(_HandlerSilencieux, directory=DOSSIER_CSV)
+        cls.serveur = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        cls.thread = threading.Thread(target=cls.serveur.serve_forever, daemon=True)
+        cls.thread.start()
+        port = cls.serveur.server_address[1]
+        cls.urls = {
+            nom: f"http://127.0.0.1:{port}/{quote(fichier)}"
+            for nom, fichier in cls.FICHIERS.items()
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.serveur.shutdown()
+        cls.serveur.server_close()
+
+
+class TestChargementParallele(_AvecServeurLocal):
+    """Tests du chargement concurrent de DataLoader contre un serveur HTTP local"""
+
+    def charger(self, **options):
+        with tempfile.TemporaryDirectory() as cache:
+            loader = DataLoader(urls=self.urls, cache_dir=cache)
+            return loader.load_all_data(**options)
+
+    def test_parallele_identique_au_sequentiel(self):
+        """Le mode parallèle renvoie le même data_dict que le mode séquentiel"""
+        sequentiel = self.charger()
+        parallele = self.charger(parallel=True, max_workers=4)
+
+        self.assertEqual(list(sequentiel), list(self.FICHIERS))
+        self.assertEqual(list(parallele), list(sequentiel))
+        for nom in sequentiel:
+            pd.testing.assert_frame_equal(parallele[nom], sequentiel[nom])
+        print("Chargement parallèle OK")
+
+    def test_lecture_dans_des_processus(self):
+        """La lecture des CSV dans un pool de processus donne le même résultat"""
+        sequentiel = self.charger()
+        processus = self.charger(parallel=True, max_workers=2, process_parse=True)
+
+        self.assertEqual(list(processus), list(sequentiel))
+        for nom in sequentiel:
+            pd.testing.assert_frame_equal(processus[nom], sequentiel[nom])
+        print("Lecture multi-processus OK")
+
+    def test_fichier_absent_ignore(self):
+        """Un fichier introuvable est ignoré sans bloquer les autres"""
+        urls = dict(self.urls, absent=self.urls['albi_intercites'] + '_absent')
+        with tempfile.TemporaryDirectory() as cache:
+            donnees = DataLoader(urls=urls, cache_dir=cache).load_all_data(parallel=True)
+
+        self.assertNotIn('absent', donnees)
+        self.assertEqual(len(donnees), len(self.FICHIERS))
+        print("Fichier absent ignoré OK")
+
+
+class TestCacheDonnees(_AvecServeurLocal):
+    """Tests du cache local adressé par contenu"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def test_revalidation_conditionnelle(self):
+        """Un second chargement revalide les fichiers (304) sans les retélécharger"""
+        premier = DataLoader(urls=self.urls, cache_dir=self.dossier)
+        premier.load_all_data()
+        self.assertEqual(premier.cache.stats['misses'], len(self.urls))
+
+        second = DataLoader(urls=self.urls, cache_dir=self.dossier)
+        donnees = second.load_all_data()
+        self.assertEqual(len(donnees), len(self.urls))
+        self.assertEqual(second.cache.stats['misses'], 0)
+        self.assertEqual(second.cache.stats['revalidations'], len(self.urls))
+        self.assertEqual(second.cache.taux_succes(), 1.0)
+        print("Revalidation conditionnelle OK")
+
+    def test_empreintes_adressees_par_contenu(self):
+        """Le fichier en cache porte l'empreinte SHA-256 de son contenu"""
+        cache = CacheDonnees(self.dossier)
+        chemin = cache.recuperer('albi_intercites', self.urls['albi_intercites'])
+        source = os.path.join(DOSSIER_CSV, self.FICHIERS['albi_intercites'])
+
+        self.assertEqual(os.path.basename(chemin), sha256_fichier(source))
+        self.assertEqual(cache.empreinte('albi_intercites'), sha256_fichier(source))
+        print("Adressage par contenu OK")
+
+    def test_registre_fige_sans_reseau(self):
+        """Avec un registre figé, les fichiers à jour sont servis sans requête"""
+        DataLoader(urls=self.urls, cache_dir=self.dossier).load_all_data()
+        registre = os.path.join(self.dossier, 'registre.json')
+        CacheDonnees(self.dossier).figer_registre(registre)
+
+        loader = DataLoader(urls=self.urls, cache_dir=self.dossier, registry=registre)
+        loader.load_all_data()
+        self.assertEqual(loader.cache.stats['hits'], len(self.urls))
+        self.assertEqual(loader.cache.stats['revalidations'], 0)
+        print("Registre figé OK")
+
+    def test_registre_different_du_cache(self):
+        """Empreinte figée différente du cache : téléchargement sans condition"""
+        cache = CacheDonnees(self.dossier)
+        cache.recuperer('albi_intercites', self.urls['albi_intercites'])
+        cache.recuperer('tarbes_intercites', self.urls['tarbes_intercites'])
+        # Version en cache périmée (contenu d'un autre fichier)
+        attendu = cache.empreinte('albi_intercites')
+        with cache._verrou:
+            cache.index['albi_intercites']['sha256'] = cache.empreinte('tarbes_intercites')
+            cache._sauver_index()
+
+        fige = CacheDonnees(self.dossier, registre={'albi_intercites': attendu})
+        with mock.patch('cache_donnees.urllib.request.urlopen', wraps=urllib.request.urlopen) as ouverture:
+            chemin = fige.recuperer('albi_intercites', self.urls['albi_intercites'])
+        requete = ouverture.call_args[0][0]
+        self.assertIsNone(requete.get_header('If-none-match'))
+        self.assertIsNone(requete.get_header('If-modified-since'))
+        self.assertEqual(os.path.basename(chemin), attendu)
+        self.assertEqual(fige.empreinte('albi_intercites'), attendu)
+        self.assertEqual((fige.stats['misses'], fige.stats['revalidations']), (1, 0))
+        print("Registre différent du cache OK")
+
+    def test_empreinte_incorrecte_rejetee(self):
+        """Un contenu différent de l'empreinte du registre est refusé"""
+        cache = CacheDonnees(self.dossier, registre={'albi_intercites': '0' * 64})
+        with self.assertRaises(ValueError):
+            cache.recuperer('albi_intercites', self.urls['albi_intercites'])
+        self.assertIsNone(cache.empreinte('albi_intercites'))
+        print("Empreinte incorrecte OK")
+
+    def test_mode_hors_ligne(self):
+        """Le mode hors ligne sert le cache et échoue proprement sinon"""
+        vide = CacheDonnees(self.dossier, hors_ligne=True)
+        with self.assertRaises(FileNotFoundError):
+            vide.recuperer('albi_intercites', self.urls['albi_intercites'])
+
+        DataLoader(urls=self.urls, cache_dir=self.dossier).load_all_data()
+        loader = DataLoader(urls=self.urls, cache_dir=self.dossier, offline=True)
+        donnees = loader.load_all_data()
+        self.assertEqual(len(donnees), len(self.urls))
+        self.assertEqual(loader.cache.stats['hits'], len(self.urls))
+        self.assertEqual(loader.cache.stats['revalidations'], 0)
+        print("Mode hors ligne OK")
+
+
 if __name__ == "__main__":
     print("\n" + "="*50)
     print("TESTS DATA LOADER")
     print("="*50)
     
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestDataLoader)
+    suite = unittest.TestSuite([
+        unittest.TestLoader().loadTestsFromTestCase(TestDataLoader),
+        unittest.TestLoader().loadTestsFromTestCase(TestChargementParallele),
+        unittest.TestLoader().loadTestsFromTestCase(TestCacheDonnees),
+    ])
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
     
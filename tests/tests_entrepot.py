@@ -0,0 +1,156 @@
+"""
+TESTS de l'entrepôt incrémental partitionné
+
+"""
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import read_csv_file
+import pandas as pd
+import pyarrow
+import pyarrow.parquet as pq
+
+from agregation_ponderee import agreger_ponderes
+from entrepot import CLE_MOIS_AGREGES, Entrepot, mettre_a_jour, agreger, indicateurs, preparer
+from sources_locales import AvecSourcesLocales
+
+FICHIERS = {
+    'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+    'montpellier_tgv': 'montpellier_retard_arrivee+depart_tgv.csv',
+}
+
+
+class TestEntrepot(AvecSourcesLocales):
+    """Tests de l'ingestion des seuls nouveaux mois"""
+
+    FICHIERS = FICHIERS
+
+    def setUp(self):
+        super().setUp()
+        self.entrepot = Entrepot(os.path.join(self.dossier, 'entrepot'))
+
+    def test_ajout_des_nouveaux_mois(self):
+        """Seul le mois ajouté au fichier source est ingéré"""
+        premier = mettre_a_jour(self.loader(), self.entrepot)
+        self.assertGreater(len(premier['tarbes_intercites']), 12)
+        self.assertEqual(mettre_a_jour(self.loader(), self.entrepot),
+                         {nom: [] for nom in FICHIERS})
+
+        with open(self.chemins['tarbes_intercites'], 'a', encoding='utf-8') as f:
+            f.write("2030-01;PARIS-AUSTERLITZ;TARBES;20;20;0;2;90.0;9.0\n")
+        ajouts = mettre_a_jour(self.loader(), self.entrepot)
+        self.assertEqual(ajouts, {'tarbes_intercites': ['2030-01'], 'montpellier_tgv': []})
+        self.assertTrue(os.path.exists(
+            self.entrepot.chemin_partition('intercites', '2030-01', 'tarbes_intercites')))
+        self.assertEqual(len(self.entrepot.lire('intercites', debut='2030-01')), 1)
+        print("Ajout des nouveaux mois OK")
+
+    def test_agregats_incrementaux(self):
+        """Les agrégats mis à jour par lots égalent un recalcul complet"""
+        nom = 'tarbes_intercites'
+        df = read_csv_file(self.chemins[nom], 'intercites')
+        dates = df['Date'].astype(str)
+        coupure = sorted(dates.unique())[dates.nunique() // 2]
+        self.entrepot.ingerer(nom, df[dates < coupure])
+        self.entrepot.ingerer(nom, df)
+
+        incremental = self.entrepot.agregats('intercites')
+        complet = indicateurs(agreger(preparer(nom, df), 'intercites'), 'intercites')
+        colonnes = ['Trains_programmés', 'Trains_retard', 'nb_mois', 'Taux_régularité', 'Taux_retard']
+        self.assertEqual(incremental[colonnes].to_dict('records'), complet[colonnes].to_dict('records'))
+        print("Agrégats incrémentaux OK")
+
+    def test_reprise_apres_arret(self):
+        """Un arrêt entre l'écriture des agrégats et celle de l'état ne compte pas deux fois les mois"""
+        nom = 'tarbes_intercites'
+        df = read_csv_file(self.chemins[nom], 'intercites')
+        dates = df['Date'].astype(str)
+        coupure = sorted(dates.unique())[dates.nunique() // 2]
+        self.entrepot.ingerer(nom, df[dates < coupure])
+
+        def arret():
+            raise KeyboardInterrupt("arrêt simulé")
+
+        self.entrepot._sauver_etat = arret
+        with self.assertRaises(KeyboardInterrupt):
+            self.entrepot.ingerer(nom, df)
+
+        # Nouvelle exécution : l'état sur disque ne contient pas les mois agrégés
+        reprise = Entrepot(self.entrepot.dossier)
+        self.assertFalse(any(m >= coupure for m in reprise.mois('intercites', nom)))
+        ajoutes = reprise.ingerer(nom, df)
+        self.assertEqual(ajoutes, sorted(set(dates[dates >= coupure])))
+
+        complet = indicateurs(agreger(preparer(nom, df), 'intercites'), 'intercites')
+        colonnes = ['Trains_programmés', 'Trains_retard', 'nb_mois', 'Taux_régularité']
+        self.assertEqual(reprise.agregats('intercites')[colonnes].to_dict('records'),
+                         complet[colonnes].to_dict('records'))
+        self.assertEqual(len(reprise.lire('intercites')), len(preparer(nom, df)))
+        print("Reprise après arrêt OK")
+
+    def test_taux_ponderes(self):
+        """Les taux de l'entrepôt sont ceux de agregation_ponderee (régularité pondérée par le trafic)"""
+        nom = 'tarbes_intercites'
+        df = read_csv_file(self.chemins[nom], 'intercites')
+        dates = df['Date'].astype(str)
+        coupure = sorted(dates.unique())[dates.nunique() // 2]
+        self.entrepot.ingerer(nom, df[dates < coupure])
+        self.entrepot.ingerer(nom, df)
+
+        attendu = agreger_ponderes(preparer(nom, df))
+        obtenu = self.entrepot.agregats('intercites')
+        self.assertEqual(obtenu.columns.tolist(), attendu.columns.tolist())
+        pd.testing.assert_frame_equal(obtenu.astype({'Départ': str, 'Arrivée': str}),
+                                      attendu.astype({'Départ': str, 'Arrivée': str}), check_dtype=False)
+
+        tgv = read_csv_file(self.chemins['montpellier_tgv'], 'tgv')
+        self.entrepot.ingerer('montpellier_tgv', tgv)
+        agregats = self.entrepot.agregats('tgv')
+        self.assertNotIn('Taux_régularité', agregats.columns)
+        ligne = agregats.iloc[0]
+        self.assertEqual(ligne['Taux_retard'], round(
+            ligne["Nombre de trains en retard à l'arrivée"] / ligne['Trains_circulés'] * 100, 1))
+        print("Taux pondérés OK")
+
+    def test_agregats_anciens_recalcules(self):
+        """Des agrégats d'une version antérieure (moyenne simple) sont recalculés depuis les partitions"""
+        nom = 'tarbes_intercites'
+        df = read_csv_file(self.chemins[nom], 'intercites')
+        dates = df['Date'].astype(str)
+        coupure = sorted(dates.unique())[dates.nunique() // 2]
+        self.entrepot.ingerer(nom, df[dates < coupure])
+
+        # Fichier d'agrégats de l'ancien format, avec sa liste de mois
+        chemin = self.entrepot._chemin_agregats('intercites')
+        metadonnees = pq.read_schema(chemin).metadata
+        ancien = pd.DataFrame({'Départ': ['X'], 'Arrivée': ['Y'], 'Trains_programmés': [1],
+                               'somme_taux': [50.0], 'nb_taux': [1], 'nb_mois': [1]})
+        table = pyarrow.Table.from_pandas(ancien, preserve_index=False)
+        pq.write_table(table.replace_schema_metadata(
+            {**table.schema.metadata, CLE_MOIS_AGREGES: metadonnees[CLE_MOIS_AGREGES]}), chemin)
+
+        self.entrepot.ingerer(nom, df)
+        attendu = agreger_ponderes(preparer(nom, df))
+        obtenu = self.entrepot.agregats('intercites')
+        self.assertEqual(obtenu['Trains_programmés'].tolist(), attendu['Trains_programmés'].tolist())
+        self.assertEqual(obtenu['nb_mois'].tolist(), attendu['nb_mois'].tolist())
+        print("Agrégats anciens recalculés OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS ENTREPÔT INCRÉMENTAL")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestEntrepot)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE L'ENTREPÔT PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,136 @@
+"""
+TESTS de l'export en fragments de la page retards / annulations
+
+"""
+import hashlib
+import json
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'visualisation'))
+from data_loader import read_csv_file
+from nettoyage import PIPELINE_DASHBOARD, PIPELINE_INTERCITES, nettoyer_intercites
+from cube_intercites import CubeIntercites
+from colonnes_js import decoder_colonnes
+from creation_html_graph_interactif_retard_annulation_intercites import (
+    NOMS_CHARGE, dossier_fragments, ecrire_fragments, generer_html)
+
+DOSSIER_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'base_de_donnees_version_csv')
+
+FICHIERS_INTERCITES = {
+    'albi_intercites': 'albi_retard_arrivee_intercites.csv',
+    'nimes_intercites': 'nimes_retard_arrivee_intercites.csv',
+    'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+}
+
+
+class TestFragments(unittest.TestCase):
+    """Tests des fragments par ville, de leurs noms à empreinte et de leur index"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+        data_dict = {nom: read_csv_file(os.path.join(DOSSIER_CSV, f), 'intercites')
+                     for nom, f in FICHIERS_INTERCITES.items()}
+        self.toutes_donnees = PIPELINE_DASHBOARD(nettoyer_intercites(data_dict, PIPELINE_INTERCITES))
+        cube = CubeIntercites(self.toutes_donnees)
+        self.mensuel = cube.cube.reset_index()
+        self.catalogue = cube.index_client()
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def lire(self, dossier, fichier):
+        with open(os.path.join(dossier, fichier), 'rb') as f:
+            return f.read()
+
+    def test_un_fragment_par_ville(self):
+        """Un fichier par ville, nommé d'après l'empreinte de son contenu, et un manifeste"""
+        dossier = os.path.join(self.dossier, 'fragments')
+        manifeste = ecrire_fragments(self.mensuel, self.catalogue, dossier)
+
+        self.assertEqual(sorted(manifeste), sorted(self.catalogue))
+        self.assertEqual(manifeste['Nîmes'].split('.')[0], 'nimes')
+        for fichier in manifeste.values():
+            contenu = self.lire(dossier, fichier)
+            self.assertEqual(fichier.split('.')[1], hashlib.sha256(contenu).hexdigest()[:12])
+        self.assertEqual(sorted(os.listdir(dossier)), sorted(list(manifeste.values()) + ['manifeste.json']))
+
+        with open(os.path.join(dossier, 'manifeste.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'villes': self.catalogue, 'fichiers': manifeste})
+        print("Un fragment par ville OK")
+
+    def test_noms_stables_et_obsoletes_supprimes(self):
+        """Seul le fragment d'une ville modifiée change de nom ; l'ancien est supprimé"""
+        dossier = os.path.join(self.dossier, 'fragments')
+        premier = ecrire_fragments(self.mensuel, self.catalogue, dossier)
+        self.assertEqual(ecrire_fragments(self.mensuel, self.catalogue, dossier), premier)
+
+        modifie = self.mensuel.copy()
+        modifie.loc[modifie['Ville'] == 'Tarbes', 'Trains_retard'] += 1
+        second = ecrire_fragments(modifie, self.catalogue, dossier)
+        self.assertNotEqual(second['Tarbes'], premier['Tarbes'])
+        self.assertEqual({v: f for v, f in second.items() if v != 'Tarbes'},
+                         {v: f for v, f in premier.items() if v != 'Tarbes'})
+        self.assertFalse(os.path.exists(os.path.join(dossier, premier['Tarbes'])))
+        print("Noms stables et fragments obsolètes OK")
+
+    def test_index_aligne_sur_les_lignes(self):
+        """Chaque plage de l'index d'un fragment couvre exactement les lignes de sa gare et de son année"""
+        dossier = os.path.join(self.dossier, 'fragments')
+        for binaire in (False, True):
+            manifeste = ecrire_fragments(self.mensuel, self.catalogue, dossier, binaire=binaire)
+            for ville, fichier in manifeste.items():
+                fragment = json.loads(self.lire(dossier, fichier))
+                lignes = decoder_colonnes(fragment['charge'], NOMS_CHARGE)
+                attendu = self.mensuel[self.mensuel['Ville'] == ville]
+                self.assertEqual(len(lignes), len(attendu))
+                self.assertEqual(lignes['Trains_retard'].sum(), attendu['Trains_retard'].sum())
+
+                couvertes = 0
+                for gare, annees in fragment['index'].items():
+                    for annee, (debut, fin) in annees.items():
+                        plage = lignes.iloc[debut:fin]
+                        self.assertTrue((plage['Départ'] == gare).all())
+                        self.assertTrue((plage['Annee'] == int(annee)).all())
+                        couvertes += fin - debut
+                self.assertEqual(couvertes, len(lignes))
+        print("Index aligné sur les lignes OK")
+
+    def test_page_en_mode_fragments(self):
+        """La page n'intègre que le catalogue et pointe vers le dossier des fragments"""
+        chemin = os.path.join(self.dossier, 'page.html')
+        generer_html(self.toutes_donnees, chemin, fragments=True)
+        with open(chemin, encoding='utf-8') as f:
+            html = f.read()
+
+        dossier = dossier_fragments(chemin)
+        with open(os.path.join(dossier, 'manifeste.json'), encoding='utf-8') as f:
+            manifeste = json.load(f)['fichiers']
+        self.assertIn('const CHARGE = null;', html)
+        self.assertIn('const INDEX = null;', html)
+        source = json.dumps({'dossier': os.path.basename(dossier), 'fichiers': manifeste},
+                            ensure_ascii=False, separators=(',', ':'))
+        self.assertIn(f'const FRAGMENTS = {source};', html)
+        self.assertTrue(all(os.path.exists(os.path.join(dossier, f)) for f in manifeste.values()))
+        print("Page en mode fragments OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS FRAGMENTS DE LA PAGE RETARDS / ANNULATIONS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestFragments)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DES FRAGMENTS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,137 @@
+"""
+TESTS de la dimension des gares
+
+"""
+import glob
+import unittest
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import read_csv_file
+from gares import DOSSIER_CSV, DimensionGares, normaliser
+
+
+class TestGares(unittest.TestCase):
+    """Tests de la normalisation des noms et des identifiants de gares"""
+
+    def setUp(self):
+        self.dimension = DimensionGares.depuis_reference()
+
+    def test_normaliser(self):
+        """Majuscules, sans accents ni ponctuation, abréviations développées"""
+        self.assertEqual(normaliser('Béziers'), 'BEZIERS')
+        self.assertEqual(normaliser('TOULOUSE-MATABIAU'), normaliser('Toulouse Matabiau'))
+        self.assertEqual(normaliser('BORDEAUX-ST-JEAN'), 'BORDEAUX SAINT JEAN')
+        self.assertEqual(normaliser('ALBI/RODEZ'), 'ALBI/RODEZ')
+        print("Normalisation OK")
+
+    def test_ecritures_reference(self):
+        """Les écritures d'une même gare de référence ont le même identifiant et son code UIC"""
+        ecritures = pd.Series(['NIMES', 'NÎMES', 'Nîmes', 'TOULOUSE-MATABIAU', 'Toulouse Matabiau',
+                               'LATOUR-DE-CAROL', 'BÉZIERS', 'Beziers', None])
+        identifiants = self.dimension.identifier(ecritures)
+        self.assertEqual(identifiants.dtype, 'int32')
+        self.assertEqual(len(set(identifiants[:3])), 1)
+        self.assertEqual(identifiants[3], identifiants[4])
+        self.assertEqual(identifiants[6], identifiants[7])
+        self.assertEqual(identifiants[-1], -1)
+
+        codes = self.dimension.code_uic(identifiants)
+        self.assertEqual(codes[0], 87775007)
+        self.assertEqual(codes[3], 87611004)
+        self.assertEqual(codes[5], 87611483)
+        self.assertTrue(pd.isna(codes.iloc[-1]))
+        print("Écritures de la référence OK")
+
+    def test_gare_inconnue(self):
+        """Une gare hors référence est ajoutée sans code UIC ; les préfixes ambigus ne sont pas rapprochés"""
+        taille = len(self.dimension)
+        lyon = self.dimension.identifiant('LYON-PART-DIEU')
+        self.assertEqual(self.dimension.identifiant('LYON PART DIEU'), lyon)
+        self.assertEqual(len(self.dimension), taille + 1)
+        self.assertTrue(pd.isna(self.dimension.code_uic([lyon])[0]))
+        # Deux gares de référence pour une ville sans alias : pas de choix arbitraire
+        foix = DimensionGares(pd.DataFrame({'Nom de la gare': ['Foix Centre', 'Foix Nord'],
+                                            'Code UIC': [1, 2]}))
+        self.assertEqual(foix.identifiant('FOIX'), 2)
+        self.assertTrue(pd.isna(foix.code_uic([2])[0]))
+        print("Gare inconnue OK")
+
+    def test_alias_et_terminus_multiples(self):
+        """Ville à plusieurs gares : gare retenue explicitement ; 'A/B' : première partie connue"""
+        codes = {nom: self.dimension.code_uic([self.dimension.identifiant(nom)])[0]
+                 for nom in ['MONTPELLIER', 'ALBI/RODEZ', 'RODEZ/ALBI', 'CERBERE/TOULOUSE',
+                             'TOULOUSE-MATABIAU/CERBERE', 'HENDAYE/LOURDES']}
+        self.assertEqual(codes['MONTPELLIER'], 87773002)
+        self.assertEqual(codes['ALBI/RODEZ'], 87615005)
+        self.assertEqual(codes['RODEZ/ALBI'], 87615005)
+        self.assertEqual(codes['CERBERE/TOULOUSE'], 87785006)
+        self.assertEqual(codes['TOULOUSE-MATABIAU/CERBERE'], 87611004)
+        self.assertTrue(pd.isna(codes['HENDAYE/LOURDES']))
+        print("Alias et terminus multiples OK")
+
+    def test_gares_des_fichiers(self):
+        """Toute écriture d'une gare de référence dans les fichiers Intercités et TGV a son code UIC"""
+        ecritures = set()
+        for chemin in glob.glob(os.path.join(DOSSIER_CSV, '*_intercites.csv')):
+            df = read_csv_file(chemin, 'intercites')
+            ecritures |= set(df['Départ'].dropna().astype(str)) | set(df['Arrivée'].dropna().astype(str))
+        for chemin in glob.glob(os.path.join(DOSSIER_CSV, '*_tgv.csv')):
+            df = read_csv_file(chemin, 'tgv').rename(columns=str.strip)
+            ecritures |= (set(df['Gare de départ'].dropna().astype(str))
+                          | set(df["Gare d'arrivée"].dropna().astype(str)))
+
+        villes = {cle.split()[0] for cle in self.dimension.table['cle']}
+        occitanie = sorted(e for e in ecritures
+                           if any(partie.split()[0] in villes for partie in normaliser(e).split('/') if partie))
+        self.assertGreater(len(occitanie), 15)
+        codes = self.dimension.code_uic(self.dimension.identifier(pd.Series(occitanie)))
+        self.assertEqual([e for e, code in zip(occitanie, codes) if pd.isna(code)], [])
+        print("Gares des fichiers OK")
+
+    def test_categories_et_encodage(self):
+        """Catégorie aux libellés canoniques et colonnes '<colonne>_id'"""
+        df = pd.DataFrame({'Départ': ['NIMES', 'TOULOUSE-MATABIAU'], 'Arrivée': ['Nîmes', None]})
+        categories = self.dimension.categories(df['Départ'])
+        self.assertEqual(categories.tolist(), ['Nîmes', 'Toulouse Matabiau'])
+        self.assertEqual(list(categories.cat.codes), list(self.dimension.identifier(df['Départ'])))
+
+        encode = self.dimension.encoder(df, ['Départ', 'Arrivée', 'Absente'])
+        self.assertEqual(list(encode.columns), ['Départ', 'Arrivée', 'Départ_id', 'Arrivée_id'])
+        self.assertEqual(encode['Départ_id'][0], encode['Arrivée_id'][0])
+        self.assertEqual(encode['Arrivée_id'][1], -1)
+        print("Catégories et encodage OK")
+
+    def test_sauver_charger(self):
+        """Les identifiants (gares ajoutées et alias) sont conservés d'une exécution à l'autre"""
+        ecritures = pd.Series(['CAEN', 'NÎMES', 'LATOUR-DE-CAROL', 'PARIS-BERCY'])
+        identifiants = self.dimension.identifier(ecritures)
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, 'gares.json')
+            self.dimension.sauver(chemin)
+            recharge = DimensionGares.charger(chemin)
+        self.assertEqual(list(recharge.identifier(ecritures)), list(identifiants))
+        pd.testing.assert_frame_equal(recharge.table, self.dimension.table)
+        self.assertEqual(recharge.alias, self.dimension.alias)
+        print("Sauvegarde et rechargement OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS DIMENSION DES GARES")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestGares)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE LA DIMENSION DES GARES PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
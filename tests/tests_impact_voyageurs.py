@@ -0,0 +1,148 @@
+"""
+TESTS de l'impact des retards pondéré par la fréquentation
+
+"""
+import unittest
+import os
+import sys
+import shutil
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from data_loader import DataLoader, read_csv_file
+from gares import FICHIER_REFERENCE, DimensionGares
+from lecteur_csv import lire_csv
+from nettoyage import PIPELINE_INTERCITES, nettoyer_intercites
+import impact_voyageurs
+from impact_voyageurs import (NOM_FREQUENTATION, calculer, charger_impact, chemin_defaut,
+                              frequentation_longue, moyennes_ponderees)
+from snapshot_intercites import lire_cle
+from sources_locales import DOSSIER_CSV, AvecSourcesLocales
+
+FICHIERS = {
+    'toulouse_intercites': 'toulouse_matabiau_retard_arrivee_intercites.csv',
+    'beziers_intercites': 'beziers_retard_arrivee_intercites.csv',
+}
+
+
+class TestImpactVoyageurs(AvecSourcesLocales):
+    """Tests de la jointure fréquentation x retards et de sa mise en cache"""
+
+    FICHIERS = FICHIERS
+
+    def setUp(self):
+        super().setUp()
+        self.frequentation = lire_csv(FICHIER_REFERENCE, 'frequentation')
+        self.dimension = DimensionGares(self.frequentation)
+        self.df = nettoyer_intercites({nom: read_csv_file(os.path.join(DOSSIER_CSV, f), 'intercites')
+                                       for nom, f in FICHIERS.items()}, PIPELINE_INTERCITES)
+
+    def test_frequentation_longue(self):
+        """Une ligne par gare et par année, mêmes valeurs que les colonnes larges"""
+        longue = frequentation_longue(self.frequentation, self.dimension)
+        self.assertEqual(len(longue), self.frequentation.filter(regex=r'^Total Voyageurs \d{4}$').notna().sum().sum())
+        toulouse = self.dimension.identifiant('Toulouse Matabiau')
+        ligne = longue[(longue['gare_id'] == toulouse) & (longue['Annee'] == 2024)]
+        self.assertEqual(ligne['voyageurs'].iloc[0], 14522596)
+        print("Fréquentation au format long OK")
+
+    def test_impact(self):
+        """Voyageurs concernés = voyageurs x taux, écritures d'une même gare regroupées"""
+        impact = calculer(self.df, self.frequentation, self.dimension)
+        self.assertFalse(impact.duplicated(['gare_id', 'Annee']).any())
+        self.assertIn('Toulouse Matabiau', set(impact['Gare']))
+        self.assertEqual(set(impact.loc[impact['Gare'] == 'Béziers', 'Code UIC']), {87781005})
+
+        np.testing.assert_allclose(impact['voyageurs_retardes'],
+                                   impact['voyageurs'] * impact['Taux_retard'] / 100)
+        self.assertTrue((impact['voyageurs_retardes_bas'] <= impact['voyageurs_retardes_haut']).all())
+        parts = impact.groupby('Annee')['part_voyageurs'].sum()
+        self.assertTrue(((parts - 100).abs() < 1e-9).all())
+
+        # Trains de Toulouse : ceux qui en partent ou y arrivent, toutes écritures confondues
+        toulouse = self.df[self.df['Départ'].str.upper().str.startswith('TOULOUSE')
+                           | self.df['Arrivée'].str.upper().str.startswith('TOULOUSE')]
+        attendu = toulouse[toulouse['Date'].astype(str).str[:4] == '2024']['Trains_circulés'].sum()
+        ligne = impact[(impact['Gare'] == 'Toulouse Matabiau') & (impact['Annee'] == 2024)]
+        self.assertEqual(ligne['Trains_circulés'].iloc[0], attendu)
+        print("Impact par gare et par année OK")
+
+    def test_moyennes_ponderees(self):
+        """Les gares très fréquentées pèsent davantage"""
+        impact = pd.DataFrame({'Annee': [2024, 2024], 'voyageurs': [900.0, 100.0],
+                               'voyageurs_retardes': [90.0, 50.0], 'voyageurs_annulations': [9.0, 0.0]})
+        moyennes = moyennes_ponderees(impact)
+        self.assertAlmostEqual(moyennes['Taux_retard'].iloc[0], 14.0)
+        self.assertAlmostEqual(moyennes['Taux_annulation'].iloc[0], 0.9)
+        print("Moyennes pondérées OK")
+
+    def test_cache(self):
+        """La table est relue depuis le cache tant que les sources sont inchangées"""
+        loader = self.loader()
+        premier = charger_impact(loader)
+        chemin = chemin_defaut(loader)
+        date = os.path.getmtime(chemin)
+
+        second = charger_impact(self.loader())
+        self.assertEqual(os.path.getmtime(chemin), date)
+        pd.testing.assert_frame_equal(second, premier)
+
+        # Une autre fréquentation change la clé : la table est recalculée
+        reference = os.path.join(self.dossier, 'frequentation.csv')
+        with open(FICHIER_REFERENCE, encoding='utf-8-sig') as source, \
+                open(reference, 'w', encoding='utf-8') as copie:
+            copie.write(source.read().replace('14522596', '14522597'))
+        troisieme = charger_impact(loader, reference=reference)
+        self.assertEqual(troisieme['voyageurs'].sum() - premier['voyageurs'].sum(), 1)
+        print("Cache de l'impact OK")
+
+    def test_frequentation_par_le_cache(self):
+        """La fréquentation passe par le cache : registre vérifié, mode hors ligne servi"""
+        with self.assertRaises(ValueError):
+            charger_impact(self.loader(registry={NOM_FREQUENTATION: '0' * 64}))
+
+        premier = charger_impact(self.loader())
+        hors_ligne = self.loader(offline=True)
+        pd.testing.assert_frame_equal(charger_impact(hors_ligne, force=True), premier)
+        self.assertIsNotNone(hors_ligne.get_hash(NOM_FREQUENTATION))
+        with self.assertRaises(FileNotFoundError):
+            charger_impact(DataLoader(urls=self.urls, cache_dir=os.path.join(self.dossier, 'vide'),
+                                      offline=True))
+        print("Fréquentation par le cache OK")
+
+    def test_cache_invalide_si_code_modifie(self):
+        """Une modification du code de calcul recalcule la table"""
+        code = os.path.join(self.dossier, 'impact_voyageurs.py')
+        shutil.copy(impact_voyageurs.FICHIERS_CODE[-1], code)
+        fichiers = impact_voyageurs.FICHIERS_CODE
+        impact_voyageurs.FICHIERS_CODE = fichiers[:-1] + [code]
+        loader = self.loader()
+        try:
+            charger_impact(loader)
+            cle_initiale = lire_cle(chemin_defaut(loader))
+            with open(code, 'a', encoding='utf-8') as f:
+                f.write("\n# nouvel indicateur\n")
+            charger_impact(loader)
+        finally:
+            impact_voyageurs.FICHIERS_CODE = fichiers
+        self.assertNotEqual(lire_cle(chemin_defaut(loader)), cle_initiale)
+        print("Invalidation par le code OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS IMPACT VOYAGEURS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestImpactVoyageurs)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS D'IMPACT VOYAGEURS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
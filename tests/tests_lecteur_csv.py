@@ -0,0 +1,93 @@
+"""
+TESTS du lecteur CSV avec détection du format
+
+"""
+import unittest
+import os
+import sys
+import json
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+import lecteur_csv
+from lecteur_csv import analyser, detecter_dialecte, lire_csv, noms_canoniques
+from data_loader import read_csv_file
+
+DOSSIER_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'base_de_donnees_version_csv')
+
+
+class TestLecteurCsv(unittest.TestCase):
+    """Tests de la détection du dialecte et de la lecture en une passe"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+        lecteur_csv._DIALECTES.clear()
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def test_dialectes(self):
+        """Point-virgule + BOM, virgule + guillemets + noms à points, cp1252"""
+        sncf = analyser('\ufeffDate;Départ;Arrivée\n2025-07;A;B\n'.encode('utf-8'))
+        self.assertEqual((sncf['sep'], sncf['encoding'], sncf['convention']), (';', 'utf-8-sig', 'espaces'))
+        self.assertEqual(sncf['colonnes'], ['Date', 'Départ', 'Arrivée'])
+
+        points = analyser(b'"Date","D\xc3\xa9part","Nombre.de.trains.programm\xc3\xa9s"\n"2025-07","A",3\n')
+        self.assertEqual((points['sep'], points['quotechar'], points['convention']), (',', '"', 'points'))
+
+        latin = analyser('Date;Départ\n2025-07;Béziers\n'.encode('cp1252'))
+        self.assertEqual(latin['encoding'], 'cp1252')
+        print("Dialectes OK")
+
+    def test_noms_canoniques(self):
+        """Les noms à points sont ramenés aux noms du schéma"""
+        noms = noms_canoniques(['Date', 'Nombre.de.trains.en.retard.à.l.arrivée', ' Autre '], 'intercites')
+        self.assertEqual(noms, {'Nombre.de.trains.en.retard.à.l.arrivée': "Nombre de trains en retard à l'arrivée",
+                                ' Autre ': 'Autre'})
+        print("Noms canoniques OK")
+
+    def test_liste_gares_lue_une_fois(self):
+        """liste_gares_occitanie.csv : une seule lecture, mêmes colonnes que les autres fichiers"""
+        chemin = os.path.join(DOSSIER_CSV, 'liste_gares_occitanie.csv')
+        with mock.patch('lecteur_csv.pd.read_csv', wraps=lecteur_csv.pd.read_csv) as lecture:
+            df = read_csv_file(chemin, 'intercites')
+        self.assertEqual(lecture.call_count, 1)
+        reference = read_csv_file(os.path.join(DOSSIER_CSV, 'retard_france_intercites.csv'), 'intercites')
+        self.assertEqual(list(df.columns), list(reference.columns))
+        self.assertEqual(str(df['Nombre de trains programmés'].dtype), 'Int32')
+        self.assertEqual(str(df['Date'].dtype), 'period[M]')
+        print("Liste des gares lue une fois OK")
+
+    def test_cache_par_empreinte(self):
+        """Le dialecte est retrouvé dans le cache JSON par l'empreinte du fichier"""
+        chemin = os.path.join(DOSSIER_CSV, 'tarbes_retard_arrivee_intercites.csv')
+        cache = os.path.join(self.dossier, 'dialectes.json')
+        dialecte = detecter_dialecte(chemin, cache)
+        with open(cache, encoding='utf-8') as f:
+            self.assertEqual(list(json.load(f).values()), [dialecte])
+
+        lecteur_csv._DIALECTES.clear()
+        with mock.patch('lecteur_csv.analyser') as analyse:
+            self.assertEqual(detecter_dialecte(chemin, cache), dialecte)
+        analyse.assert_not_called()
+        self.assertEqual(len(lire_csv(chemin, 'intercites', cache)), 20)
+        print("Cache par empreinte OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS LECTEUR CSV")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestLecteurCsv)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU LECTEUR CSV PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
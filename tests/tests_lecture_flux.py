@@ -0,0 +1,95 @@
+"""
+TESTS de la lecture par lots du fichier Intercités national
+
+"""
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+import lecture_flux
+from agregation_ponderee import agreger_ponderes
+from data_loader import read_csv_file
+from lecture_flux import FICHIER_NATIONAL, agreger_flux, lire_par_lots
+from nettoyage import PIPELINE_INTERCITES, concatener
+
+DOSSIER_CSV = os.path.dirname(FICHIER_NATIONAL)
+
+
+def en_memoire(chemin, nom, cles):
+    df = PIPELINE_INTERCITES(concatener({nom: read_csv_file(chemin, 'intercites')}))
+    return agreger_ponderes(df, cles)
+
+
+class TestLectureFlux(unittest.TestCase):
+    """Tests de l'équivalence entre lecture par lots et lecture complète"""
+
+    def comparer(self, obtenu, attendu, cles):
+        self.assertEqual(len(obtenu), len(attendu))
+        self.assertEqual(obtenu[cles].astype(str).values.tolist(), attendu[cles].astype(str).values.tolist())
+        for col in ['Trains_programmés', 'Trains_retard', 'nb_mois', 'Taux_retard', 'Taux_annulation']:
+            self.assertEqual(obtenu[col].tolist(), attendu[col].tolist())
+        for a, b in zip(obtenu['Taux_régularité'].fillna(-1), attendu['Taux_régularité'].fillna(-1)):
+            self.assertAlmostEqual(a, b, places=6)
+
+    def test_fichier_national(self):
+        """Lots de 500 lignes : mêmes agrégats par relation que la lecture complète"""
+        obtenu = agreger_flux(FICHIER_NATIONAL, taille_lot=500)
+        self.assertGreater(obtenu.attrs['lots'], 5)
+        self.comparer(obtenu, en_memoire(FICHIER_NATIONAL, 'france_intercites', ['Départ', 'Arrivée']),
+                      ['Départ', 'Arrivée'])
+        print("Fichier national OK")
+
+    def test_sens_decide_sur_le_fichier_entier(self):
+        """L'inversion Départ/Arrivée s'applique à tous les lots"""
+        chemin = os.path.join(DOSSIER_CSV, 'tarbes_retard_arrivee_intercites.csv')
+        obtenu = agreger_flux(chemin, 'tarbes_intercites', ['Départ', 'Annee'], taille_lot=7)
+        self.comparer(obtenu, en_memoire(chemin, 'tarbes_intercites', ['Départ', 'Annee']),
+                      ['Départ', 'Annee'])
+        print("Sens décidé sur le fichier entier OK")
+
+    def test_taille_des_lots(self):
+        """Aucun lot ne dépasse la taille demandée"""
+        tailles = [len(lot) for lot in lire_par_lots(FICHIER_NATIONAL, 'intercites', 1000)]
+        self.assertTrue(all(t <= 1000 for t in tailles))
+        self.assertEqual(sum(tailles), len(read_csv_file(FICHIER_NATIONAL, 'intercites')))
+        print("Taille des lots OK")
+
+    def test_dialecte_et_valeurs_invalides(self):
+        """Fichier à virgules et noms à points, valeurs invalides : une seule lecture"""
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, 'points_intercites.csv')
+            with open(os.path.join(DOSSIER_CSV, 'liste_gares_occitanie.csv'), encoding='utf-8') as f:
+                lignes = f.read().splitlines()
+            lignes[1] = lignes[1].replace(',31,31,0,1,', ',"1 031","1 031",0,nd,')
+            with open(chemin, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lignes) + '\n')
+
+            with mock.patch('lecture_flux.pd.read_csv', wraps=lecture_flux.pd.read_csv) as lecture:
+                obtenu = agreger_flux(chemin, 'points_intercites', ['Départ', 'Arrivée'], taille_lot=3)
+            self.assertEqual(lecture.call_count, 1)
+            self.comparer(obtenu, en_memoire(chemin, 'points_intercites', ['Départ', 'Arrivée']),
+                          ['Départ', 'Arrivée'])
+            lot = next(lire_par_lots(chemin, 'intercites', 3))
+            self.assertEqual(lot['Nombre de trains programmés'].iloc[0], 1031)
+            self.assertEqual(lot.attrs['valeurs_invalides'], {"Nombre de trains en retard à l'arrivée": 1})
+        print("Dialecte et valeurs invalides OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS LECTURE PAR LOTS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestLectureFlux)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE LECTURE PAR LOTS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
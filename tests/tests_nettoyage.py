@@ -0,0 +1,218 @@
+"""
+TESTS du nettoyage des données Intercités et de l'instantané Parquet
+
+"""
+import pandas as pd
+import unittest
+import os
+import sys
+import shutil
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from nettoyage import (nettoyer_intercites, Pipeline, PIPELINE_INTERCITES,
+                       PIPELINE_DASHBOARD, concatener, convertir_numeriques)
+import snapshot_intercites
+from snapshot_intercites import charger_intercites, lire_cle
+from sources_locales import DOSSIER_CSV, AvecSourcesLocales
+
+FICHIERS_INTERCITES = {
+    'albi_intercites': 'albi_retard_arrivee_intercites.csv',
+    'tarbes_intercites': 'tarbes_retard_arrivee_intercites.csv',
+    'toulouse_intercites': 'toulouse_matabiau_retard_arrivee_intercites.csv',
+}
+
+
+class TestNettoyage(unittest.TestCase):
+    """Tests des règles de nettoyage Intercités"""
+
+    def setUp(self):
+        self.data_dict = {
+            'tarbes_intercites': pd.DataFrame({
+                'Date ': ['2023-01', '2023-02'],
+                'Départ': ['TARBES', 'TARBES'],
+                'Arrivée': ['PARIS-AUSTERLITZ', 'PARIS-AUSTERLITZ'],
+                'Nombre de trains programmés': [30, 28],
+                'Nombre de trains ayant circulé': [29, 28],
+                'Nombre de trains annulés': [1, 0],
+                "Nombre de trains en retard à l'arrivée": [3, 2],
+                'Taux de régularité': ['89,6', '92.8'],
+            }),
+            'albi_intercites': pd.DataFrame({
+                'Date': ['2023-01', '2023-01'],
+                'Départ': ['RODEZ/ALBI', 'ALBI'],
+                'Arrivée': ['PARIS-AUSTERLITZ', 'ALBI'],
+                'Nombre de trains programmés': [31, 1],
+                'Nombre de trains ayant circulé': [31, 1],
+                'Nombre de trains annulés': [0, 0],
+                "Nombre de trains en retard à l'arrivée": [1, 0],
+                'Taux de régularité': [96.7, 100.0],
+            }),
+        }
+
+    def test_inversion_depart_arrivee(self):
+        """Tarbes et Albi sont remis dans le sens Paris -> gare"""
+        df = nettoyer_intercites(self.data_dict)
+        self.assertTrue((df['Départ'] == 'PARIS-AUSTERLITZ').all())
+        self.assertEqual(set(df['Arrivée']), {'TARBES', 'RODEZ/ALBI'})
+        print("Inversion Départ/Arrivée OK")
+
+    def test_relations_invalides_filtrees(self):
+        """Les lignes dont Départ et Arrivée sont identiques sont retirées"""
+        df = nettoyer_intercites(self.data_dict)
+        self.assertEqual(len(df), 3)
+        self.assertFalse((df['Départ'] == df['Arrivée']).any())
+        print("Filtrage relations invalides OK")
+
+    def test_colonnes_renommees_et_converties(self):
+        """Les colonnes sont renommées et converties en nombres"""
+        df = nettoyer_intercites(self.data_dict)
+        for col in ['Trains_programmés', 'Trains_retard', 'Taux_régularité']:
+            self.assertTrue(pd.api.types.is_numeric_dtype(df[col]), col)
+        self.assertIn('Date', df.columns)
+        self.assertAlmostEqual(df['Taux_régularité'].iloc[0], 89.6)
+        print("Renommage et conversion OK")
+
+    def test_conversion_numerique_francaise(self):
+        """Virgule décimale, séparateurs de milliers et symboles sont gérés"""
+        df = pd.DataFrame({
+            'Trains_programmés': [120, 80, 95],
+            'Taux_régularité': ['1 234,5', '1.234,5', '95 %'],
+            'Trains_retard': ['12', '\u202f7', 'n/a'],
+        })
+        resultat = convertir_numeriques(df)
+
+        self.assertEqual(resultat['Trains_programmés'].dtype, 'int64')
+        self.assertEqual(list(resultat['Taux_régularité']), [1234.5, 1234.5, 95.0])
+        self.assertEqual(resultat['Trains_retard'].iloc[1], 7)
+        self.assertTrue(pd.isna(resultat['Trains_retard'].iloc[2]))
+        self.assertEqual(resultat.attrs['valeurs_invalides'], {'Trains_retard': 1})
+        print("Conversion numérique OK")
+
+    def test_conversion_texte_et_exposant(self):
+        """Les lettres d'un libellé sont retirées ; l'exposant n'est gardé que pour un réel"""
+        df = pd.DataFrame({'Trains_retard': ['12 retards', '3 trains', '2,5e1 %', '1e3']})
+        resultat = convertir_numeriques(df)
+        self.assertEqual(list(resultat['Trains_retard']), [12, 3, 25, 1000])
+        self.assertEqual(resultat.attrs['valeurs_invalides'], {})
+        print("Conversion texte et exposant OK")
+
+    def test_etapes_chronometrees(self):
+        """Le pipeline enregistre la durée de chacune de ses étapes"""
+        nettoyer_intercites(self.data_dict, PIPELINE_INTERCITES)
+        self.assertEqual(
+            list(PIPELINE_INTERCITES.durees),
+            ['normaliser_colonnes', 'corriger_sens', 'convertir_numeriques', 'valider']
+        )
+        self.assertTrue(all(d >= 0 for d in PIPELINE_INTERCITES.durees.values()))
+        print("Chronométrage des étapes OK")
+
+    def test_composition_pipeline(self):
+        """Deux pipelines se composent avec +"""
+        complet = PIPELINE_INTERCITES + PIPELINE_DASHBOARD
+        self.assertIsInstance(complet, Pipeline)
+        df = complet(concatener(self.data_dict))
+
+        self.assertEqual(set(df['Ville']), {'Tarbes', 'Albi'})
+        self.assertTrue((df['Départ'] == 'Paris-Austerlitz').all())
+        self.assertEqual(df['Annee'].iloc[0], 2023)
+        self.assertIn('Mois', df.columns)
+        print("Composition du pipeline OK")
+
+    def test_colonnes_requises(self):
+        """Une colonne requise manquante lève une KeyError"""
+        incomplet = {'albi_intercites': self.data_dict['albi_intercites'].drop(columns=['Date'])}
+        with self.assertRaises(KeyError):
+            nettoyer_intercites(incomplet)
+        print("Colonnes requises OK")
+
+
+class TestSnapshotIntercites(AvecSourcesLocales):
+    """Tests de l'instantané Parquet de la table nettoyée"""
+
+    FICHIERS = FICHIERS_INTERCITES
+
+    def setUp(self):
+        super().setUp()
+        self.chemin = os.path.join(self.dossier, 'intercites.parquet')
+
+    def test_instantane_relu_si_a_jour(self):
+        """Le second chargement lit l'instantané sans reconstruire la table"""
+        premier = charger_intercites(self.loader(), chemin=self.chemin)
+        self.assertIsNotNone(lire_cle(self.chemin))
+        # Fichier temporaire à nom unique, renommé : aucun reste à côté de l'instantané
+        self.assertEqual([f for f in os.listdir(self.dossier) if f.endswith(('.part', '.tmp'))], [])
+
+        construire = snapshot_intercites.construire
+        snapshot_intercites.construire = None  # tout appel échouerait
+        try:
+            second = charger_intercites(self.loader(), chemin=self.chemin)
+        finally:
+            snapshot_intercites.construire = construire
+
+        pd.testing.assert_frame_equal(second, premier)
+        self.assertEqual(second['Départ'].dtype, 'category')
+        print("Instantané à jour OK")
+
+    def test_instantane_reconstruit_si_source_modifiee(self):
+        """Une modification d'un fichier source invalide l'instantané"""
+        charger_intercites(self.loader(), chemin=self.chemin)
+        cle_initiale = lire_cle(self.chemin)
+
+        chemin_tarbes = os.path.join(self.sources, FICHIERS_INTERCITES['tarbes_intercites'])
+        with open(chemin_tarbes, 'a', encoding='utf-8') as f:
+            f.write("2025-08;PARIS-AUSTERLITZ;TARBES;20;20;0;2;90.0;9.0\n")
+
+        df = charger_intercites(self.loader(), chemin=self.chemin)
+        self.assertNotEqual(lire_cle(self.chemin), cle_initiale)
+        self.assertIn('2025-08', set(df['Date'].astype(str)))
+        print("Invalidation instantané OK")
+
+    def test_instantane_reconstruit_si_pipeline_modifie(self):
+        """Une modification du code du pipeline invalide l'instantané"""
+        code = os.path.join(self.dossier, 'nettoyage.py')
+        shutil.copy(snapshot_intercites.FICHIERS_PIPELINE[2], code)
+        fichiers = snapshot_intercites.FICHIERS_PIPELINE
+        snapshot_intercites.FICHIERS_PIPELINE = fichiers[:2] + [code] + fichiers[3:]
+        try:
+            charger_intercites(self.loader(), chemin=self.chemin)
+            cle_initiale = lire_cle(self.chemin)
+            with open(code, 'a', encoding='utf-8') as f:
+                f.write("\n# nouvelle règle de nettoyage\n")
+            charger_intercites(self.loader(), chemin=self.chemin)
+        finally:
+            snapshot_intercites.FICHIERS_PIPELINE = fichiers
+        self.assertNotEqual(lire_cle(self.chemin), cle_initiale)
+        print("Invalidation par le pipeline OK")
+
+    def test_instantane_conserve_si_source_manquante(self):
+        """Une source non récupérée ne remplace pas l'instantané complet"""
+        premier = charger_intercites(self.loader(), chemin=self.chemin)
+        cle_initiale = lire_cle(self.chemin)
+
+        self.urls['cerbere_intercites'] = Path(os.path.join(self.sources, 'absent.csv')).as_uri()
+        partiel = charger_intercites(self.loader(), chemin=self.chemin, force=True)
+        self.assertEqual(len(partiel), len(premier))
+        self.assertEqual(lire_cle(self.chemin), cle_initiale)
+        pd.testing.assert_frame_equal(pd.read_parquet(self.chemin), premier)
+        print("Instantané conservé si source manquante OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS NETTOYAGE INTERCITÉS")
+    print("="*50)
+
+    suite = unittest.TestSuite([
+        unittest.TestLoader().loadTestsFromTestCase(TestNettoyage),
+        unittest.TestLoader().loadTestsFromTestCase(TestSnapshotIntercites),
+    ])
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE NETTOYAGE PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
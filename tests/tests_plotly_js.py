@@ -0,0 +1,111 @@
+"""
+TESTS du bundle plotly.js figé et de sa copie à côté des pages
+
+"""
+import hashlib
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from cache_donnees import CacheDonnees
+from plotly_js import (DOSSIER_VENDOR, PAQUET_PLOTLY, URL_PLOTLY, VERSION_PLOTLY,
+                       balise_plotly, bundle_paquet, recuperer_bundle, vendoriser)
+
+CONTENU = b"/* plotly-basic */ window.Plotly = {};\n"
+
+
+class TestPlotlyJs(unittest.TestCase):
+    """Tests sans réseau : le cache est rempli à la main ou vide en mode hors ligne"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.dossier = self._dossier.name
+        self.empreinte = hashlib.sha256(CONTENU).hexdigest()
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def cache(self, url=URL_PLOTLY, registre=None, contenu=CONTENU):
+        """Cache hors ligne contenant un bundle téléchargé depuis url."""
+        cache = CacheDonnees(os.path.join(self.dossier, 'cache'), registre=registre, hors_ligne=True)
+        with open(cache.chemin_objet(self.empreinte), 'wb') as f:
+            f.write(contenu)
+        cache.index[PAQUET_PLOTLY] = {'url': url, 'sha256': self.empreinte}
+        return cache
+
+    def test_version_figee(self):
+        """Le bundle partiel est celui de la version figée, sinon le bundle du paquet"""
+        self.assertIn(f"{PAQUET_PLOTLY}-{VERSION_PLOTLY}.min.js", URL_PLOTLY)
+        chemin, nom = recuperer_bundle(self.cache(registre={PAQUET_PLOTLY: self.empreinte}))
+        self.assertEqual(nom, f"{PAQUET_PLOTLY}-{VERSION_PLOTLY}")
+        with open(chemin, 'rb') as f:
+            self.assertEqual(f.read(), CONTENU)
+
+        # Un bundle d'une autre version en cache n'est pas servi
+        autre = URL_PLOTLY.replace(VERSION_PLOTLY, '2.0.0')
+        chemin, nom = recuperer_bundle(self.cache(url=autre))
+        self.assertEqual(chemin, bundle_paquet())
+        self.assertTrue(nom.startswith('plotly-') and not nom.startswith(PAQUET_PLOTLY))
+        print("Version figée OK")
+
+    def test_verification_empreinte(self):
+        """Un bundle différent du registre ou corrompu est refusé, sans repli silencieux"""
+        with self.assertRaises(ValueError):
+            recuperer_bundle(self.cache(registre={PAQUET_PLOTLY: '0' * 64}))
+        with self.assertRaises(ValueError):
+            recuperer_bundle(self.cache(contenu=b"corrompu"))
+        print("Vérification de l'empreinte OK")
+
+    def test_vendoriser(self):
+        """Copie sous un nom à empreinte ; les anciennes versions sont supprimées"""
+        page = os.path.join(self.dossier, 'site')
+        vendor = os.path.join(page, DOSSIER_VENDOR)
+        os.makedirs(vendor)
+        for ancien in ('plotly-basic-2.0.0.0123456789ab.min.js', 'autre.js'):
+            with open(os.path.join(vendor, ancien), 'w') as f:
+                f.write("//")
+
+        source = os.path.join(self.dossier, 'bundle.js')
+        with open(source, 'wb') as f:
+            f.write(CONTENU)
+        src = vendoriser(page, source=(source, f"{PAQUET_PLOTLY}-{VERSION_PLOTLY}"))
+        self.assertEqual(src, f"{DOSSIER_VENDOR}/{PAQUET_PLOTLY}-{VERSION_PLOTLY}.{self.empreinte[:12]}.min.js")
+        with open(os.path.join(page, src), 'rb') as f:
+            self.assertEqual(f.read(), CONTENU)
+        self.assertEqual(sorted(os.listdir(vendor)), sorted(['autre.js', os.path.basename(src)]))
+        self.assertEqual(vendoriser(page, source=(source, f"{PAQUET_PLOTLY}-{VERSION_PLOTLY}")), src)
+        print("Copie dans vendor OK")
+
+    def test_balise(self):
+        """Balise <script> de chaque mode"""
+        page = os.path.join(self.dossier, 'site', 'page.html')
+        self.assertEqual(balise_plotly(page, 'cdn'), f'<script src="{URL_PLOTLY}"></script>')
+
+        cache = self.cache(registre={PAQUET_PLOTLY: self.empreinte})
+        balise = balise_plotly(page, 'local', cache=cache)
+        src = f"{DOSSIER_VENDOR}/{PAQUET_PLOTLY}-{VERSION_PLOTLY}.{self.empreinte[:12]}.min.js"
+        self.assertEqual(balise, f'<script src="{src}"></script>')
+        self.assertTrue(os.path.exists(os.path.join(self.dossier, 'site', src)))
+
+        with self.assertRaises(ValueError):
+            balise_plotly(page, 'inline')
+        print("Balises OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS BUNDLE PLOTLY.JS")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPlotlyJs)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DU BUNDLE PLOTLY.JS PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)
@@ -0,0 +1,80 @@
+"""
+TESTS du regroupement par mois et gare de départ
+
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'script', 'edition'))
+from regroupement import DOSSIER_CSV, fichiers_gares, regrouper_fichiers
+
+TOULOUSE = os.path.join(DOSSIER_CSV, 'toulouse_matabiau_retard_arrivee_intercites.csv')
+
+
+class TestRegroupement(unittest.TestCase):
+    """Tests du regroupement de plusieurs fichiers"""
+
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self.sortie = self._dossier.name
+
+    def tearDown(self):
+        self._dossier.cleanup()
+
+    def test_identique_au_script_toulouse(self):
+        """Même résultat que l'ancien regroupement de Toulouse, en CSV et Parquet"""
+        resultats = regrouper_fichiers([TOULOUSE], self.sortie, taille_lot=7)
+        attendu = pd.read_csv(TOULOUSE, sep=';', encoding='utf-8-sig').groupby(['Date', 'Départ']).agg({
+            'Nombre de trains programmés': 'sum',
+            "Nombre de trains en retard à l'arrivée": 'sum',
+            'Taux de régularité': 'mean',
+            'Arrivée': 'first',
+        }).reset_index()
+
+        csv, parquet = resultats[TOULOUSE]['fichiers']
+        for obtenu in (pd.read_csv(csv, sep=';', encoding='utf-8'), pd.read_parquet(parquet)):
+            self.assertEqual(len(obtenu), len(attendu))
+            for col in ['Date', 'Départ', 'Nombre de trains programmés', 'Arrivée']:
+                self.assertEqual(obtenu[col].astype(str).tolist(), attendu[col].astype(str).tolist())
+            for a, b in zip(obtenu['Taux de régularité'], attendu['Taux de régularité']):
+                self.assertAlmostEqual(a, b, places=4)
+        print("Identique au script Toulouse OK")
+
+    def test_plusieurs_fichiers_en_parallele(self):
+        """Tous les fichiers par gare sont regroupés en une exécution"""
+        chemins = fichiers_gares()
+        self.assertIn(os.path.abspath(TOULOUSE), chemins)
+        self.assertFalse(any('retard_france' in c for c in chemins))
+        resultats = regrouper_fichiers(chemins, self.sortie, formats=['csv'], max_workers=2)
+        self.assertEqual(set(resultats), set(chemins))
+        for resultat in resultats.values():
+            self.assertLessEqual(resultat['lignes_apres'], resultat['lignes_avant'])
+            self.assertTrue(os.path.exists(resultat['fichiers'][0]))
+        print("Plusieurs fichiers en parallèle OK")
+
+    def test_format_inconnu(self):
+        """Un format inconnu est refusé"""
+        with self.assertRaises(ValueError):
+            regrouper_fichiers([TOULOUSE], self.sortie, formats=['xlsx'])
+        print("Format inconnu OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTS REGROUPEMENT")
+    print("="*50)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestRegroupement)
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("="*50)
+    if result.wasSuccessful():
+        print("TOUS LES TESTS DE REGROUPEMENT PASSENT !")
+    else:
+        print("CERTAINS TESTS ONT ÉCHOUÉ")
+    print("="*50)